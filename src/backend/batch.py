@@ -0,0 +1,238 @@
+"""
+Streaming batch evaluator for files of expressions, one expression per line.
+
+Lines are independent by default and are spread across a process pool in
+ordered chunks; `--sequential` evaluates them in order with a single
+interpreter, so variables carry over from one line to the next.
+
+Usage (from the repository root):
+    python -m src.backend.batch expressions.txt --output results.csv
+    cat expressions.txt | python -m src.backend.batch --format ndjson --workers 8
+    python -m src.backend.batch setup.txt main.txt --sequential
+"""
+
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.evaluator import evaluate_expression
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, NamedTuple, TextIO
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+
+class BatchResult(NamedTuple):
+    """
+    Evaluation result of one input line.
+
+    Attributes:
+        line (int): Line number of the expression, counted across all inputs.
+        expression (str): The evaluated expression.
+        result (str | None): The result, "" for empty lines, None on error.
+        type_error (str | None): Type of error if one occurred.
+        error (str | None): Error message if one occurred.
+    """
+
+    line: int
+    expression: str
+    result: str | None = None
+    type_error: str | None = None
+    error: str | None = None
+
+
+def read_expressions(paths: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """
+    Stream expressions from files, "-" meaning stdin, without loading them in memory.
+
+    Args:
+        paths (Iterable[str]): Files to read, in order.
+
+    Returns:
+        Iterator[tuple[int, str]]: Line numbers and expressions.
+    """
+    line: int = 0
+    for path in paths:
+        stream: TextIO = sys.stdin if path == "-" else open(path, "r")
+        try:
+            for text in stream:
+                line += 1
+                yield line, text.rstrip("\r\n")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def evaluate_line(line: int, expression: str, interpreter: Interpreter) -> BatchResult:
+    """
+    Evaluate one line, turning any error into a result.
+
+    Args:
+        line (int): Line number of the expression.
+        expression (str): The expression to evaluate.
+        interpreter (Interpreter): Interpreter that holds the variables.
+
+    Returns:
+        BatchResult: The result or the error of the line.
+    """
+    try:
+        result = evaluate_expression(expression, interpreter)
+        return BatchResult(line, expression, "" if result is None else str(result))
+
+    except Exception as error:
+        return BatchResult(line, expression, None, type(error).__name__, str(error))
+
+
+def evaluate_chunk(chunk: list[tuple[int, str]]) -> list[BatchResult]:
+    """
+    Evaluate independent lines, each one with an empty interpreter.
+
+    Args:
+        chunk (list[tuple[int, str]]): Line numbers and expressions.
+
+    Returns:
+        list[BatchResult]: Results in the same order as the chunk.
+    """
+    return [evaluate_line(line, text, Interpreter()) for line, text in chunk]
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of at most `size` items.
+
+    Args:
+        items (Iterable): Items to split.
+        size (int): Maximum size of a chunk.
+
+    Returns:
+        Iterator[list]: The chunks, in order.
+    """
+    iterator: Iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def ordered_map(
+    executor: Executor, function: Callable, items: Iterable, window: int
+) -> Iterator:
+    """
+    Map a function over items in an executor, keeping at most `window` items in flight.
+
+    Unlike `Executor.map`, the input is consumed lazily, so memory stays
+    bounded for inputs of any size; results are yielded in input order.
+
+    Args:
+        executor (Executor): Executor that runs the function.
+        function (Callable): Function to apply to each item.
+        items (Iterable): Items to map over.
+        window (int): Maximum number of submitted but not yet yielded items.
+
+    Returns:
+        Iterator: The results, in input order.
+    """
+    pending: deque[Future] = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, item))
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def evaluate_parallel(
+    expressions: Iterable[tuple[int, str]], workers: int, chunk_size: int
+) -> Iterator[BatchResult]:
+    """
+    Evaluate independent lines in a process pool, yielding results in input order.
+
+    Args:
+        expressions (Iterable[tuple[int, str]]): Line numbers and expressions.
+        workers (int): Number of worker processes.
+        chunk_size (int): Number of lines sent to a worker at once.
+
+    Returns:
+        Iterator[BatchResult]: The results, in input order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = chunked(expressions, chunk_size)
+        for results in ordered_map(executor, evaluate_chunk, chunks, workers * 2):
+            yield from results
+
+
+def evaluate_sequential(
+    expressions: Iterable[tuple[int, str]],
+) -> Iterator[BatchResult]:
+    """
+    Evaluate lines in order with one interpreter, so variables carry between lines.
+
+    Args:
+        expressions (Iterable[tuple[int, str]]): Line numbers and expressions.
+
+    Returns:
+        Iterator[BatchResult]: The results, in input order.
+    """
+    interpreter: Interpreter = Interpreter()
+    for line, text in expressions:
+        yield evaluate_line(line, text, interpreter)
+
+
+def write_csv(results: Iterable[BatchResult], output: TextIO) -> None:
+    writer = csv.writer(output)
+    writer.writerow(BatchResult._fields)
+    writer.writerows(results)
+
+
+def write_ndjson(results: Iterable[BatchResult], output: TextIO) -> None:
+    for result in results:
+        output.write(json.dumps(result._asdict()) + "\n")
+
+
+WRITERS: dict[str, Callable[[Iterable[BatchResult], TextIO], None]] = {
+    "csv": write_csv,
+    "ndjson": write_ndjson,
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument(
+        "inputs", nargs="*", default=["-"], help='input files, "-" for stdin'
+    )
+    arguments.add_argument("--output", "-o", default="-", help='"-" for stdout')
+    arguments.add_argument("--format", "-f", choices=tuple(WRITERS), default="csv")
+    arguments.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    arguments.add_argument("--chunk-size", type=int, default=1000)
+    arguments.add_argument(
+        "--sequential",
+        action="store_true",
+        help="evaluate in order with one interpreter, carrying variables between lines",
+    )
+    options = arguments.parse_args(argv)
+
+    expressions = read_expressions(options.inputs)
+    if options.sequential:
+        results: Iterable[BatchResult] = evaluate_sequential(expressions)
+    elif options.workers <= 1:
+        results = (
+            evaluate_line(line, text, Interpreter()) for line, text in expressions
+        )
+    else:
+        results = evaluate_parallel(expressions, options.workers, options.chunk_size)
+
+    output: TextIO = (
+        sys.stdout if options.output == "-" else open(options.output, "w", newline="")
+    )
+    try:
+        WRITERS[options.format](results, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Import-time benchmark of the evaluation core and of the web server.
+
+Every module is imported in a fresh interpreter, several times, and the
+median cumulative import time reported by `python -X importtime` is kept.
+The run also checks that the core pulls in no web dependencies and that
+importing it leaves the working directory untouched.
+
+Usage (from the repository root):
+    python -m src.backend.benchmarks.import_time
+    python -m src.backend.benchmarks.import_time --json > import_time.json
+    python -m src.backend.benchmarks.import_time --baseline import_time.json
+"""
+
+from typing import Any
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# modules that must import with the standard library only
+CORE_MODULES: tuple[str, ...] = (
+    "src.backend.interpreter.evaluator",
+    "src.backend.batch",
+)
+
+SERVER_MODULES: tuple[str, ...] = ("src.backend.main",)
+
+WEB_PACKAGES: tuple[str, ...] = ("fastapi", "pydantic", "starlette", "uvicorn")
+
+_PROBE: str = """
+import json, sys
+import {module}
+print(json.dumps(sorted(name for name in {packages!r} if name in sys.modules)))
+"""
+
+
+def measure(module: str, repeat: int) -> dict[str, Any]:
+    """
+    Import a module in fresh interpreters and collect its import time.
+
+    Args:
+        module (str): Dotted name of the module.
+        repeat (int): Number of fresh interpreters to use.
+
+    Returns:
+        dict[str, Any]: Median and minimum import time in ms, loaded web packages
+        and files created or removed in the working directory.
+    """
+    root: str = os.getcwd()
+    timings: list[float] = []
+    web_packages: list[str] = []
+    side_effects: list[str] = []
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            before: set[str] = set(os.listdir(workdir))
+            process = subprocess.run(
+                [
+                    sys.executable,
+                    "-X",
+                    "importtime",
+                    "-c",
+                    _PROBE.format(module=module, packages=WEB_PACKAGES),
+                ],
+                cwd=workdir,
+                env={**os.environ, "PYTHONPATH": root},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            after: set[str] = set(os.listdir(workdir))
+
+        timings.append(_cumulative_ms(process.stderr, module))
+        web_packages = json.loads(process.stdout)
+        side_effects = sorted(before ^ after)
+
+    return {
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+        "web_packages": web_packages,
+        "side_effects": side_effects,
+    }
+
+
+def _cumulative_ms(importtime: str, module: str) -> float:
+    # lines look like: "import time:  self [us] | cumulative | imported package"
+    for line in importtime.splitlines():
+        parts: list[str] = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+
+    raise RuntimeError(f"Module '{module}' wasn't found in the import time output.")
+
+
+def run(repeat: int) -> dict[str, Any]:
+    """
+    Measure every core and server module.
+
+    Args:
+        repeat (int): Number of fresh interpreters per module.
+
+    Returns:
+        dict[str, Any]: Measurements per module.
+    """
+    return {module: measure(module, repeat) for module in CORE_MODULES + SERVER_MODULES}
+
+
+def check(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """
+    Compare a run with a baseline and with the core import rules.
+
+    Args:
+        results (dict[str, Any]): Output of `run()`.
+        baseline (dict[str, Any]): A previous output of `run()`.
+        tolerance (float): Allowed slowdown, as a fraction of the baseline median.
+
+    Returns:
+        list[str]: Problems found, empty if everything is fine.
+    """
+    problems: list[str] = []
+
+    for module in CORE_MODULES:
+        if results[module]["web_packages"]:
+            problems.append(
+                f"{module} imports web packages: {results[module]['web_packages']}"
+            )
+        if results[module]["side_effects"]:
+            problems.append(
+                f"{module} changes files on import: {results[module]['side_effects']}"
+            )
+
+    for module, measurement in results.items():
+        if module not in baseline:
+            continue
+        limit: float = baseline[module]["median_ms"] * (1 + tolerance)
+        if measurement["median_ms"] > limit:
+            problems.append(
+                f"{module} imports in {measurement['median_ms']:.1f}ms, "
+                f"over the baseline limit of {limit:.1f}ms"
+            )
+
+    return problems
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--repeat", type=int, default=7)
+    arguments.add_argument("--json", action="store_true", help="print a JSON report")
+    arguments.add_argument("--baseline", help="JSON report of a previous run")
+    arguments.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown over the baseline, as a fraction",
+    )
+    options = arguments.parse_args(argv)
+
+    results: dict[str, Any] = run(options.repeat)
+
+    if options.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, measurement in results.items():
+            print(
+                f"{module:>36}: median {measurement['median_ms']:7.2f}ms  "
+                f"min {measurement['min_ms']:7.2f}ms  "
+                f"web packages {measurement['web_packages'] or '-'}  "
+                f"side effects {measurement['side_effects'] or '-'}"
+            )
+
+    baseline: dict[str, Any] = {}
+    if options.baseline:
+        with open(options.baseline, "r") as f:
+            baseline = json.load(f)
+
+    problems: list[str] = check(results, baseline, options.tolerance)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+"""
+Load-testing harness for the FastAPI app.
+
+Replays a weighted mix of `/expressions`, `/interpreter/reset` and `/logs`
+calls from many concurrent asyncio clients, either against the ASGI app
+driven in process or against a running (or locally started) uvicorn server.
+
+Usage (from the repository root):
+    python -m src.backend.benchmarks.load_test --requests 5000 --concurrency 64
+    python -m src.backend.benchmarks.load_test --target http --start-server
+    python -m src.backend.benchmarks.load_test --pathological "9^9^7" --pathological-every 1000
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+DEFAULT_EXPRESSIONS: tuple[str, ...] = (
+    "1+2*3",
+    "(4+5)*(2-7)",
+    "sqrt(16)+log(1024)",
+    "sin(0.5)^2+cos(0.5)^2",
+    "exp(1)/3",
+    "x = 42",
+    "x*2-1",
+    "-(3.5*2)+10/4",
+    "2^10",
+)
+
+DEFAULT_MIX: dict[str, int] = {"expressions": 90, "logs": 9, "reset": 1}
+
+
+@dataclass
+class RequestSpec:
+    """
+    A single request to replay against the target.
+
+    Attributes:
+        label (str): Name used to group the request in the report.
+        method (str): HTTP method.
+        path (str): Request path.
+        body (bytes | None): Encoded JSON body, if any.
+    """
+
+    label: str
+    method: str
+    path: str
+    body: bytes | None = None
+
+
+@dataclass
+class Scenario:
+    """
+    Description of the traffic to replay.
+
+    Attributes:
+        mix (dict[str, int]): Relative weight of each endpoint ("expressions", "reset", "logs").
+        expressions (list[str]): Pool of cheap expressions sent to `/expressions`.
+        pathological (str | None): Expensive expression injected periodically, if any.
+        pathological_every (int): Inject `pathological` once every this many requests.
+        seed (int): Seed for the random request mix, so runs are reproducible.
+    """
+
+    mix: dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    expressions: list[str] = field(default_factory=lambda: list(DEFAULT_EXPRESSIONS))
+    pathological: str | None = None
+    pathological_every: int = 1000
+    seed: int = 0
+
+    def generate(self, total: int) -> list[RequestSpec]:
+        """
+        Build the full, ordered list of requests for a run.
+
+        Args:
+            total (int): Number of requests to generate.
+
+        Returns:
+            list[RequestSpec]: Requests in the order they are dispatched.
+        """
+        rng = random.Random(self.seed)
+        labels: list[str] = list(self.mix)
+        weights: list[int] = [self.mix[label] for label in labels]
+        requests: list[RequestSpec] = []
+
+        for index in range(total):
+            if self.pathological is not None and index % self.pathological_every == (
+                self.pathological_every // 2
+            ):
+                requests.append(_expression_request(self.pathological, "pathological"))
+                continue
+
+            label: str = rng.choices(labels, weights)[0]
+            if label == "expressions":
+                requests.append(
+                    _expression_request(rng.choice(self.expressions), "expressions")
+                )
+            elif label == "reset":
+                requests.append(RequestSpec("reset", "POST", "/interpreter/reset"))
+            elif label == "logs":
+                requests.append(RequestSpec("logs", "GET", "/logs"))
+            else:
+                raise ValueError(f"Unknown endpoint in request mix: '{label}'.")
+
+        return requests
+
+
+def _expression_request(expression: str, label: str) -> RequestSpec:
+    body: bytes = json.dumps({"expression": expression}).encode()
+    return RequestSpec(label, "POST", "/expressions", body)
+
+
+class ASGITarget:
+    """
+    Drive an ASGI application in the current event loop, without sockets.
+
+    Because the app shares the loop with the clients, CPU-bound handlers show
+    up directly as event-loop lag and head-of-line blocking.
+    """
+
+    def __init__(self, app: Callable) -> None:
+        """
+        Constructor for ASGITarget.
+
+        Args:
+            app (Callable): The ASGI application to call.
+        """
+        self.app: Callable = app
+        self._lifespan_task: asyncio.Task | None = None
+        self._lifespan_queue: asyncio.Queue = asyncio.Queue()
+        self._lifespan_done: asyncio.Queue = asyncio.Queue()
+
+    async def start(self) -> None:
+        """
+        Run the lifespan startup of the application.
+        """
+
+        async def receive() -> dict:
+            return await self._lifespan_queue.get()
+
+        async def send(message: dict) -> None:
+            await self._lifespan_done.put(message)
+
+        scope: dict = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan_task = asyncio.create_task(self.app(scope, receive, send))
+        await self._lifespan_queue.put({"type": "lifespan.startup"})
+        message: dict = await self._lifespan_done.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"Application startup failed: {message}")
+
+    async def stop(self) -> None:
+        """
+        Run the lifespan shutdown of the application.
+        """
+        if self._lifespan_task is None:
+            return
+
+        await self._lifespan_queue.put({"type": "lifespan.shutdown"})
+        await self._lifespan_done.get()
+        await self._lifespan_task
+
+    def connect(self) -> "ASGITarget":
+        """
+        In-process targets don't hold connections, so every client shares the target.
+        """
+        return self
+
+    async def close(self) -> None:
+        pass
+
+    async def request(self, spec: RequestSpec) -> tuple[int, bytes]:
+        """
+        Send one request through the ASGI interface.
+
+        Args:
+            spec (RequestSpec): The request to send.
+
+        Returns:
+            tuple[int, bytes]: HTTP status code and response body.
+        """
+        body: bytes = spec.body or b""
+        headers: list[tuple[bytes, bytes]] = [
+            (b"host", b"loadtest"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if spec.body is not None:
+            headers.append((b"content-type", b"application/json"))
+
+        scope: dict = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": spec.method,
+            "scheme": "http",
+            "path": spec.path,
+            "raw_path": spec.path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80),
+            "state": {},
+        }
+        sent: list[bool] = [False]
+        status: list[int] = [0]
+        chunks: list[bytes] = []
+
+        # yield once, like a socket read would, so clients actually interleave
+        await asyncio.sleep(0)
+
+        async def receive() -> dict:
+            if not sent[0]:
+                sent[0] = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status[0], b"".join(chunks)
+
+
+class HTTPTarget:
+    """
+    Minimal HTTP/1.1 keep-alive client for a running server.
+
+    Each client opens its own connection, so concurrency maps directly to
+    the number of open sockets.
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        """
+        Constructor for HTTPTarget.
+
+        Args:
+            host (str): Server host.
+            port (int): Server port.
+        """
+        self.host: str = host
+        self.port: int = port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def connect(self) -> "HTTPTarget":
+        """
+        Create a per-client connection holder for the same server.
+        """
+        return HTTPTarget(self.host, self.port)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def request(self, spec: RequestSpec) -> tuple[int, bytes]:
+        """
+        Send one request over the keep-alive connection, reconnecting if needed.
+
+        Args:
+            spec (RequestSpec): The request to send.
+
+        Returns:
+            tuple[int, bytes]: HTTP status code and response body.
+        """
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+
+        body: bytes = spec.body or b""
+        head: str = (
+            f"{spec.method} {spec.path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if spec.body is not None:
+            head += "Content-Type: application/json\r\n"
+
+        self._writer.write(head.encode() + b"\r\n" + body)
+        await self._writer.drain()
+
+        try:
+            return await self._read_response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            await self.close()
+            raise
+
+    async def _read_response(self) -> tuple[int, bytes]:
+        assert self._reader is not None
+        status_line: bytes = await self._reader.readuntil(b"\r\n")
+        status: int = int(status_line.split()[1])
+        headers: dict[str, str] = {}
+
+        while True:
+            line: bytes = await self._reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding") == "chunked":
+            chunks: list[bytes] = []
+            while True:
+                size: int = int((await self._reader.readuntil(b"\r\n")).strip(), 16)
+                chunk: bytes = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            body: bytes = b"".join(chunks)
+        else:
+            body = await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection") == "close":
+            await self.close()
+
+        return status, body
+
+
+class LoopLagMonitor:
+    """
+    Measure how late the event loop wakes up a periodic task.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        """
+        Constructor for LoopLagMonitor.
+
+        Args:
+            interval (float): Seconds between samples.
+        """
+        self.interval: float = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            expected: float = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - expected))
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+
+    Args:
+        values (list[float]): Sorted samples.
+        fraction (float): Percentile between 0 and 1.
+
+    Returns:
+        float: The percentile value, or 0.0 if there are no samples.
+    """
+    if not values:
+        return 0.0
+
+    rank: int = max(0, min(len(values) - 1, int(round(fraction * len(values))) - 1))
+    return values[rank]
+
+
+@dataclass
+class LoadReport:
+    """
+    Aggregated result of a load run.
+
+    Attributes:
+        duration (float): Wall clock seconds of the run.
+        latencies (dict[str, list[float]]): Latencies in seconds, per request label.
+        http_errors (dict[str, int]): Responses with status >= 400 or transport failures, per label.
+        evaluation_errors (dict[str, int]): `/expressions` answers carrying an `error`, per label.
+        loop_lag (list[float]): Event-loop lag samples in seconds.
+    """
+
+    duration: float = 0.0
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    http_errors: dict[str, int] = field(default_factory=dict)
+    evaluation_errors: dict[str, int] = field(default_factory=dict)
+    loop_lag: list[float] = field(default_factory=list)
+
+    def record(
+        self, label: str, latency: float, http_error: bool, evaluation_error: bool
+    ) -> None:
+        self.latencies.setdefault(label, []).append(latency)
+        self.http_errors[label] = self.http_errors.get(label, 0) + http_error
+        self.evaluation_errors[label] = (
+            self.evaluation_errors.get(label, 0) + evaluation_error
+        )
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Summarize the run as plain data.
+
+        Returns:
+            dict[str, Any]: Throughput, latency percentiles (ms), error rates and loop lag.
+        """
+
+        def describe(samples: list[float]) -> dict[str, float]:
+            ordered: list[float] = sorted(samples)
+            return {
+                "count": len(ordered),
+                "p50_ms": percentile(ordered, 0.50) * 1000,
+                "p95_ms": percentile(ordered, 0.95) * 1000,
+                "p99_ms": percentile(ordered, 0.99) * 1000,
+                "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            }
+
+        all_latencies: list[float] = [
+            value for samples in self.latencies.values() for value in samples
+        ]
+        total: int = len(all_latencies)
+        endpoints: dict[str, Any] = {}
+
+        for label, samples in self.latencies.items():
+            endpoints[label] = describe(samples)
+            endpoints[label]["http_error_rate"] = self.http_errors[label] / len(samples)
+            endpoints[label]["evaluation_error_rate"] = (
+                self.evaluation_errors[label] / len(samples)
+            )
+
+        lag: list[float] = sorted(self.loop_lag)
+        return {
+            "requests": total,
+            "duration_s": self.duration,
+            "requests_per_second": total / self.duration if self.duration else 0.0,
+            "latency": describe(all_latencies),
+            "http_error_rate": sum(self.http_errors.values()) / total if total else 0.0,
+            "endpoints": endpoints,
+            "loop_lag": {
+                "p50_ms": percentile(lag, 0.50) * 1000,
+                "p99_ms": percentile(lag, 0.99) * 1000,
+                "max_ms": (lag[-1] if lag else 0.0) * 1000,
+            },
+        }
+
+
+async def run_load(
+    target: ASGITarget | HTTPTarget,
+    requests: list[RequestSpec],
+    concurrency: int,
+    timeout: float | None = None,
+) -> LoadReport:
+    """
+    Replay requests from `concurrency` clients sharing one work queue.
+
+    Args:
+        target (ASGITarget | HTTPTarget): Where to send the requests.
+        requests (list[RequestSpec]): Requests to replay, in dispatch order.
+        concurrency (int): Number of concurrent clients.
+        timeout (float | None): Per request timeout in seconds.
+
+    Returns:
+        LoadReport: Latencies, errors and loop lag of the run.
+    """
+    report: LoadReport = LoadReport()
+    pending: asyncio.Queue = asyncio.Queue()
+    for spec in requests:
+        pending.put_nowait(spec)
+
+    async def client() -> None:
+        connection = target.connect()
+        try:
+            while not pending.empty():
+                spec: RequestSpec = pending.get_nowait()
+                started: float = time.perf_counter()
+                http_error: bool = False
+                evaluation_error: bool = False
+
+                try:
+                    status, body = await asyncio.wait_for(
+                        connection.request(spec), timeout
+                    )
+                    http_error = status >= 400
+                    if not http_error and spec.path == "/expressions":
+                        evaluation_error = json.loads(body).get("error") is not None
+                except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError):
+                    http_error = True
+
+                report.record(
+                    spec.label,
+                    time.perf_counter() - started,
+                    http_error,
+                    evaluation_error,
+                )
+        finally:
+            await connection.close()
+
+    monitor: LoopLagMonitor = LoopLagMonitor()
+    await target.start()
+    monitor.start()
+    started: float = time.perf_counter()
+
+    try:
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    finally:
+        report.duration = time.perf_counter() - started
+        await monitor.stop()
+        report.loop_lag = monitor.samples
+        await target.stop()
+
+    return report
+
+
+def start_server(host: str, port: int, startup_timeout: float = 15.0) -> subprocess.Popen:
+    """
+    Start uvicorn serving `src.backend.main:app` and wait until it accepts connections.
+
+    Args:
+        host (str): Interface to bind.
+        port (int): Port to bind.
+        startup_timeout (float): Seconds to wait for the server to come up.
+
+    Returns:
+        subprocess.Popen: The server process; the caller must terminate it.
+
+    Raises:
+        RuntimeError: If the server doesn't come up in time.
+    """
+    process: subprocess.Popen = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.backend.main:app",
+            "--host",
+            host,
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ]
+    )
+    deadline: float = time.monotonic() + startup_timeout
+
+    async def probe() -> bool:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return True
+        except OSError:
+            return False
+
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The uvicorn server exited during startup.")
+        if asyncio.run(probe()):
+            return process
+        time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("The uvicorn server didn't start in time.")
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    """
+    Parse a request mix like "expressions=90,logs=9,reset=1".
+
+    Args:
+        text (str): Comma separated `endpoint=weight` pairs.
+
+    Returns:
+        dict[str, int]: Weight of each endpoint.
+    """
+    mix: dict[str, int] = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def format_report(summary: dict[str, Any]) -> str:
+    """
+    Render a report summary as readable text.
+
+    Args:
+        summary (dict[str, Any]): Output of `LoadReport.summary()`.
+
+    Returns:
+        str: Human readable report.
+    """
+    lines: list[str] = [
+        f"requests: {summary['requests']} in {summary['duration_s']:.2f}s "
+        f"({summary['requests_per_second']:.1f} req/s)",
+        "latency: p50 {p50_ms:.2f}ms  p95 {p95_ms:.2f}ms  p99 {p99_ms:.2f}ms  "
+        "max {max_ms:.2f}ms".format(**summary["latency"]),
+        f"http error rate: {summary['http_error_rate']:.2%}",
+        "event loop lag: p50 {p50_ms:.2f}ms  p99 {p99_ms:.2f}ms  "
+        "max {max_ms:.2f}ms".format(**summary["loop_lag"]),
+        "",
+    ]
+
+    for label, stats in sorted(summary["endpoints"].items()):
+        lines.append(
+            f"{label:>14}: {stats['count']:>7}  p50 {stats['p50_ms']:8.2f}ms  "
+            f"p95 {stats['p95_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  "
+            f"http errors {stats['http_error_rate']:.2%}  "
+            f"eval errors {stats['evaluation_error_rate']:.2%}"
+        )
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--target", choices=("asgi", "http"), default="asgi")
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=8000)
+    arguments.add_argument(
+        "--start-server",
+        action="store_true",
+        help="start a local uvicorn server for the http target",
+    )
+    arguments.add_argument("--requests", type=int, default=2000)
+    arguments.add_argument("--concurrency", type=int, default=32)
+    arguments.add_argument("--timeout", type=float, default=None)
+    arguments.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX))
+    arguments.add_argument(
+        "--expressions-file", help="file with one cheap expression per line"
+    )
+    arguments.add_argument("--pathological", default=None)
+    arguments.add_argument("--pathological-every", type=int, default=1000)
+    arguments.add_argument("--seed", type=int, default=0)
+    arguments.add_argument("--json", action="store_true", help="print a JSON report")
+    options = arguments.parse_args(argv)
+
+    scenario: Scenario = Scenario(
+        mix=options.mix,
+        pathological=options.pathological,
+        pathological_every=options.pathological_every,
+        seed=options.seed,
+    )
+    if options.expressions_file:
+        with open(options.expressions_file, "r") as f:
+            scenario.expressions = [line.strip() for line in f if line.strip()]
+
+    server: subprocess.Popen | None = None
+    if options.target == "asgi":
+        from src.backend.main import create_app
+
+        target: ASGITarget | HTTPTarget = ASGITarget(create_app())
+    else:
+        if options.start_server:
+            server = start_server(options.host, options.port)
+        target = HTTPTarget(options.host, options.port)
+
+    try:
+        report: LoadReport = asyncio.run(
+            run_load(
+                target,
+                scenario.generate(options.requests),
+                options.concurrency,
+                options.timeout,
+            )
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary: dict[str, Any] = report.summary()
+    print(json.dumps(summary, indent=2) if options.json else format_report(summary))
+
+
+if __name__ == "__main__":
+    main()
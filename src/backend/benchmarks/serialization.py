@@ -0,0 +1,185 @@
+"""
+Per-request overhead of the standard and the lean `/expressions` paths.
+
+Both variants of the app are driven in process with the same requests.
+Their bodies are first compared byte for byte, including error answers
+and invalid bodies, then the average time per request and of the
+response encoding alone are reported.
+
+Usage (from the repository root):
+    python -m src.backend.benchmarks.serialization
+    python -m src.backend.benchmarks.serialization --requests 20000 --json
+"""
+
+from src.backend.benchmarks.load_test import ASGITarget, RequestSpec
+
+from typing import Any
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+# tiny expressions, where the framework overhead dominates
+EXPRESSIONS: tuple[str, ...] = ("1+2", "2*3-1", "x = 4", "x^2", "10/4", "7")
+
+# answers that must be identical in both paths
+PARITY_BODIES: tuple[bytes, ...] = (
+    b'{"expression": "1+2*3"}',
+    b'{"expression": ""}',
+    b'{"expression": "1/0"}',
+    b'{"expression": "unknown_variable"}',
+    b'{"expression": "2^0.5 + \\u00e9"}',
+    b'{"expression": "\\"quoted\\" \\t tab \\u2028"}',
+    b'{"expression": "1+1", "extra": [1, 2]}',
+    b'{"expression": 12}',
+    b'{"other": "1+1"}',
+    b"[1, 2]",
+    b"{not json",
+    b"",
+)
+
+
+def _app(fast: bool, log_filename: str) -> Any:
+    from src.backend.main import create_app
+    from src.backend.server.settings import Settings
+
+    return create_app(
+        Settings(
+            log_filename=log_filename,
+            log_level=logging.WARNING,
+            fast_serialization=fast,
+            admission_control=False,
+            warmup_top=0,
+        )
+    )
+
+
+def _request(body: bytes) -> RequestSpec:
+    return RequestSpec("expressions", "POST", "/expressions", body)
+
+
+async def _time_requests(target: ASGITarget, requests: int) -> float:
+    specs: list[RequestSpec] = [
+        _request(json.dumps({"expression": EXPRESSIONS[index % len(EXPRESSIONS)]}).encode())
+        for index in range(requests)
+    ]
+    started: float = time.perf_counter()
+    for spec in specs:
+        await target.request(spec)
+    return (time.perf_counter() - started) / requests
+
+
+async def compare(requests: int, log_filename: str) -> dict[str, Any]:
+    """
+    Check that both paths answer the same bytes, then time them.
+
+    Args:
+        requests (int): Number of requests timed for each path.
+        log_filename (str): Log file of the apps.
+
+    Returns:
+        dict[str, Any]: Mismatching bodies and microseconds per request for each path.
+    """
+    standard: ASGITarget = ASGITarget(_app(False, log_filename))
+    fast: ASGITarget = ASGITarget(_app(True, log_filename))
+    await standard.start()
+    await fast.start()
+
+    try:
+        mismatches: list[dict[str, Any]] = []
+        for body in PARITY_BODIES:
+            expected = await standard.request(_request(body))
+            answer = await fast.request(_request(body))
+            if answer != expected:
+                mismatches.append(
+                    {
+                        "body": body.decode(errors="replace"),
+                        "standard": [expected[0], expected[1].decode(errors="replace")],
+                        "fast": [answer[0], answer[1].decode(errors="replace")],
+                    }
+                )
+
+        # warm both paths up before timing
+        await _time_requests(standard, min(requests, 500))
+        await _time_requests(fast, min(requests, 500))
+        standard_seconds: float = await _time_requests(standard, requests)
+        fast_seconds: float = await _time_requests(fast, requests)
+
+    finally:
+        await standard.stop()
+        await fast.stop()
+
+    return {
+        "mismatches": mismatches,
+        "standard_us": standard_seconds * 1e6,
+        "fast_us": fast_seconds * 1e6,
+    }
+
+
+def time_encoding(repeat: int) -> dict[str, float]:
+    """
+    Time the response encoding alone, as FastAPI does it and with fragments.
+
+    Args:
+        repeat (int): Number of responses encoded by each variant.
+
+    Returns:
+        dict[str, float]: Microseconds per response for each variant.
+    """
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from src.backend.main import InterpreterResponse
+    from src.backend.server.fast_json import encode_interpreter_response
+
+    started: float = time.perf_counter()
+    for _ in range(repeat):
+        JSONResponse(
+            jsonable_encoder(InterpreterResponse(expression="1+2", result="3"))
+        ).body
+    standard: float = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode_interpreter_response("1+2", "3", None, None)
+    fast: float = (time.perf_counter() - started) / repeat
+
+    return {"standard_us": standard * 1e6, "fast_us": fast * 1e6}
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--requests", type=int, default=5000)
+    arguments.add_argument("--json", action="store_true", help="print a JSON report")
+    options = arguments.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        report: dict[str, Any] = asyncio.run(
+            compare(options.requests, os.path.join(workdir, "app.log"))
+        )
+        logging.shutdown()
+    report["encoding"] = time_encoding(options.requests)
+
+    if options.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"byte mismatches: {len(report['mismatches'])} of {len(PARITY_BODIES)} bodies")
+    for mismatch in report["mismatches"]:
+        print(f"  {mismatch['body']!r}: {mismatch['standard']} != {mismatch['fast']}")
+
+    for label, timings in (("request", report), ("encoding", report["encoding"])):
+        saved: float = timings["standard_us"] - timings["fast_us"]
+        print(
+            f"{label:>9}: standard {timings['standard_us']:8.1f} us  "
+            f"fast {timings['fast_us']:8.1f} us  "
+            f"saved {saved:8.1f} us ({saved / timings['standard_us']:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
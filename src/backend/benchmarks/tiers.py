@@ -0,0 +1,187 @@
+"""
+Interpreter against compiled programs: same answers, and how much faster.
+
+Every expression of the corpus is evaluated in every numeric mode by the
+Interpreter and by its compiled program, each with the same variables.
+Results and errors are compared, then the evaluation time of hot
+expressions is reported for both tiers.
+
+Usage (from the repository root):
+    python -m src.backend.benchmarks.tiers
+    python -m src.backend.benchmarks.tiers --repeat 2000 --json
+"""
+
+from src.backend.interpreter.compiler import compile_tree
+from src.backend.interpreter.evaluator import parse_expression
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import NumericMode, parse_mode
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import Node
+
+from typing import Any, Callable
+
+import argparse
+import json
+import time
+
+MODES: tuple[str, ...] = ("exact", "float64", "decimal:30")
+
+VARIABLES: dict[str, Number] = {"x": Number(3), "y": Number(0.5), "big": Number(10**30)}
+
+# user functions defined before evaluating, pure and reading a variable
+FUNCTIONS: tuple[str, ...] = ("f(t) = t ^ 2 + 3 * t", "g(a, b) = a * b + x")
+
+# results, errors and assignments that must match in both tiers
+CORPUS: tuple[str, ...] = (
+    "1 + 2 * 3 - 4 / 5",
+    "2 ^ 10 ^ 2",
+    "-(x + y) * +x",
+    "sqrt(x) + log(1024) - sin(y) * cos(2) + exp(1)",
+    "z = x * 2 + 1",
+    "a = b = 4 - 1",
+    "x / (y - 0.5)",
+    "1 / 0 + x",
+    "unknown + 1",
+    "x + unknown",
+    "sqrt(-1)",
+    "(-8) ^ (1 / 3)",
+    "big ^ 12",
+    "exp(1000)",
+    "123456789 ^ 50",
+    "0.1 + 0.2",
+    "f(x) + g(2, y) - f(f(1))",
+    "f(1, 2)",
+    "unknown(1)",
+    "h(t) = t * x",
+    "f(big) / g(0, 0)",
+    "ans + _1",
+)
+
+# hot expressions of typical traffic
+HOT: tuple[str, ...] = (
+    "x * x + 2 * x * y - y ^ 2",
+    "sqrt(x ^ 2 + y ^ 2) * cos(y) + sin(x)",
+    "(1 + 2) * (3 + 4) - x / 7",
+    "total = x * 1.2 + y * 0.8",
+    "f(x) + g(x, y) * 2",
+)
+
+
+def _outcome(evaluate: Callable[[], Number]) -> tuple[str, str]:
+    try:
+        return "result", repr(evaluate())
+    except Exception as error:
+        return type(error).__name__, str(error)
+
+
+def _interpreter() -> Interpreter:
+    interpreter: Interpreter = Interpreter()
+    interpreter.environment.commit(dict(VARIABLES), interpreter.environment.snapshot())
+    for definition in FUNCTIONS:
+        interpreter.evaluate(parse_expression(definition))  # type: ignore
+    return interpreter
+
+
+def compare() -> list[dict[str, Any]]:
+    """
+    Evaluate the corpus in both tiers and every numeric mode.
+
+    Returns:
+        list[dict[str, Any]]: The expressions whose results, errors or assigned
+        variables differ.
+    """
+    mismatches: list[dict[str, Any]] = []
+    for name in MODES:
+        mode: NumericMode = parse_mode(name)
+        for expression in CORPUS:
+            tree: Node = parse_expression(expression)  # type: ignore
+            interpreted: Interpreter = _interpreter()
+            compiled: Interpreter = _interpreter()
+            expected = _outcome(lambda: interpreted.evaluate(tree, mode))
+            answer = _outcome(lambda: compiled.run(compile_tree(tree, mode), mode))
+
+            expected_variables: dict = dict(interpreted.variables)
+            variables: dict = dict(compiled.variables)
+            if answer != expected or variables != expected_variables:
+                mismatches.append(
+                    {
+                        "mode": name,
+                        "expression": expression,
+                        "interpreter": [*expected, repr(expected_variables)],
+                        "compiled": [*answer, repr(variables)],
+                    }
+                )
+    return mismatches
+
+
+def time_tiers(repeat: int) -> dict[str, dict[str, float]]:
+    """
+    Time the hot expressions in both tiers.
+
+    Args:
+        repeat (int): Evaluations of every expression in each tier.
+
+    Returns:
+        dict[str, dict[str, float]]: Microseconds per evaluation for each tier, by mode.
+    """
+    timings: dict[str, dict[str, float]] = {}
+    interpreter: Interpreter = _interpreter()
+    trees: list[Node] = [parse_expression(expression) for expression in HOT]  # type: ignore
+
+    for name in MODES:
+        mode: NumericMode = parse_mode(name)
+        programs = [compile_tree(tree, mode) for tree in trees]
+
+        started: float = time.perf_counter()
+        for _ in range(repeat):
+            for tree in trees:
+                interpreter.evaluate(tree, mode)
+        interpreted: float = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for program in programs:
+                interpreter.run(program, mode)
+        compiled: float = time.perf_counter() - started
+
+        evaluations: int = repeat * len(trees)
+        timings[name] = {
+            "interpreted_us": interpreted / evaluations * 1e6,
+            "compiled_us": compiled / evaluations * 1e6,
+        }
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("--repeat", type=int, default=500)
+    arguments.add_argument("--json", action="store_true", help="print a JSON report")
+    options = arguments.parse_args(argv)
+
+    report: dict[str, Any] = {
+        "mismatches": compare(),
+        "timings": time_tiers(options.repeat),
+    }
+
+    if options.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    checked: int = len(CORPUS) * len(MODES)
+    print(f"mismatches: {len(report['mismatches'])} of {checked} evaluations")
+    for mismatch in report["mismatches"]:
+        print(
+            f"  [{mismatch['mode']}] {mismatch['expression']!r}: "
+            f"{mismatch['interpreter']} != {mismatch['compiled']}"
+        )
+
+    for name, timing in report["timings"].items():
+        speedup: float = timing["interpreted_us"] / timing["compiled_us"]
+        print(
+            f"{name:>11}: interpreted {timing['interpreted_us']:8.1f} us  "
+            f"compiled {timing['compiled_us']:8.1f} us  ({speedup:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
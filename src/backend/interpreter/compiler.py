@@ -0,0 +1,256 @@
+"""
+Compilation of syntax trees into nested closures.
+
+A compiled tree is a function of the evaluation scope that returns the
+raw value of the result. The type of every node, its operator and the
+operation of the numeric mode are resolved once, when compiling, instead
+of on every visit, and subtrees made only of literals are folded into
+constants, unless their integers would grow past MAX_FOLDED_BITS: those
+are left to run time, where the admission control weighs them. The
+closures call the same operations of the numeric mode as the Interpreter,
+so both give the same results and raise the same errors.
+
+Calls of user functions look the function up when they run, since it may
+be redefined, and run its body compiled for the numeric mode, once per
+definition.
+"""
+
+from src.backend.interpreter.functions import MISSING, UserFunction, memo_key
+from src.backend.interpreter.interpreter import Scope
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import (
+    AssignmentNode,
+    BinOperationNode,
+    CallNode,
+    FunctionDefinitionNode,
+    FunctionNode,
+    Node,
+    NumberNode,
+    UnaryOperationNode,
+    VariableNode,
+)
+
+from typing import Any, Callable
+
+Program = Callable[[Scope], Any]
+
+# biggest integer folded when compiling, which runs on the shared compiler thread
+MAX_FOLDED_BITS: int = 4096
+
+
+class CompileError(Exception):
+    """
+    A syntax tree the compiler doesn't support, left to the Interpreter.
+    """
+
+
+class _Constant:
+    """
+    Value known when compiling, wrapped to tell it apart from a closure.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value: Any = value
+
+
+def compile_tree(tree: Node, mode: NumericMode) -> Program:
+    """
+    Compile a syntax tree for a numeric mode.
+
+    Args:
+        tree (Node): Root of the syntax tree.
+        mode (NumericMode): Numeric mode the program evaluates in.
+
+    Returns:
+        Program: Function of the evaluation scope returning the value of the result.
+
+    Raises:
+        CompileError: If the tree has a node, operator or function the compiler
+            doesn't know.
+    """
+    return _program(_compile(tree, mode))
+
+
+def _compile(node: Node, mode: NumericMode) -> Program | _Constant:
+    if isinstance(node, NumberNode):
+        return _Constant(mode.convert(node.value))
+
+    if isinstance(node, VariableNode):
+        return _variable(node.name, mode)
+
+    if isinstance(node, AssignmentNode):
+        return _assignment(node.variable_name, _compile(node.value, mode))
+
+    if isinstance(node, BinOperationNode):
+        operation: Callable | None = mode.binary.get(node.operation)
+        if operation is None:
+            raise CompileError(f"Unsuported operation: '{node.operation}'.")
+        return _binary(
+            node.operation,
+            operation,
+            _compile(node.left_node, mode),
+            _compile(node.right_node, mode),
+        )
+
+    if isinstance(node, UnaryOperationNode):
+        operation = mode.unary.get(node.operation)
+        if operation is None:
+            raise CompileError(f"Unrecognized operation: '{node.operation}'.")
+        return _unary(operation, _compile(node.operand, mode))
+
+    if isinstance(node, FunctionNode):
+        name: str = node.function_name.lower()
+        operation = mode.functions.get(name)
+        if operation is None:
+            raise CompileError(f"Unsuported function: '{name}'.")
+        return _unary(operation, _compile(node.expression, mode))
+
+    if isinstance(node, CallNode):
+        return _call(
+            node.function_name,
+            [_program(_compile(argument, mode)) for argument in node.arguments],
+            mode,
+        )
+
+    if isinstance(node, FunctionDefinitionNode):
+        return _definition(node.function_name, tuple(node.parameters), node.body)
+
+    raise CompileError(f"Unsupported node: {type(node).__name__}.")
+
+
+def _folded_bits(symbol: str, values: tuple[Any, ...]) -> int:
+    # upper bound of the bit length of an integer result, 0 for other results
+    if not all(type(value) is int for value in values):
+        return 0
+    if symbol == "^":
+        base, exponent = values
+        if abs(base) <= 1 or exponent <= 0:
+            return 1
+        return base.bit_length() * exponent
+    return sum(value.bit_length() for value in values)
+
+
+def _fold(operation: Callable, *values: Any, symbol: str = "") -> _Constant | None:
+    # an operation that fails, or whose result may be huge, is left to run time
+    if _folded_bits(symbol, values) > MAX_FOLDED_BITS:
+        return None
+    try:
+        return _Constant(operation(*values))
+    except Exception:
+        return None
+
+
+def _variable(name: str, mode: NumericMode) -> Program:
+    convert: Callable[[Any], Any] = mode.convert
+
+    def variable(scope: Scope) -> Any:
+        number: Number | None = scope.lookup(name)
+        if number is None:
+            raise ValueError(f"No value assigned to variable: '{name}'.")
+        return convert(number.Value)
+
+    return variable
+
+
+def _assignment(name: str, value: Program | _Constant) -> Program:
+    if isinstance(value, _Constant):
+        constant: Any = value.value
+
+        def assign_constant(scope: Scope) -> Any:
+            scope.assigned[name] = Number(constant)
+            return constant
+
+        return assign_constant
+
+    def assign(scope: Scope) -> Any:
+        result: Any = value(scope)
+        scope.assigned[name] = Number(result)
+        return result
+
+    return assign
+
+
+def _binary(
+    symbol: str,
+    operation: Callable,
+    left: Program | _Constant,
+    right: Program | _Constant,
+) -> Program | _Constant:
+    if isinstance(left, _Constant):
+        if isinstance(right, _Constant):
+            folded: _Constant | None = _fold(
+                operation, left.value, right.value, symbol=symbol
+            )
+            if folded is not None:
+                return folded
+            constants: tuple[Any, Any] = (left.value, right.value)
+            return lambda scope: operation(*constants)
+
+        left_value: Any = left.value
+        return lambda scope: operation(left_value, right(scope))
+
+    if isinstance(right, _Constant):
+        right_value: Any = right.value
+        return lambda scope: operation(left(scope), right_value)
+
+    return lambda scope: operation(left(scope), right(scope))
+
+
+def _unary(operation: Callable, operand: Program | _Constant) -> Program | _Constant:
+    if isinstance(operand, _Constant):
+        folded: _Constant | None = _fold(operation, operand.value)
+        if folded is not None:
+            return folded
+        value: Any = operand.value
+        return lambda scope: operation(value)
+
+    return lambda scope: operation(operand(scope))
+
+
+def _program(compiled: Program | _Constant) -> Program:
+    if isinstance(compiled, _Constant):
+        value: Any = compiled.value
+        return lambda scope: value
+    return compiled
+
+
+def _body(function: UserFunction, mode: NumericMode) -> Program:
+    program: Program | None = function.programs.get(mode.name)
+    if program is None:
+        program = function.add_program(mode.name, compile_tree(function.body, mode))
+    return program
+
+
+def _call(name: str, arguments: list[Program], mode: NumericMode) -> Program:
+    def call(scope: Scope) -> Any:
+        function: UserFunction = scope.lookup_function(name)
+        function.check_arguments(len(arguments))
+        values: list[Any] = [argument(scope) for argument in arguments]
+        body: Program = _body(function, mode)
+        numbers: list[Number] = [Number(value) for value in values]
+
+        if not function.memo_size:
+            return scope.call(function, numbers, lambda: body(scope))
+
+        key: tuple = memo_key(mode.name, values)
+        value: Any = function.recall(key)
+        if value is MISSING:
+            value = scope.call(function, numbers, lambda: body(scope))
+            function.remember(key, value)
+        return value
+
+    return call
+
+
+def _definition(name: str, parameters: tuple[str, ...], body: Node) -> Program:
+    def define(scope: Scope) -> Any:
+        function: UserFunction = UserFunction(
+            name, parameters, body, scope.interpreter.memo_size
+        )
+        scope.defined[name] = function
+        return function
+
+    return define
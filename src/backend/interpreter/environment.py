@@ -0,0 +1,320 @@
+from src.backend.interpreter.functions import UserFunction
+from src.backend.interpreter.values import Number
+
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping
+
+import threading
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# bits of the name hash consumed by each level of the trie, and its width
+_BITS: int = 5
+_WIDTH: int = 1 << _BITS
+_MASK: int = _WIDTH - 1
+# names kept by a leaf before it splits into a level of the trie
+_LEAF_SIZE: int = 16
+# hashes are 64 bits, so deeper levels can't tell names apart
+_MAX_SHIFT: int = 64
+_MISSING: Any = object()
+_EMPTY_LEAF: dict[str, Any] = {}
+
+# a node is a leaf dict of names, or a tuple of `_WIDTH` child nodes
+_Node = dict[str, Any] | tuple
+
+
+def _find(node: _Node, name: str, hashed: int) -> Any:
+    shift: int = 0
+    while type(node) is tuple:
+        node = node[(hashed >> shift) & _MASK]
+        shift += _BITS
+    return node.get(name, _MISSING)
+
+
+def _insert(node: _Node, name: str, value: Any, hashed: int, shift: int) -> _Node:
+    # copies the nodes on the path to the name, the rest are shared
+    if type(node) is tuple:
+        index: int = (hashed >> shift) & _MASK
+        children: list[_Node] = list(node)
+        children[index] = _insert(node[index], name, value, hashed, shift + _BITS)
+        return tuple(children)
+
+    leaf: dict[str, Any] = {**node, name: value}
+    if len(leaf) > _LEAF_SIZE and shift < _MAX_SHIFT:
+        return _split(leaf, shift)
+    return leaf
+
+
+def _split(leaf: dict[str, Any], shift: int) -> _Node:
+    buckets: list[dict[str, Any]] = [{} for _ in range(_WIDTH)]
+    for name, value in leaf.items():
+        buckets[(hash(name) >> shift) & _MASK][name] = value
+    return tuple(
+        _split(bucket, shift + _BITS)
+        if len(bucket) > _LEAF_SIZE and shift + _BITS < _MAX_SHIFT
+        else bucket or _EMPTY_LEAF
+        for bucket in buckets
+    )
+
+
+def _walk(node: _Node) -> Iterator[tuple[str, Any]]:
+    if type(node) is tuple:
+        for child in node:
+            yield from _walk(child)
+    else:
+        yield from node.items()
+
+
+class VariableMap(Mapping[str, Number]):
+    """
+    Immutable mapping of variable names that is updated by copying a few small nodes.
+
+    The variables loaded at once, for example from disk, are kept in a plain
+    dict, and the ones assigned since in a hash trie over it: each level
+    picks a child with 5 bits of the name hash, and the leaves hold up to 16
+    names. Assigning copies the nodes on the path to the name, at most 32
+    slots per level and a handful of levels, and shares the rest with the
+    previous mapping, so a commit doesn't copy every variable. Looking a
+    name up follows the same path, then falls back to the loaded dict.
+    """
+
+    __slots__ = ("_base", "_trie", "_size")
+
+    def __init__(self, base: Mapping[str, Number] | None = None) -> None:
+        """
+        Constructor for VariableMap.
+
+        Args:
+            base (Mapping[str, Number] | None): Loaded variables, never modified from now on.
+        """
+        self._base: Mapping[str, Number] = _EMPTY if base is None else base
+        self._trie: _Node = _EMPTY_LEAF
+        self._size: int = len(self._base)
+
+    def update(self, changes: Mapping[str, Number]) -> "VariableMap":
+        """
+        Mapping with the changes applied, leaving this one untouched.
+
+        Args:
+            changes (Mapping[str, Number]): Variables to assign.
+
+        Returns:
+            VariableMap: The new mapping.
+        """
+        trie: _Node = self._trie
+        size: int = self._size
+        for name, value in changes.items():
+            hashed: int = hash(name)
+            if _find(trie, name, hashed) is _MISSING and name not in self._base:
+                size += 1
+            trie = _insert(trie, name, value, hashed, 0)
+
+        updated: VariableMap = VariableMap.__new__(VariableMap)
+        updated._base = self._base
+        updated._trie = trie
+        updated._size = size
+        return updated
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value: Any = _find(self._trie, name, hash(name))
+        if value is _MISSING:
+            return self._base.get(name, default)
+        return value
+
+    def __getitem__(self, name: str) -> Number:
+        value: Any = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.get(name, _MISSING) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        for name, _ in self._items():
+            yield name
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self):  # type: ignore[override]
+        return list(self._items())
+
+    def values(self):  # type: ignore[override]
+        return [value for _, value in self._items()]
+
+    def _items(self) -> Iterator[tuple[str, Number]]:
+        trie: _Node = self._trie
+        yield from _walk(trie)
+        for name, value in self._base.items():
+            if _find(trie, name, hash(name)) is _MISSING:
+                yield name, value
+
+    def __repr__(self) -> str:
+        return f"VariableMap({dict(self._items())!r})"
+
+
+_NO_VARIABLES: VariableMap = VariableMap()
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Immutable, versioned view of the variables.
+
+    Attributes:
+        version (int): Incremented by every commit and reset.
+        epoch (int): Incremented by every reset.
+        variables (VariableMap): Read-only variable names and values.
+        functions (Mapping[str, UserFunction]): Read-only user functions by name.
+    """
+
+    version: int
+    epoch: int
+    variables: VariableMap
+    functions: Mapping[str, UserFunction] = field(default_factory=lambda: _EMPTY)
+
+
+# called with every published snapshot and its changes, None for a reset
+Listener = Callable[[Snapshot, dict[str, Number] | None], None]
+
+
+class Environment:
+    """
+    Variable storage that is safe to share between threads.
+
+    Readers take the current snapshot, a single attribute read, and evaluate
+    against it without locking. Writers apply their changes to a copy of the
+    variables, which only copies the few trie nodes they touch, and publish
+    a new snapshot under a lock, so every evaluation commits atomically.
+    Resetting publishes an empty snapshot in a new epoch, and commits of
+    evaluations that started before the reset are dropped.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor for Environment.
+
+        Starts with no variables at version 0.
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self._snapshot: Snapshot = Snapshot(0, 0, _NO_VARIABLES)
+        self._listeners: list[Listener] = []
+        self._unlocked: list[Listener] = []
+
+    def subscribe(self, listener: Listener, locked: bool = True) -> None:
+        """
+        Register a function called with every change.
+
+        Locked listeners run while the writer lock is held, in version order,
+        so they must be quick. The others run in the committing thread once
+        the lock is released, in any order, and the commit only returns after
+        they do, so they can wait for slow work such as syncing to disk.
+
+        Args:
+            listener (Listener): Called with the new snapshot and the changes, None on reset.
+            locked (bool): Whether to call it while the writer lock is held.
+        """
+        (self._listeners if locked else self._unlocked).append(listener)
+
+    def load(self, variables: dict[str, Number], version: int) -> Snapshot:
+        """
+        Replace every variable at once, for example when restoring them from disk.
+
+        Listeners aren't notified, since the variables come from them. User
+        functions are kept.
+
+        Args:
+            variables (dict[str, Number]): The new variables, owned by the environment from now on.
+            version (int): Version of the new snapshot.
+
+        Returns:
+            Snapshot: The new snapshot.
+        """
+        with self._lock:
+            self._snapshot = Snapshot(
+                version,
+                self._snapshot.epoch + 1,
+                VariableMap(variables),
+                self._snapshot.functions,
+            )
+            return self._snapshot
+
+    def snapshot(self) -> Snapshot:
+        """
+        Current snapshot of the variables, without locking.
+
+        Returns:
+            Snapshot: The latest committed snapshot.
+        """
+        return self._snapshot
+
+    def commit(
+        self,
+        changes: dict[str, Number],
+        base: Snapshot,
+        functions: dict[str, UserFunction] | None = None,
+    ) -> Snapshot | None:
+        """
+        Publish the variables assigned and the functions defined by an evaluation.
+
+        Changes are applied over the latest snapshot, so concurrent commits
+        to different variables are all kept, and the last commit wins for the
+        same variable.
+
+        Args:
+            changes (dict[str, Number]): Variables assigned by the evaluation.
+            base (Snapshot): Snapshot the evaluation started from.
+            functions (dict[str, UserFunction] | None): User functions defined by the evaluation.
+
+        Returns:
+            Snapshot: The published snapshot, the latest one if there are no changes.
+            None: If the environment was reset after `base`, discarding the changes.
+        """
+        if not changes and not functions:
+            current: Snapshot = self._snapshot
+            # a read-only evaluation that started before a reset is dropped too
+            return current if current.epoch == base.epoch else None
+
+        with self._lock:
+            current = self._snapshot
+            if current.epoch != base.epoch:
+                return None
+
+            variables: VariableMap = current.variables
+            if changes:
+                variables = variables.update(changes)
+            defined: Mapping[str, UserFunction] = current.functions
+            if functions:
+                defined = MappingProxyType({**defined, **functions})
+            published: Snapshot = Snapshot(
+                current.version + 1, current.epoch, variables, defined
+            )
+            self._snapshot = published
+            for listener in self._listeners:
+                listener(published, changes)
+
+        for listener in self._unlocked:
+            listener(published, changes)
+        return published
+
+    def reset(self) -> Snapshot:
+        """
+        Drop every variable and user function.
+
+        Returns:
+            Snapshot: The new empty snapshot.
+        """
+        with self._lock:
+            current: Snapshot = self._snapshot
+            published: Snapshot = Snapshot(
+                current.version + 1, current.epoch + 1, _NO_VARIABLES
+            )
+            self._snapshot = published
+            for listener in self._listeners:
+                listener(published, None)
+
+        for listener in self._unlocked:
+            listener(published, None)
+        return published
@@ -0,0 +1,59 @@
+from src.backend.lexer.lexer import Lexer, Source
+from src.backend.parser.arithmetic_parser import Parser
+from src.backend.parser.cache import ParseCache
+from src.backend.parser.nodes import Node
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.tiers import TieredExecution
+from src.backend.interpreter.values import Number
+
+
+def parse_expression(text: Source) -> Node | None:
+    """
+    Lex and parse an expression.
+
+    The Parser consumes the tokens while the Lexer produces them, so no
+    token list is built.
+
+    Args:
+        text (Source): The expression to parse, as text or as a bytes-like object.
+
+    Returns:
+        Node: First node of the syntax tree.
+        None: If the expression is empty.
+    """
+    return Parser(Lexer(text).generate_tokens()).parse()
+
+
+def evaluate_expression(
+    text: Source,
+    interpreter: Interpreter,
+    cache: ParseCache | None = None,
+    mode: NumericMode | None = None,
+    tiers: TieredExecution | None = None,
+) -> Number | None:
+    """
+    Lex, parse and evaluate an expression.
+
+    Args:
+        text (Source): The expression to evaluate, as text or as a bytes-like object.
+        interpreter (Interpreter): Interpreter that holds the variables.
+        cache (ParseCache | None): Cache of syntax trees to use for text expressions.
+        mode (NumericMode | None): Numeric mode, the default one of the interpreter if None.
+        tiers (TieredExecution | None): Execution manager compiling hot trees, if any.
+
+    Returns:
+        Number: The result of the expression.
+        None: If the expression is empty.
+    """
+    expression: Node | None = (
+        cache.parse(text)
+        if cache is not None and isinstance(text, str)
+        else parse_expression(text)
+    )
+    if expression is None:
+        return None
+
+    if tiers is not None:
+        return tiers.evaluate(interpreter, expression, mode)
+    return interpreter.evaluate(expression, mode)
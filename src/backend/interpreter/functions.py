@@ -0,0 +1,205 @@
+"""
+User functions: named expressions with parameters, like `f(x, y) = x^2 + y`.
+
+A definition is parsed once and kept with the variables of the interpreter
+or session that evaluated it, so clients call it by name instead of sending
+the whole expression again. A function whose body reads only its
+parameters and calls only built-in functions gives the same result for the
+same arguments, so its results are remembered in a bounded memo by numeric
+mode and argument values.
+"""
+
+from src.backend.parser.nodes import (
+    AssignmentNode,
+    CallNode,
+    FunctionDefinitionNode,
+    Node,
+    VariableNode,
+    iter_nodes,
+)
+
+from collections import OrderedDict
+from typing import Any
+
+import threading
+
+# results remembered by every pure function, 0 to remember none
+DEFAULT_MEMO_SIZE: int = 256
+
+# nested calls allowed: without conditions, a function calling itself never stops
+MAX_CALL_DEPTH: int = 64
+
+# returned by `recall` when the arguments aren't remembered
+MISSING: Any = object()
+
+
+def is_pure(parameters: tuple[str, ...], body: Node) -> bool:
+    """
+    Whether a function body depends only on its arguments.
+
+    Args:
+        parameters (tuple[str, ...]): Names of the parameters.
+        body (Node): Expression of the function.
+
+    Returns:
+        bool: False if the body reads other variables, assigns any, or calls user
+        functions, which may be redefined.
+    """
+    for node in iter_nodes(body):
+        if isinstance(node, VariableNode):
+            if node.name not in parameters:
+                return False
+        elif isinstance(node, (AssignmentNode, CallNode, FunctionDefinitionNode)):
+            return False
+    return True
+
+
+class UserFunction:
+    """
+    Function defined by an expression.
+
+    Attributes:
+        name (str): Name of the function.
+        parameters (tuple[str, ...]): Names of the parameters, in order.
+        body (Node): Expression evaluated by each call.
+        memo_size (int): Results remembered, 0 if the function isn't pure.
+        programs (dict[str, Any]): Body compiled by numeric mode name, filled by the compiler.
+        hits (int): Calls answered from the memo.
+        misses (int): Calls of a pure function that evaluated the body.
+    """
+
+    __slots__ = (
+        "name",
+        "parameters",
+        "body",
+        "memo_size",
+        "programs",
+        "hits",
+        "misses",
+        "_memo",
+        "_lock",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parameters: tuple[str, ...],
+        body: Node,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ) -> None:
+        """
+        Constructor for UserFunction.
+
+        Args:
+            name (str): Name of the function.
+            parameters (tuple[str, ...]): Names of the parameters, in order.
+            body (Node): Expression evaluated by each call.
+            memo_size (int): Results remembered if the function is pure.
+        """
+        self.name: str = name
+        self.parameters: tuple[str, ...] = parameters
+        self.body: Node = body
+        self.memo_size: int = memo_size if is_pure(parameters, body) else 0
+        self.programs: dict[str, Any] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self._memo: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.name}({', '.join(self.parameters)}) = {self.body}"
+
+    def check_arguments(self, count: int) -> None:
+        """
+        Check the number of arguments of a call.
+
+        Args:
+            count (int): Arguments passed.
+
+        Raises:
+            TypeError: If the function takes another number of arguments.
+        """
+        expected: int = len(self.parameters)
+        if count != expected:
+            raise TypeError(
+                f"Function '{self.name}' takes {expected} "
+                f"argument{'' if expected == 1 else 's'}, {count} given."
+            )
+
+    def add_program(self, mode: str, program: Any) -> Any:
+        """
+        Keep the body compiled for a numeric mode, unless another thread did first.
+
+        Args:
+            mode (str): Name of the numeric mode.
+            program (Any): The compiled body.
+
+        Returns:
+            Any: The program kept for the mode, the given one or the one added first.
+        """
+        with self._lock:
+            return self.programs.setdefault(mode, program)
+
+    def recall(self, key: tuple) -> Any:
+        """
+        Remembered result of a call.
+
+        Args:
+            key (tuple): Numeric mode name and arguments, from `memo_key`.
+
+        Returns:
+            Any: The value of the result, MISSING if it isn't remembered.
+        """
+        with self._lock:
+            value: Any = self._memo.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._memo.move_to_end(key)
+            return value
+
+    def remember(self, key: tuple, value: Any) -> None:
+        """
+        Remember the result of a call, forgetting the least recently used one.
+
+        Args:
+            key (tuple): Numeric mode name and arguments, from `memo_key`.
+            value (Any): The value of the result.
+        """
+        with self._lock:
+            self._memo[key] = value
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Signature and memo counters of the function.
+
+        Returns:
+            dict: Definition, whether results are remembered, entries, hits and misses.
+        """
+        return {
+            "definition": repr(self),
+            "memoized": self.memo_size > 0,
+            "memo_entries": len(self._memo),
+            "memo_hits": self.hits,
+            "memo_misses": self.misses,
+        }
+
+
+def memo_key(mode: str, values: list[Any]) -> tuple:
+    """
+    Memo key of a call.
+
+    Types are part of the key, since 2 and 2.0 are equal but their results
+    are written differently.
+
+    Args:
+        mode (str): Name of the numeric mode of the call.
+        values (list[Any]): Values of the arguments.
+
+    Returns:
+        tuple: The key.
+    """
+    return (mode, *[(type(value), value) for value in values])
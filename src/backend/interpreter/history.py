@@ -0,0 +1,142 @@
+"""
+History of the results of an interpreter, read back as `ans` and `_N`.
+
+Every result is numbered from 1 since the interpreter started or was
+reset, and the last `size` are kept in a ring buffer: `ans` is the last
+result and `_N` the result number N, both found in constant time. Clients
+chaining computations refer to the previous results by name instead of
+sending their expressions again.
+"""
+
+from src.backend.interpreter.values import Number
+
+import threading
+
+# results kept by each interpreter
+DEFAULT_HISTORY_SIZE: int = 100
+
+
+class History:
+    """
+    Ring buffer of the last results of an interpreter, safe to share between threads.
+    """
+
+    def __init__(self, size: int = DEFAULT_HISTORY_SIZE) -> None:
+        """
+        Constructor for History.
+
+        Args:
+            size (int): Results kept, 0 to keep none.
+
+        Attributes:
+            size (int): Results kept.
+            count (int): Results recorded since the start or the last reset,
+                the number of the last one.
+            epoch (int): Epoch of the environment at the last reset, results of
+                evaluations that started before it aren't recorded.
+        """
+        self.size: int = size
+        self.count: int = 0
+        self.epoch: int = 0
+        self._results: list[Number | None] = [None] * size
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.count, self.size)
+
+    def record(self, result: Number, epoch: int | None = None) -> int:
+        """
+        Add a result, overwriting the oldest one when the buffer is full.
+
+        Args:
+            result (Number): The result.
+            epoch (int | None): Epoch of the environment the result was computed
+                in, None if it doesn't depend on one.
+
+        Returns:
+            int: Number of the result, 0 if the history keeps none or the
+                environment was reset since its epoch.
+        """
+        if not self.size:
+            return 0
+
+        with self._lock:
+            if epoch is not None and epoch < self.epoch:
+                return 0
+
+            self._results[self.count % self.size] = result
+            self.count += 1
+            return self.count
+
+    def get(self, index: int) -> Number:
+        """
+        Result by its number.
+
+        Args:
+            index (int): Number of the result, from 1.
+
+        Returns:
+            Number: The result.
+
+        Raises:
+            ValueError: If the result doesn't exist yet or isn't kept anymore.
+        """
+        with self._lock:
+            if not 1 <= index <= self.count:
+                raise ValueError(
+                    f"No result '_{index}' in the history, which has {self.count}."
+                )
+            if index <= self.count - self.size:
+                raise ValueError(
+                    f"Result '_{index}' left the history, which keeps the last {self.size}."
+                )
+            return self._results[(index - 1) % self.size]  # type: ignore
+
+    def lookup(self, name: str) -> Number | None:
+        """
+        Result referred to by a variable name.
+
+        Args:
+            name (str): "ans" for the last result, "_N" for the result number N.
+
+        Returns:
+            Number | None: The result, None if the name doesn't refer to the history.
+
+        Raises:
+            ValueError: If the name refers to a result that isn't kept.
+        """
+        if name == "ans":
+            if not self.count:
+                raise ValueError("No results in the history yet: 'ans'.")
+            return self.get(self.count)
+
+        if name[:1] == "_" and name[1:].isdigit():
+            return self.get(int(name[1:]))
+        return None
+
+    def clear(self, epoch: int | None = None) -> None:
+        """
+        Drop every result and number them from 1 again.
+
+        Args:
+            epoch (int | None): Epoch of the environment after its reset, None to keep the current one.
+        """
+        with self._lock:
+            if epoch is not None:
+                self.epoch = epoch
+            self._results = [None] * self.size
+            self.count = 0
+
+    def entries(self) -> list[tuple[int, Number]]:
+        """
+        Results kept, oldest first.
+
+        Returns:
+            list[tuple[int, Number]]: Number and value of each result.
+        """
+        with self._lock:
+            first: int = max(1, self.count - self.size + 1)
+            return [
+                (index, self._results[(index - 1) % self.size])  # type: ignore
+                for index in range(first, self.count + 1)
+            ]
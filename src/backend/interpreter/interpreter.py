@@ -1,40 +1,241 @@
+from src.backend.interpreter.environment import Environment, Snapshot
+from src.backend.interpreter.history import DEFAULT_HISTORY_SIZE, History
+from src.backend.interpreter.functions import (
+    DEFAULT_MEMO_SIZE,
+    MAX_CALL_DEPTH,
+    MISSING,
+    UserFunction,
+    memo_key,
+)
+from src.backend.interpreter.numeric import EXACT, NumericMode
 from src.backend.interpreter.values import Number
 from src.backend.parser.nodes import *
 
-from typing import Callable
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any, Callable, Mapping
 
-import math
 import logging
 
 log = logging.getLogger(__name__)
 
 
+class Scope:
+    """
+    Variables seen by one evaluation: its own assignments over a snapshot.
+
+    While a user function is called, its arguments hide the variables of
+    the same name. Names that no variable has may refer to the result
+    history of the interpreter.
+    """
+
+    __slots__ = (
+        "interpreter",
+        "base",
+        "assigned",
+        "defined",
+        "arguments",
+        "depth",
+        "mode",
+    )
+
+    def __init__(
+        self, interpreter: "Interpreter", base: Snapshot, mode: NumericMode
+    ) -> None:
+        self.interpreter: Interpreter = interpreter
+        self.base: Snapshot = base
+        self.assigned: dict[str, Number] = {}
+        self.defined: dict[str, UserFunction] = {}
+        self.arguments: dict[str, Number] | None = None
+        self.depth: int = 0
+        self.mode: NumericMode = mode
+
+    def lookup(self, name: str) -> Number | None:
+        if self.arguments is not None:
+            argument: Number | None = self.arguments.get(name)
+            if argument is not None:
+                return argument
+        value: Number | None = self.assigned.get(name)
+        if value is None:
+            value = self.base.variables.get(name)
+            if value is None:
+                return self.interpreter.history.lookup(name)
+        return value
+
+    def lookup_function(self, name: str) -> UserFunction:
+        function: UserFunction | None = self.defined.get(name)
+        if function is None:
+            function = self.base.functions.get(name)
+            if function is None:
+                raise ValueError(f"No function defined: '{name}'.")
+        return function
+
+    def call(
+        self, function: UserFunction, arguments: list[Number], body: Callable[[], Any]
+    ) -> Any:
+        """
+        Evaluate the body of a user function with its arguments bound.
+
+        Args:
+            function (UserFunction): The called function.
+            arguments (list[Number]): Values of the arguments, in order.
+            body (Callable): Evaluates the body of the function in this scope.
+
+        Returns:
+            Any: What `body` returns.
+
+        Raises:
+            RecursionError: If calls are nested deeper than MAX_CALL_DEPTH.
+        """
+        if self.depth >= MAX_CALL_DEPTH:
+            raise RecursionError(
+                f"Calls of user functions nested deeper than {MAX_CALL_DEPTH}: "
+                f"'{function.name}'."
+            )
+
+        outer: dict[str, Number] | None = self.arguments
+        self.arguments = dict(zip(function.parameters, arguments))
+        self.depth += 1
+        try:
+            return body()
+        finally:
+            self.arguments = outer
+            self.depth -= 1
+
+
+# evaluation in progress in the current thread or task
+_scope: ContextVar[Scope | None] = ContextVar("interpreter_scope", default=None)
+
+
 class Interpreter:
     """
     Interpreter to evaluate syntax trees and manage variable storage.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        environment: Environment | None = None,
+        mode: NumericMode = EXACT,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+    ):
         """
         Constructor for Interpreter.
 
-        Initializes an empty dictionary to store variables.
+        Every evaluation reads the variables from an immutable snapshot of the
+        environment and commits its assignments atomically when it ends, so
+        one interpreter can evaluate expressions from many threads at once.
+
+        Args:
+            environment (Environment | None): Variable storage, a new empty one if None.
+            mode (NumericMode): Numeric mode of the evaluations that don't choose one.
+            memo_size (int): Results remembered by each pure user function, 0 for none.
+            history_size (int): Last results kept as `ans` and `_N`, 0 for none.
 
         Attributes:
-            variables (dict[str, Number]): Dictionary to store variable names and their values.
+            environment (Environment): Storage of the variable names and their values.
+            mode (NumericMode): Default numeric mode.
+            memo_size (int): Memo size of the user functions defined from now on.
+            history (History): Last results, cleared when the environment is reset.
+        """
+        self.environment: Environment = environment or Environment()
+        self.mode: NumericMode = mode
+        self.memo_size: int = memo_size
+        self.history: History = History(history_size)
+        self.environment.subscribe(self._on_change)
+
+    def _on_change(self, snapshot: Snapshot, changes: dict[str, Number] | None) -> None:
+        if changes is None:
+            self.history.clear(snapshot.epoch)
+
+    @property
+    def variables(self) -> Mapping[str, Number]:
+        """
+        Read-only view of the committed variables.
+        """
+        return self.environment.snapshot().variables
+
+    @property
+    def functions(self) -> Mapping[str, UserFunction]:
         """
-        self.variables: dict[str, Number] = {}
+        Read-only view of the committed user functions.
+        """
+        return self.environment.snapshot().functions
+
+    def evaluate(
+        self, node: Node, mode: NumericMode | None = None, record: bool = True
+    ) -> Number:
+        """
+        Evaluate a syntax tree against the current variables and commit its assignments.
+
+        Args:
+            node (Node): The root of the syntax tree.
+            mode (NumericMode | None): Numeric mode of the evaluation, the default one if None.
+            record (bool): Whether to add the result to the history.
+
+        Returns:
+            Number: The result of evaluating the tree.
+        """
+        scope: Scope = Scope(self, self.environment.snapshot(), mode or self.mode)
+        token = _scope.set(scope)
+        try:
+            result: Number = self.visit(node)
+        finally:
+            _scope.reset(token)
+
+        self._commit(scope, result, record)
+        return result
+
+    def run(
+        self,
+        program: Callable[[Scope], Any],
+        mode: NumericMode | None = None,
+        record: bool = True,
+    ) -> Number:
+        """
+        Run a compiled syntax tree against the current variables and commit its assignments.
+
+        Args:
+            program (Callable[[Scope], Any]): The tree compiled for the numeric mode,
+                returning the value of the result.
+            mode (NumericMode | None): Numeric mode the program was compiled for, the
+                default one if None.
+            record (bool): Whether to add the result to the history.
+
+        Returns:
+            Number: The result of the program.
+        """
+        scope: Scope = Scope(self, self.environment.snapshot(), mode or self.mode)
+        result: Number = Number(program(scope))
+        self._commit(scope, result, record)
+        return result
+
+    def _commit(self, scope: Scope, result: Number, record: bool) -> None:
+        committed: Snapshot | None = self.environment.commit(
+            scope.assigned, scope.base, scope.defined
+        )
+        # results of evaluations undone by a reset, and function definitions, aren't kept
+        if record and committed is not None and type(result.Value) is not UserFunction:
+            # a reset between the commit and here has already moved the history on
+            self.history.record(result, scope.base.epoch)
 
     def visit(self, node: Node) -> Number:
         """
         Visit a syntax tree node and send to the appropriate visit method.
 
+        Called outside of an evaluation, the node is evaluated as a whole
+        tree, like `evaluate`.
+
         Args:
             node (Node): The syntax tree node to visit.
 
         Returns:
             Number: The result of evaluating the node.
         """
+        scope: Scope | None = _scope.get()
+        if scope is None or scope.interpreter is not self:
+            return self.evaluate(node)
+
         method_name: str = f"visit_{type(node).__name__}"
         method: Callable = getattr(self, method_name)
         return method(node)
@@ -47,15 +248,16 @@ class Interpreter:
             node (NumberNode): The NumberNode containing the numeric value.
 
         Returns:
-            Number: The Number object representing the node's value.
+            Number: The Number object representing the node's value, in the numeric mode.
         """
-        return Number(node.value)
+        mode: NumericMode = _scope.get().mode  # type: ignore
+        return Number(node.value if mode is EXACT else mode.convert(node.value))
 
     def visit_BinOperationNode(self, node: BinOperationNode) -> Number:
         """
         Process a BinOperationNode by evaluating the left and right nodes and applying the binary operation.
 
-        Supported operations:
+        Operations follow the numeric mode of the evaluation. Supported operations:
             + : Addition
             - : Subtraction
             * : Multiplication
@@ -74,27 +276,12 @@ class Interpreter:
         """
         left: Number = self.visit(node.left_node)
         right: Number = self.visit(node.right_node)
-        operation_: str = node.operation
-
-        if operation_ == "+":
-            return Number(left.Value + right.Value)
-
-        elif operation_ == "-":
-            return Number(left.Value - right.Value)
-
-        elif operation_ == "*":
-            return Number(left.Value * right.Value)
 
-        elif operation_ == "/":
-            if right.Value == 0:
-                raise ZeroDivisionError("Division by zero is not allowed.")
-            return Number(left.Value / right.Value)
+        operation: Callable | None = _scope.get().mode.binary.get(node.operation)  # type: ignore
+        if operation is None:
+            raise RuntimeError(f"Unsuported operation: '{node.operation}'.")
 
-        elif operation_ == "^":
-            return Number(left.Value**right.Value)
-
-        else:
-            raise RuntimeError(f"Unsuported operation: '{operation_}'.")
+        return Number(operation(left.Value, right.Value))
 
     def visit_UnaryOperationNode(self, node: UnaryOperationNode) -> Number:
         """
@@ -114,12 +301,11 @@ class Interpreter:
             RuntimeError: If the operation is not recognized.
         """
         value: Number = self.visit(node.operand)
-        if node.operation == "+":
-            return Number(+value.Value)
-        elif node.operation == "-":
-            return Number(-value.Value)
+        operation: Callable | None = _scope.get().mode.unary.get(node.operation)  # type: ignore
+        if operation is None:
+            raise RuntimeError(f"Unrecognized operation: '{node.operation}'.")
 
-        raise RuntimeError(f"Unrecognized operation: '{node.operation}'.")
+        return Number(operation(value.Value))
 
     def visit_FunctionNode(self, node: FunctionNode) -> Number:
         """
@@ -144,22 +330,18 @@ class Interpreter:
         arg: Number = self.visit(node.expression)
         funct_name: str = node.function_name.lower()
 
-        if funct_name == "sqrt":
-            return Number(math.sqrt(arg.Value))
-        elif funct_name == "log":
-            return Number(math.log(arg.Value, 2))
-        elif funct_name == "sin":
-            return Number(math.sin(arg.Value))
-        elif funct_name == "cos":
-            return Number(math.cos(arg.Value))
-        elif funct_name == "exp":
-            return Number(math.exp(arg.Value))
+        function: Callable | None = _scope.get().mode.functions.get(funct_name)  # type: ignore
+        if function is None:
+            raise RuntimeError(f"Unsuported function: '{funct_name}'.")
 
-        raise RuntimeError(f"Unsuported function: '{funct_name}'.")
+        return Number(function(arg.Value))
 
     def visit_AssignmentNode(self, node: AssignmentNode) -> Number:
         """
-        Process an AssignmentNode by evaluating the value and storing it in the variable dictionary.
+        Process an AssignmentNode by evaluating the value and storing it in the evaluation scope.
+
+        The assignment is visible to the rest of the evaluation right away, and
+        to other evaluations once the evaluation commits.
 
         Args:
             node (AssignmentNode): The assignment node containing the variable name and value.
@@ -168,7 +350,7 @@ class Interpreter:
             Number: The evaluated value assigned to the variable.
         """
         value: Number = self.visit(node.value)
-        self.variables[node.variable_name] = value
+        _scope.get().assigned[node.variable_name] = value  # type: ignore
         return value
 
     def visit_VariableNode(self, node):
@@ -179,12 +361,67 @@ class Interpreter:
             node (VariableNode): The variable node containing the variable name.
 
         Returns:
-                Number: The value assigned to the variable.
+                Number: The value assigned to the variable, in the numeric mode.
 
         Raises:
             ValueError: If the variable has not been assigned a value.
         """
-        if node.name in self.variables:
-            return self.variables[node.name]
+        scope: Scope = _scope.get()  # type: ignore
+        value: Number | None = scope.lookup(node.name)
+        if value is not None:
+            if scope.mode is EXACT and type(value.Value) is not Decimal:
+                return value
+            return Number(scope.mode.convert(value.Value))
 
         raise ValueError(f"No value assigned to variable: '{node.name}'.")
+
+    def visit_FunctionDefinitionNode(self, node: FunctionDefinitionNode) -> Number:
+        """
+        Process a FunctionDefinitionNode by storing the user function in the evaluation scope.
+
+        The body isn't evaluated, it is kept as parsed and evaluated by each call.
+
+        Args:
+            node (FunctionDefinitionNode): The definition with the name, parameters and body.
+
+        Returns:
+            Number: The defined UserFunction, written as its signature and body.
+        """
+        function: UserFunction = UserFunction(
+            node.function_name, tuple(node.parameters), node.body, self.memo_size
+        )
+        _scope.get().defined[node.function_name] = function  # type: ignore
+        return Number(function)  # type: ignore
+
+    def visit_CallNode(self, node: CallNode) -> Number:
+        """
+        Process a CallNode by evaluating the arguments and the body of the user function.
+
+        Pure functions look the arguments up in their memo first.
+
+        Args:
+            node (CallNode): The call with the function name and argument expressions.
+
+        Returns:
+            Number: The result of the body with the arguments bound to the parameters.
+
+        Raises:
+            ValueError: If no function has the name.
+            TypeError: If the number of arguments doesn't match the parameters.
+        """
+        scope: Scope = _scope.get()  # type: ignore
+        function: UserFunction = scope.lookup_function(node.function_name)
+        function.check_arguments(len(node.arguments))
+        arguments: list[Number] = [self.visit(argument) for argument in node.arguments]
+
+        if not function.memo_size:
+            return scope.call(function, arguments, lambda: self.visit(function.body))
+
+        key: tuple = memo_key(scope.mode.name, [argument.Value for argument in arguments])
+        value: Any = function.recall(key)
+        if value is not MISSING:
+            return Number(value)
+
+        result: Number = scope.call(function, arguments, lambda: self.visit(function.body))
+        function.remember(key, result.Value)
+        return result
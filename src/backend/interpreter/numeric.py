@@ -0,0 +1,290 @@
+"""
+Numeric modes: how literals, variables and intermediate results are represented.
+
+    exact       Python numbers, as the Lexer produces them: integer literals
+                grow into big integers of up to MAX_INTEGER_BITS bits, the
+                rest is float or complex.
+    float64     every number is a float; results too big for a float become
+                inf instead of growing, like IEEE 754 arithmetic.
+    decimal:N   every number is a Decimal rounded to N significant digits.
+
+A mode holds the tables of operations and functions every evaluation
+engine dispatches to, so the modes behave the same whatever evaluates
+the syntax tree.
+"""
+
+from decimal import Context, Decimal, localcontext
+from functools import lru_cache
+from typing import Any, Callable
+
+import math
+import operator
+
+# precision of "decimal" without digits, the default of the decimal module
+DEFAULT_DIGITS: int = 28
+
+# highest precision accepted, to bound the cost of a single operation
+MAX_DIGITS: int = 1000
+
+# biggest integer an exact operation may produce: a power like 9^9^7 would
+# hold the interpreter lock for seconds, for a number too long to print
+MAX_INTEGER_BITS: int = 1 << 20
+
+
+def _divide(left: Any, right: Any) -> Any:
+    if right == 0:
+        raise ZeroDivisionError("Division by zero is not allowed.")
+    return left / right
+
+
+def _log2(value: Any) -> Any:
+    return math.log(value, 2)
+
+
+def _check_bits(symbol: str, bits: int) -> None:
+    if bits > MAX_INTEGER_BITS:
+        raise OverflowError(
+            f"The result of '{symbol}' would have at least {bits} bits, "
+            f"more than the {MAX_INTEGER_BITS} allowed."
+        )
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    if type(left) is int and type(right) is int and left and right:
+        _check_bits("*", left.bit_length() + right.bit_length() - 1)
+    return left * right
+
+
+def _power(base: Any, exponent: Any) -> Any:
+    # checked before computing: the result is what takes the time
+    if type(base) is int and type(exponent) is int and exponent > 0 and abs(base) > 1:
+        _check_bits("^", (base.bit_length() - 1) * exponent + 1)
+    return base**exponent
+
+
+class NumericMode:
+    """
+    Representation of the numbers of an evaluation.
+
+    Attributes:
+        name (str): Name of the mode, as clients write it.
+        binary (dict[str, Callable]): Binary operations by operator.
+        unary (dict[str, Callable]): Unary operations by operator.
+        functions (dict[str, Callable]): Built-in functions by lowercase name.
+    """
+
+    name: str = "exact"
+
+    def __init__(self) -> None:
+        self.binary: dict[str, Callable[[Any, Any], Any]] = {
+            "+": operator.add,
+            "-": operator.sub,
+            "*": _multiply,
+            "/": _divide,
+            "^": _power,
+        }
+        self.unary: dict[str, Callable[[Any], Any]] = {
+            "+": operator.pos,
+            "-": operator.neg,
+        }
+        self.functions: dict[str, Callable[[Any], Any]] = {
+            "sqrt": math.sqrt,
+            "log": _log2,
+            "sin": math.sin,
+            "cos": math.cos,
+            "exp": math.exp,
+        }
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def convert(self, value: Any) -> Any:
+        """
+        Represent a literal or a stored value in this mode.
+
+        Args:
+            value (Any): The value, as parsed or as stored by any mode.
+
+        Returns:
+            Any: The value in this mode, the same object if it needs no change.
+        """
+        if type(value) is Decimal:
+            return int(value) if value == value.to_integral_value() else float(value)
+        return value
+
+
+def _float(value: Any) -> Any:
+    if type(value) is float or type(value) is complex:
+        return value
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf if value > 0 else -math.inf
+
+
+def _float_power(base: Any, exponent: Any) -> Any:
+    try:
+        return base**exponent
+    except OverflowError:
+        if type(base) is complex or type(exponent) is complex:
+            raise
+        # an odd integer power keeps the sign of a negative base
+        negative: bool = base < 0 and exponent % 2 == 1
+        return -math.inf if negative else math.inf
+
+
+def _float_exp(value: Any) -> Any:
+    try:
+        return math.exp(value)
+    except OverflowError:
+        return math.inf
+
+
+class Float64Mode(NumericMode):
+    """
+    Every number is a float, overflowing to inf.
+    """
+
+    name: str = "float64"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.binary["^"] = _float_power
+        self.functions["exp"] = _float_exp
+
+    def convert(self, value: Any) -> Any:
+        return _float(value)
+
+
+class DecimalMode(NumericMode):
+    """
+    Every number is a Decimal rounded to a fixed number of significant digits.
+
+    Literals are read as the shortest decimal that gives back their float,
+    so "0.1" is exactly one tenth.
+    """
+
+    def __init__(self, digits: int) -> None:
+        """
+        Constructor for DecimalMode.
+
+        Args:
+            digits (int): Significant digits of every result.
+        """
+        super().__init__()
+        self.name = f"decimal:{digits}"
+        self.context: Context = Context(prec=digits)
+        context: Context = self.context
+
+        self.binary = {
+            "+": context.add,
+            "-": context.subtract,
+            "*": context.multiply,
+            "/": self._divide,
+            "^": context.power,
+        }
+        self.unary = {"+": context.plus, "-": context.minus}
+        self.functions = {
+            "sqrt": context.sqrt,
+            "log": self._log2,
+            "sin": lambda value: self._trigonometric(value, cosine=False),
+            "cos": lambda value: self._trigonometric(value, cosine=True),
+            "exp": context.exp,
+        }
+
+    def convert(self, value: Any) -> Any:
+        if type(value) is Decimal:
+            return self.context.plus(value)
+        if type(value) is float:
+            return self.context.create_decimal(repr(value))
+        if type(value) is complex:
+            raise TypeError("Complex numbers have no decimal representation.")
+        return self.context.create_decimal(value)
+
+    def _divide(self, left: Decimal, right: Decimal) -> Decimal:
+        if right == 0:
+            raise ZeroDivisionError("Division by zero is not allowed.")
+        return self.context.divide(left, right)
+
+    def _log2(self, value: Decimal) -> Decimal:
+        with localcontext(self.context) as context:
+            context.prec += 5
+            result: Decimal = value.ln() / Decimal(2).ln()
+            if result == result.to_integral_value():
+                # exact powers of two, written as integers
+                result = result.quantize(Decimal(1))
+        return self.context.plus(result)
+
+    def _trigonometric(self, value: Decimal, cosine: bool) -> Decimal:
+        # Taylor series after reducing the angle, with the recipes of the decimal docs
+        magnitude: int = max(0, value.adjusted())
+        if magnitude > MAX_DIGITS:
+            raise ValueError(
+                f"Angle too large for {'cos' if cosine else 'sin'} in decimal mode."
+            )
+
+        with localcontext(self.context) as context:
+            context.prec += magnitude + 5
+            angle: Decimal = value % (2 * _pi())
+
+            term: Decimal = Decimal(1) if cosine else angle
+            total: Decimal = term
+            previous: Decimal | None = None
+            index: int = 0 if cosine else 1
+            while total != previous:
+                previous = total
+                term = -term * angle * angle / ((index + 1) * (index + 2))
+                total += term
+                index += 2
+
+        return self.context.plus(total)
+
+
+def _pi() -> Decimal:
+    # pi to the precision of the current context, from the decimal docs
+    with localcontext() as context:
+        context.prec += 2
+        three: Decimal = Decimal(3)
+        previous, term, total, n, na, d, da = 0, three, three, 1, 0, 0, 24
+        while total != previous:
+            previous = total
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            term = (term * n) / d
+            total += term
+    return +total
+
+
+EXACT: NumericMode = NumericMode()
+FLOAT64: NumericMode = Float64Mode()
+
+
+@lru_cache(maxsize=64)
+def parse_mode(name: str) -> NumericMode:
+    """
+    Numeric mode by the name clients write.
+
+    Args:
+        name (str): "exact", "float64", "decimal" or "decimal:N" with N significant digits.
+
+    Returns:
+        NumericMode: The mode, shared by every evaluation that asks for it.
+
+    Raises:
+        ValueError: If the name isn't a known mode or the digits are out of range.
+    """
+    if name == "exact":
+        return EXACT
+    if name == "float64":
+        return FLOAT64
+
+    kind, separator, digits = name.partition(":")
+    if kind != "decimal":
+        raise ValueError(
+            f"Unknown numeric mode: '{name}'. Use exact, float64 or decimal:N."
+        )
+    if not separator:
+        return DecimalMode(DEFAULT_DIGITS)
+    if not digits.isdigit() or not 1 <= int(digits) <= MAX_DIGITS:
+        raise ValueError(f"Decimal digits must be between 1 and {MAX_DIGITS}: '{name}'.")
+    return DecimalMode(int(digits))
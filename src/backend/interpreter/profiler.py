@@ -0,0 +1,212 @@
+"""
+Opt-in profiling of the evaluation of one expression, node by node.
+
+`ProfilingInterpreter` evaluates like the interpreter it wraps, and
+records for every node of the syntax tree, by the path of nodes that led
+to it, how many times it was visited, the time spent in it with and
+without its children, and the biggest integer it produced. Nodes of user
+functions appear under each call, so a recursive function unfolds as deep
+as it ran.
+
+The plain `Interpreter` is never touched: evaluations that aren't profiled
+pay nothing. Times include the cost of the profiler itself, which weighs
+most on the cheapest nodes.
+"""
+
+from src.backend.interpreter.interpreter import Interpreter, _scope
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import *
+
+from time import perf_counter_ns
+from typing import Any, Callable
+
+# longest text of a literal in the node labels
+MAX_LABEL_LENGTH: int = 24
+
+
+def node_label(node: Node) -> str:
+    """
+    Short name of a node, for the profile.
+
+    Args:
+        node (Node): The node.
+
+    Returns:
+        str: Kind of the node and what sets it apart, like "BinOperation(+)".
+    """
+    if isinstance(node, BinOperationNode):
+        detail: str = node.operation
+    elif isinstance(node, UnaryOperationNode):
+        detail = node.operation
+    elif isinstance(node, (FunctionNode, CallNode, FunctionDefinitionNode)):
+        detail = node.function_name
+    elif isinstance(node, AssignmentNode):
+        detail = node.variable_name
+    elif isinstance(node, VariableNode):
+        detail = node.name
+    else:
+        detail = repr(node)
+        if len(detail) > MAX_LABEL_LENGTH:
+            detail = detail[: MAX_LABEL_LENGTH - 3] + "..."
+
+    return f"{type(node).__name__.removesuffix('Node')}({detail})"
+
+
+class NodeProfile:
+    """
+    Measurements of a node reached by one path of the syntax tree.
+
+    Attributes:
+        label (str): Short name of the node.
+        count (int): Visits of the node.
+        inclusive_ns (int): Time spent in the node and its children.
+        children_ns (int): Time spent in its children.
+        max_bits (int | None): Bit length of the biggest integer it produced,
+            None if it produced no integer.
+        children (dict[int, NodeProfile]): Profiles of the children, by node id.
+    """
+
+    __slots__ = (
+        "label",
+        "count",
+        "inclusive_ns",
+        "children_ns",
+        "max_bits",
+        "children",
+    )
+
+    def __init__(self, label: str) -> None:
+        self.label: str = label
+        self.count: int = 0
+        self.inclusive_ns: int = 0
+        self.children_ns: int = 0
+        self.max_bits: int | None = None
+        self.children: dict[int, NodeProfile] = {}
+
+    @property
+    def exclusive_ns(self) -> int:
+        """
+        Time spent in the node itself, without its children.
+        """
+        return self.inclusive_ns - self.children_ns
+
+    def child(self, node: Node) -> "NodeProfile":
+        """
+        Profile of a child node, made on its first visit.
+
+        Args:
+            node (Node): The child node.
+
+        Returns:
+            NodeProfile: Its profile under this one.
+        """
+        profile: NodeProfile | None = self.children.get(id(node))
+        if profile is None:
+            profile = self.children[id(node)] = NodeProfile(node_label(node))
+        return profile
+
+    def observe(self, value: Any) -> None:
+        """
+        Record the size of a value produced by the node.
+
+        Args:
+            value (Any): The value.
+        """
+        if type(value) is int:
+            bits: int = value.bit_length()
+            if self.max_bits is None or bits > self.max_bits:
+                self.max_bits = bits
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        The profile and the ones of its children, as JSON-ready data.
+
+        Returns:
+            dict[str, Any]: Label, counters and children, in visiting order.
+        """
+        return {
+            "node": self.label,
+            "count": self.count,
+            "inclusive_ns": self.inclusive_ns,
+            "exclusive_ns": self.exclusive_ns,
+            "max_bits": self.max_bits,
+            "children": [child.as_dict() for child in self.children.values()],
+        }
+
+    def collapsed(self, prefix: str = "") -> list[str]:
+        """
+        The profile as collapsed stacks, the input of flame graph tools.
+
+        Args:
+            prefix (str): Labels of the parents, separated by ";".
+
+        Returns:
+            list[str]: One "path exclusive_ns" line per node that took any time.
+        """
+        path: str = f"{prefix};{self.label}" if prefix else self.label
+        lines: list[str] = [f"{path} {self.exclusive_ns}"] if self.exclusive_ns else []
+        for child in self.children.values():
+            lines.extend(child.collapsed(path))
+        return lines
+
+
+class ProfilingInterpreter(Interpreter):
+    """
+    Interpreter that profiles its evaluations, over the state of another one.
+
+    It reads and commits the variables, user functions and history of the
+    wrapped interpreter, so a profiled evaluation has the same effects as a
+    plain one. Profiles add up over its evaluations: make one per
+    evaluation to profile, from one thread at a time.
+    """
+
+    def __init__(self, interpreter: Interpreter) -> None:
+        """
+        Constructor for ProfilingInterpreter.
+
+        Args:
+            interpreter (Interpreter): Interpreter whose state is used.
+
+        Attributes:
+            profile (NodeProfile): Root of the profiles, whose children are the
+                roots of the evaluated trees.
+        """
+        # the wrapped interpreter already clears the shared history on resets
+        self.environment = interpreter.environment
+        self.mode = interpreter.mode
+        self.memo_size = interpreter.memo_size
+        self.history = interpreter.history
+        self.profile: NodeProfile = NodeProfile("")
+        self._current: NodeProfile = self.profile
+
+    def visit(self, node: Node) -> Number:
+        """
+        Visit a syntax tree node, measuring it under the node being visited.
+
+        Args:
+            node (Node): The syntax tree node to visit.
+
+        Returns:
+            Number: The result of evaluating the node.
+        """
+        scope = _scope.get()
+        if scope is None or scope.interpreter is not self:
+            return self.evaluate(node)
+
+        parent: NodeProfile = self._current
+        profile: NodeProfile = parent.child(node)
+        method: Callable = getattr(self, f"visit_{type(node).__name__}")
+
+        self._current = profile
+        start: int = perf_counter_ns()
+        try:
+            result: Number = method(node)
+        finally:
+            elapsed: int = perf_counter_ns() - start
+            self._current = parent
+            profile.count += 1
+            profile.inclusive_ns += elapsed
+            parent.children_ns += elapsed
+
+        profile.observe(result.Value)
+        return result
@@ -0,0 +1,199 @@
+"""
+Tiered execution: syntax trees start in the Interpreter and hot ones get compiled.
+
+Most expressions are evaluated once, so compiling them all would cost
+more than it saves. Evaluations are counted per syntax tree, which the
+parse cache shares between requests for the same text; once a tree was
+evaluated `threshold` times in a numeric mode it is compiled in a
+background thread, and the next evaluations run the compiled program.
+A tree that fails to compile stays in the Interpreter.
+"""
+
+from src.backend.interpreter.compiler import Program, compile_tree
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import Node
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class _Entry:
+    """
+    Execution state of one syntax tree.
+    """
+
+    __slots__ = ("tree", "count", "programs", "pending", "failed")
+
+    def __init__(self, tree: Node) -> None:
+        # keeping the tree alive keeps its id from being reused
+        self.tree: Node = tree
+        self.count: int = 0
+        self.programs: dict[str, Program] = {}
+        self.pending: set[str] = set()
+        self.failed: set[str] = set()
+
+
+class TieredExecution:
+    """
+    Execution manager choosing between the Interpreter and compiled programs.
+
+    One manager may serve many interpreters: programs read and assign
+    variables through the evaluation scope of the interpreter running them.
+    """
+
+    def __init__(self, threshold: int = 32, capacity: int = 4096) -> None:
+        """
+        Constructor for TieredExecution.
+
+        Args:
+            threshold (int): Evaluations of a tree in a numeric mode before compiling it.
+            capacity (int): Syntax trees tracked, the least recently used are forgotten.
+        """
+        self.threshold: int = threshold
+        self.capacity: int = capacity
+        self.interpreted: int = 0
+        self.compiled: int = 0
+        self.compilations: int = 0
+        self.failures: int = 0
+        self.compile_seconds: float = 0.0
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._compiler: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="compiler"
+        )
+
+    def evaluate(
+        self,
+        interpreter: Interpreter,
+        tree: Node,
+        mode: NumericMode | None = None,
+        record: bool = True,
+    ) -> Number:
+        """
+        Evaluate a syntax tree in the fastest tier available for it.
+
+        Args:
+            interpreter (Interpreter): Interpreter that holds the variables.
+            tree (Node): Root of the syntax tree.
+            mode (NumericMode | None): Numeric mode, the default one of the interpreter if None.
+            record (bool): Whether to add the result to the history of the interpreter.
+
+        Returns:
+            Number: The result of evaluating the tree.
+        """
+        mode = mode or interpreter.mode
+        program: Program | None = self._program(tree, mode)
+        if program is None:
+            return interpreter.evaluate(tree, mode, record)
+        return interpreter.run(program, mode, record)
+
+    def preheat(self, tree: Node, count: int, mode: NumericMode) -> None:
+        """
+        Count past evaluations of a tree, compiling it if they make it hot.
+
+        Args:
+            tree (Node): Root of the syntax tree.
+            count (int): Evaluations seen before, like in the traffic of a previous run.
+            mode (NumericMode): Numeric mode they were evaluated in.
+        """
+        with self._lock:
+            entry: _Entry = self._entry(tree)
+            entry.count += count
+            self._promote(entry, mode)
+
+    def _entry(self, tree: Node) -> _Entry:
+        # called with the lock held
+        key: int = id(tree)
+        entry: _Entry | None = self._entries.get(key)
+        if entry is not None and entry.tree is tree:
+            self._entries.move_to_end(key)
+            return entry
+
+        entry = _Entry(tree)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _promote(self, entry: _Entry, mode: NumericMode) -> None:
+        # called with the lock held
+        if (
+            entry.count >= self.threshold
+            and mode.name not in entry.programs
+            and mode.name not in entry.pending
+            and mode.name not in entry.failed
+        ):
+            entry.pending.add(mode.name)
+            self._compiler.submit(self._compile, entry, mode)
+
+    def _program(self, tree: Node, mode: NumericMode) -> Program | None:
+        with self._lock:
+            entry: _Entry = self._entry(tree)
+            program: Program | None = entry.programs.get(mode.name)
+            if program is not None:
+                self.compiled += 1
+                return program
+
+            self.interpreted += 1
+            entry.count += 1
+            self._promote(entry, mode)
+            return None
+
+    def _compile(self, entry: _Entry, mode: NumericMode) -> None:
+        started: float = time.perf_counter()
+        try:
+            program: Program = compile_tree(entry.tree, mode)
+        except Exception as error:
+            log.warning("Falling back to the interpreter for %r: %s", entry.tree, error)
+            with self._lock:
+                entry.failed.add(mode.name)
+                entry.pending.discard(mode.name)
+                self.failures += 1
+                self.compile_seconds += time.perf_counter() - started
+            return
+
+        with self._lock:
+            entry.programs[mode.name] = program
+            entry.pending.discard(mode.name)
+            self.compilations += 1
+            self.compile_seconds += time.perf_counter() - started
+
+    def close(self) -> None:
+        """
+        Stop compiling, dropping the compilations not started yet.
+        """
+        self._compiler.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Counters of each tier, to tune the threshold.
+
+        Returns:
+            dict: Threshold, trees tracked, evaluations per tier and compilation counters.
+        """
+        with self._lock:
+            pending: int = sum(len(entry.pending) for entry in self._entries.values())
+            programs: int = sum(len(entry.programs) for entry in self._entries.values())
+            evaluations: int = self.interpreted + self.compiled
+            return {
+                "threshold": self.threshold,
+                "capacity": self.capacity,
+                "tracked_trees": len(self._entries),
+                "interpreted_evaluations": self.interpreted,
+                "compiled_evaluations": self.compiled,
+                "compiled_ratio": self.compiled / evaluations if evaluations else 0.0,
+                "compiled_programs": programs,
+                "pending_compilations": pending,
+                "compilations": self.compilations,
+                "failed_compilations": self.failures,
+                "compile_seconds": self.compile_seconds,
+            }
@@ -1,4 +1,4 @@
-from typing import Generator, Iterator
+from typing import Generator
 
 from src.backend.utils.raises import (
     FloatPointSyntaxError,
@@ -9,28 +9,156 @@ from src.backend.token.tokens import Token, TokenType
 from src.backend.token.alphabet import Alphabet, Operations
 
 import logging
+import mmap
+import re
 
 log = logging.getLogger(__name__)
 
+# Text accepted by the Lexer: binary inputs are scanned in place as ASCII
+Source = str | bytes | bytearray | memoryview | mmap.mmap
+
+
+def _run_patterns(
+    digits: str, float_points: str, letters: str, whitespace: str
+) -> tuple[str, str, str]:
+    digits, float_points = f"[{re.escape(digits)}]", f"[{re.escape(float_points)}]"
+    letters, whitespace = f"[{re.escape(letters)}]", f"[{re.escape(whitespace)}]"
+
+    # at most one float point, a second one starts a new (invalid) number
+    number: str = f"{digits}*(?:{float_points}{digits}*)?"
+    name: str = f"{letters}(?:{letters}|{digits})*"
+    return number, name, f"{whitespace}+"
+
+
+_NUMBER, _NAME, _WHITESPACE = _run_patterns(
+    Alphabet.DIGITS, Alphabet.FLOAT_POINTS, Alphabet.LETTERS, Alphabet.WHITESPACE
+)
+
+# the same runs for str and for binary sources, so both are matched in place
+_TEXT_PATTERNS: tuple[re.Pattern, ...] = tuple(
+    re.compile(pattern) for pattern in (_NUMBER, _NAME, _WHITESPACE)
+)
+_BINARY_PATTERNS: tuple[re.Pattern, ...] = tuple(
+    re.compile(pattern.encode("ascii")) for pattern in (_NUMBER, _NAME, _WHITESPACE)
+)
+
+# character classes, checked once per token instead of scanning the Alphabet
+_WHITESPACE_CHARACTERS: frozenset[str] = frozenset(Alphabet.WHITESPACE)
+_LETTER_CHARACTERS: frozenset[str] = frozenset(Alphabet.LETTERS)
+_NUMBER_CHARACTERS: frozenset[str] = frozenset(Alphabet.DIGITS + Alphabet.FLOAT_POINTS)
+
+# trimmed around binary inputs, what bytes.strip() removes
+_ASCII_WHITESPACE: frozenset[int] = frozenset(b" \t\n\r\x0b\x0c")
+
+_SYMBOLS: dict[str, tuple[TokenType, str]] = {
+    Operations.LEFT_PARENTHESES: (
+        TokenType.LEFT_PARENTHESES,
+        "The symbol generated was: '%s'",
+    ),
+    Operations.RIGHT_PARENTHESES: (
+        TokenType.RIGHT_PARENTHESES,
+        "The symbol generated was: '%s'",
+    ),
+    Operations.EQUAL: (TokenType.EQUAL, "The operation generated was: %s"),
+    Operations.PLUS: (TokenType.PLUS, "The operation generated was: %s"),
+    Operations.MINUS: (TokenType.MINUS, "The operation generated was: %s"),
+    Operations.MULTIPLY: (TokenType.MULTIPLY, "The operation generated was: %s"),
+    Operations.DIVIDE: (TokenType.DIVIDE, "The operation generated was: %s"),
+    Operations.POWER: (TokenType.POWER, "The operation generated was: %s"),
+    Operations.COMMA: (TokenType.COMMA, "The symbol generated was: '%s'"),
+}
+
+# built-in functions by name, any other name is a variable or a user function
+_NAMED_OPERATIONS: dict[str, TokenType] = {
+    Operations.LOG: TokenType.LOG,
+    Operations.SQRT: TokenType.SQRT,
+    Operations.COS: TokenType.COS,
+    Operations.SIN: TokenType.SIN,
+    Operations.EXP: TokenType.EXP,
+}
+
 
 class Lexer:
     """
     Lexer to convert a string to tokens
     """
 
-    def __init__(self, text: str) -> None:
+    def __init__(self, text: Source) -> None:
         """
         Constructor from Lexer
 
+        The text is scanned in place: `bytes`, `bytearray`, `memoryview` and
+        `mmap` inputs are never copied or decoded as a whole, and only the
+        characters of each token are materialized. Whitespace around the
+        text is skipped, like `str.strip()` (ASCII whitespace for binary
+        inputs), and token positions are offsets in the untrimmed text.
+
         Args:
-            text (str): Text to convert to Tokens
+            text (Source): Text to convert to Tokens
         """
-        cleaned_text: str = text.strip()
-        log.info(f"The text in Lexer is: '{cleaned_text}'")
-        self.text: Iterator = iter(cleaned_text)
+        self._binary: bool = not isinstance(text, str)
+        if self._binary and isinstance(text, memoryview) and text.format != "B":
+            text = text.cast("B")
+
+        self.text: Source = text
+        start, self._length = self._trimmed_bounds()
+        self._number, self._name, self._whitespace = (
+            _BINARY_PATTERNS if self._binary else _TEXT_PATTERNS
+        )
+
+        # tokens are logged one by one, so the check is made once per text
+        self._debug: bool = log.isEnabledFor(logging.DEBUG)
+        if self._debug:
+            if self._binary:
+                log.debug("The Lexer is reading %d bytes", self._length)
+            else:
+                log.debug("The text in Lexer is: '%s'", text)
+
+        self.position: int = start - 1
+        # offset where the token being generated starts
+        self.token_start: int = start
         self._current_character: str | None = None
         self.next_character()
 
+    def _trimmed_bounds(self) -> tuple[int, int]:
+        """
+        Bounds of the text without its surrounding whitespace
+
+        Returns:
+            tuple[int, int]: Offset of the first character kept, and the end offset
+        """
+        text: Source = self.text
+        start, end = 0, len(text)
+        if self._binary:
+            while end > start and text[end - 1] in _ASCII_WHITESPACE:
+                end -= 1
+            while start < end and text[start] in _ASCII_WHITESPACE:
+                start += 1
+        else:
+            while end > start and text[end - 1].isspace():  # type: ignore
+                end -= 1
+            while start < end and text[start].isspace():  # type: ignore
+                start += 1
+        return start, end
+
+    @classmethod
+    def from_file(cls, path: str) -> "Lexer":
+        """
+        Create a Lexer over a memory-mapped file, without reading it in memory
+
+        Args:
+            path (str): Path of the file with the expression
+
+        Returns:
+            Lexer: Lexer over the file contents
+        """
+        with open(path, "rb") as f:
+            try:
+                return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            except ValueError:
+                # empty files can't be mapped
+                return cls(b"")
+
     @property
     def current_character(self) -> str | None:
         """
@@ -62,11 +190,49 @@ class Lexer:
         """
         Advance to next character
         """
-        try:
-            self.current_character = next(self.text)
-            log.debug(f"Next character is '{self.current_character}'")
-        except StopIteration:
+        self.move_to(self.position + 1)
+
+    def move_to(self, position: int) -> None:
+        """
+        Move to a position of the text
+
+        Args:
+            position (int): Index of the new current character
+        """
+        self.position = position
+        if position >= self._length:
             self.current_character = None
+        elif self._binary:
+            self.current_character = chr(self.text[position])
+        else:
+            self.current_character = self.text[position]
+
+    def _match(self, pattern: re.Pattern) -> str:
+        """
+        Consume a run of characters matching the pattern, from the current position
+
+        Args:
+            pattern (re.Pattern): Pattern of the run
+
+        Returns:
+            str: The consumed characters
+        """
+        match: re.Match = pattern.match(  # type: ignore
+            self.text, self.position, self._length
+        )
+        self.move_to(match.end())
+        run = match.group()
+        return run.decode("ascii") if self._binary else run
+
+    def _illegal_character(self) -> str:
+        """
+        Decode the full character at the current position, for error messages
+        """
+        if not self._binary:
+            return self.current_character  # type: ignore
+
+        window: bytes = bytes(self.text[self.position : self.position + 4])
+        return window.decode("utf-8", errors="replace")[0]
 
     def generate_number(self) -> Token:
         """
@@ -75,27 +241,12 @@ class Lexer:
         Returns:
             Token: Minimal information of Lexer
         """
-        decimal_points_count: int = 0
-        number_buffer: str | None = self.current_character
-
-        if number_buffer is None:
+        if self.current_character is None:
             raise RuntimeError("It was passed a None object to generate_number().")
 
-        if number_buffer in Alphabet.FLOAT_POINTS:
-            decimal_points_count += 1
-
-        self.next_character()
-        while self.current_character is not None and (
-            self.current_character in Alphabet.DIGITS
-            or self.current_character in Alphabet.FLOAT_POINTS
-        ):
-            if self.current_character in Alphabet.FLOAT_POINTS:
-                decimal_points_count += 1
-                if decimal_points_count > 1:
-                    break
-
-            number_buffer += self.current_character
-            self.next_character()
+        start: int = self.position
+        self.token_start = start
+        number_buffer: str = self._match(self._number)
 
         # if have a letter without blank space between
         if (
@@ -116,11 +267,17 @@ class Lexer:
                 f"Float Point is in incorrect position: Expect a digit after '{number_buffer[-1]}'."
             )
 
+        has_float_point: bool = any(
+            point in number_buffer for point in Alphabet.FLOAT_POINTS
+        )
         number_token: Token = Token(
             TokenType.NUMBER,
-            float(number_buffer) if decimal_points_count > 0 else int(number_buffer),
+            float(number_buffer) if has_float_point else int(number_buffer),
+            start,
+            self.position,
         )
-        log.info(f"The number generated was: {number_token.value}")
+        if self._debug:
+            log.debug("The number generated was: %s", number_token.value)
 
         return number_token
 
@@ -131,19 +288,12 @@ class Lexer:
         Returns:
             Token: Minimal information of Lexer
         """
-        name_buffer: str | None = self.current_character
-
-        if name_buffer is None:
+        if self.current_character is None:
             raise RuntimeError("It was passed a None object to generate_number().")
 
-        self.next_character()
-        # while character is not None and is a letter or a digit
-        while self.current_character is not None and (
-            self.current_character in Alphabet.LETTERS
-            or self.current_character in Alphabet.DIGITS
-        ):
-            name_buffer += self.current_character
-            self.next_character()
+        start: int = self.position
+        self.token_start = start
+        name_buffer: str = self._match(self._name)
 
         # if float point appear
         if (
@@ -154,98 +304,47 @@ class Lexer:
                 f"Variable names can't have a '{self.current_character}'."
             )
 
-        if name_buffer in Operations.get_named_operations():
-            match name_buffer:
-                case Operations.LOG:
-                    log.info("The operation generated was: 'LOG'")
-                    return Token(TokenType.LOG)
-
-                case Operations.SQRT:
-                    log.info("The operation genereted was: 'SQRT'")
-                    return Token(TokenType.SQRT)
+        operation: TokenType | None = _NAMED_OPERATIONS.get(name_buffer)
+        if operation is not None:
+            if self._debug:
+                log.debug("The operation generated was: '%s'", operation.name)
+            return Token(operation, None, start, self.position)
 
-                case Operations.COS:
-                    log.info("The operation generated was: 'COS'")
-                    return Token(TokenType.COS)
-
-                case Operations.SIN:
-                    log.info("The operation generated was: 'SIN'")
-                    return Token(TokenType.SIN)
-
-                case Operations.EXP:
-                    log.info("The operation generated was: 'EXP'")
-                    return Token(TokenType.EXP)
-
-        token: Token = Token(TokenType.VARIABLE, name_buffer)
-        log.info(f"The variable generated is: {token.value}")
+        token: Token = Token(TokenType.VARIABLE, name_buffer, start, self.position)
+        if self._debug:
+            log.debug("The variable generated is: %s", token.value)
         return token
 
-    def generate_tokens(self) -> Generator:
+    def generate_tokens(self) -> Generator[Token, None, None]:
         """
         Generator to tokens
 
+        Tokens are produced one at a time, so the Parser can consume them
+        while the text is being scanned.
+
         Returns:
             Generator: Generator of Tokens
         """
-        while self.current_character is not None:
-            if self.current_character in Alphabet.WHITESPACE:  # type: ignore
-                log.debug("The current character is Blank Space")
+        while (character := self.current_character) is not None:
+            if character in _WHITESPACE_CHARACTERS:
+                self._match(self._whitespace)
+
+            elif character in _LETTER_CHARACTERS:
+                yield self.generate_variable()
+
+            elif character in _NUMBER_CHARACTERS:
+                yield self.generate_number()
+
+            elif character in _SYMBOLS:
+                token_type, message = _SYMBOLS[character]
+                if self._debug:
+                    log.debug(message, character)
+                start: int = self.position
                 self.next_character()
-                continue
-
-            elif self.current_character in Alphabet:  # type: ignore
-                if self.current_character in Alphabet.LETTERS:
-                    yield self.generate_variable()
-                else:
-                    yield self.generate_number()
-
-            elif self.current_character in Operations:
-                match self.current_character:
-                    case Operations.LEFT_PARENTHESES:
-                        log.info(
-                            f"The symbol generated was: '{Operations.LEFT_PARENTHESES}'"
-                        )
-                        self.next_character()
-                        yield Token(TokenType.LEFT_PARENTHESES)
-
-                    case Operations.RIGHT_PARENTHESES:
-                        log.info(
-                            f"The symbol generated was: '{Operations.RIGHT_PARENTHESES}'"
-                        )
-                        self.next_character()
-                        yield Token(TokenType.RIGHT_PARENTHESES)
-
-                    case Operations.EQUAL:
-                        log.info(f"The operation generated was: {Operations.EQUAL}")
-                        self.next_character()
-                        yield Token(TokenType.EQUAL)
-
-                    case Operations.PLUS:
-                        log.info(f"The operation generated was: {Operations.PLUS}")
-                        self.next_character()
-                        yield Token(TokenType.PLUS)
-
-                    case Operations.MINUS:
-                        log.info(f"The operation generated was: {Operations.MINUS}")
-                        self.next_character()
-                        yield Token(TokenType.MINUS)
-
-                    case Operations.MULTIPLY:
-                        log.info(f"The operation generated was: {Operations.MULTIPLY}")
-                        self.next_character()
-                        yield Token(TokenType.MULTIPLY)
-
-                    case Operations.DIVIDE:
-                        log.info(f"The operation generated was: {Operations.DIVIDE}")
-                        self.next_character()
-                        yield Token(TokenType.DIVIDE)
-
-                    case Operations.POWER:
-                        log.info(f"The operation generated was: {Operations.POWER}")
-                        self.next_character()
-                        yield Token(TokenType.POWER)
+                yield Token(token_type, None, start, self.position)
 
             else:
+                self.token_start = self.position
                 raise InvalidCharacterInLexerError(
-                    f"Illegal character: '{self.current_character}'."
+                    f"Illegal character: '{self._illegal_character()}'."
                 )
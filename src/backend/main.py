@@ -1,18 +1,66 @@
-from src.backend.lexer.lexer import Lexer
-from src.backend.parser.arithmetic_parser import Parser
-from src.backend.parser.nodes import Node
+from src.backend.interpreter.history import History
 from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.evaluator import parse_expression
+from src.backend.interpreter.numeric import NumericMode, parse_mode
+from src.backend.interpreter.persistence import VariableStore
+from src.backend.interpreter.profiler import ProfilingInterpreter
+from src.backend.interpreter.tiers import TieredExecution
+from src.backend.interpreter.values import Number
+from src.backend.parser.cache import ParseCache
+from src.backend.parser.incremental import Document, Edit
+from src.backend.parser.nodes import (
+    AssignmentNode,
+    FunctionDefinitionNode,
+    Node,
+    iter_nodes,
+)
+from src.backend.parser.validation import Diagnostic, validate_expression
+from src.backend.server.admission import AdmissionController, Lane, Rejected
+from src.backend.server.columnar import (
+    FLOAT64_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    BufferResponse,
+    ColumnarResults,
+    evaluate_columns,
+    negotiate,
+)
+from src.backend.server.documents import DocumentStore
+from src.backend.server.fast_json import encode_interpreter_response, read_expression
+from src.backend.server.plotting import MAX_PIXELS, Curve, Samples, envelope, sample
+from src.backend.server.result_cache import (
+    CachedAnswer,
+    ResultCache,
+    etag_matches,
+    is_constant,
+    make_etag,
+)
+from src.backend.server.settings import Settings
+from src.backend.server.streaming import (
+    DuplexStreamingResponse,
+    LineTooLong,
+    iter_lines,
+)
+from src.backend.server.warmup import Warmup
+from src.backend.utils.profiling import AllocationProfiler
 
-from typing import Generator
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Annotated, Any, AsyncIterator, Callable, Literal
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response, WebSocket
+from fastapi import WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+from pydantic import AfterValidator, BaseModel, ValidationError
 
+import asyncio
+import json
 import logging
+import math
 import os
 
-LOG_FILENAME: str = "app.log"
-
 
 def active_log(level, log_filename: str) -> None:
     """
@@ -34,28 +82,36 @@ def active_log(level, log_filename: str) -> None:
     )
 
 
-active_log(logging.INFO, LOG_FILENAME)
-
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# messages a WebSocket session accepts ahead of the one being evaluated
+SESSION_QUEUE_SIZE: int = 256
 
+router = APIRouter()
 
-# cors to allow access
-origins: list[str] = [
-    "http://127.0.0.1:8080",
-    "http://localhost:8080",
-    "http://127.0.0.1:3000",
-    "http://localhost:3000",
-]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def check_numeric_mode(name: str | None) -> str | None:
+    """
+    Reject names that aren't a numeric mode.
+
+    Args:
+        name (str | None): The name sent by the client, if any.
+
+    Returns:
+        str | None: The same name.
+
+    Raises:
+        ValueError: If the name isn't a known numeric mode.
+    """
+    if name is not None:
+        parse_mode(name)
+    return name
+
+
+NumericModeName = Annotated[str | None, AfterValidator(check_numeric_mode)]
+
+# formats of the node profile asked with the "debug" query parameter
+ProfileFormat = Literal["tree", "collapsed"]
 
 
 # Request Model
@@ -65,9 +121,12 @@ class ExpressionRequest(BaseModel):
 
     Attributes:
         expression (str): The arithmetic expression to be evaluated.
+        numeric_mode (str | None): "exact", "float64" or "decimal:N", the server
+            default if None.
     """
 
     expression: str
+    numeric_mode: NumericModeName = None
 
 
 class InterpreterResponse(BaseModel):
@@ -87,6 +146,125 @@ class InterpreterResponse(BaseModel):
     error: str | None = None
 
 
+class BatchRequest(BaseModel):
+    """
+    Request model to evaluate many expressions at once.
+
+    Attributes:
+        expressions (list[str]): The expressions, evaluated in order.
+        mode (Literal["stateful", "stateless", "shared"]): "stateful" shares variables
+            across the expressions of the batch, "stateless" evaluates every expression
+            on its own, "shared" evaluates them on the server interpreter, like
+            sending them one at a time to `/expressions`.
+        numeric_mode (str | None): "exact", "float64" or "decimal:N", the server
+            default if None.
+    """
+
+    expressions: list[str]
+    mode: Literal["stateful", "stateless", "shared"] = "stateful"
+    numeric_mode: NumericModeName = None
+
+
+class PlotRequest(BaseModel):
+    """
+    Request model to sample an expression of one variable for a plot.
+
+    Attributes:
+        expression (str): The expression, which may read other variables but not assign them.
+        variable (str): Name of the variable bound to each sampled value.
+        start (float): First value of the variable.
+        end (float): Last value of the variable, greater than `start`.
+        pixels (int): Width of the plot in pixel columns, the finest sampling step.
+        envelope (bool): Answer with the min and max of every pixel column instead of points.
+        numeric_mode (str | None): "exact", "float64" or "decimal:N", the server
+            default if None.
+    """
+
+    expression: str
+    variable: str = "x"
+    start: float
+    end: float
+    pixels: int = 800
+    envelope: bool = False
+    numeric_mode: NumericModeName = None
+
+
+class ValidationResponse(BaseModel):
+    """
+    Response model for the syntax check of an expression.
+
+    Attributes:
+        expression (str): The original expression sent by the user.
+        valid (bool): Whether the expression can be lexed and parsed.
+        diagnostics (list[Diagnostic]): Problems found, with their character offsets.
+    """
+
+    expression: str
+    valid: bool
+    diagnostics: list[Diagnostic]
+
+
+class DocumentRequest(BaseModel):
+    """
+    Request model to open a document for incremental editing.
+
+    Attributes:
+        text (str): Initial text of the document.
+    """
+
+    text: str = ""
+
+
+class DocumentEditRequest(BaseModel):
+    """
+    Request model with the edits of a document.
+
+    Attributes:
+        edits (list[Edit]): Replacements (offset, deleted, inserted), applied in order.
+        version (int | None): Version the edits were made against, checked if given.
+    """
+
+    edits: list[Edit]
+    version: int | None = None
+
+
+class DocumentResponse(BaseModel):
+    """
+    Response model with the syntax state of a document.
+
+    Attributes:
+        id (str): Identifier of the document.
+        version (int): Number of edits applied to the document.
+        length (int): Length of the text.
+        valid (bool): Whether the text can be lexed and parsed.
+        diagnostics (list[Diagnostic]): Problems found, with their character offsets.
+        relexed_tokens (int): Tokens lexed again by the last request.
+        text (str | None): The text, only when it is requested.
+    """
+
+    id: str
+    version: int
+    length: int
+    valid: bool
+    diagnostics: list[Diagnostic]
+    relexed_tokens: int
+    text: str | None = None
+
+
+def document_response(
+    document_id: str, document: Document, with_text: bool = False
+) -> DocumentResponse:
+    return DocumentResponse(
+        id=document_id,
+        version=document.version,
+        length=len(document.text),
+        valid=document.valid,
+        diagnostics=document.diagnostics,
+        relexed_tokens=document.relexed,
+        text=document.text if with_text else None,
+    )
+
+
 class HTTPResponse(BaseModel):
     """
     HTTP response model for status messages.
@@ -100,11 +278,201 @@ class HTTPResponse(BaseModel):
     status: int
 
 
-global interpreter
-interpreter = Interpreter()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Startup hook: wire up logging and the interpreter state, undo it on shutdown.
+
+    Args:
+        app (FastAPI): The application being started.
+    """
+    settings: Settings = app.state.settings
+
+    # keep the traffic of the previous run, which active_log would delete
+    history: str | None = settings.warmup_history
+    if history is None and settings.warmup_top > 0:
+        if os.path.exists(settings.log_filename):
+            history = f"{settings.log_filename}.previous"
+            os.replace(settings.log_filename, history)
+
+    active_log(settings.log_level, settings.log_filename)
+
+    app.state.numeric_mode = parse_mode(settings.numeric_mode)
+    # sessions, batches and streams get interpreters configured like the main one
+    app.state.new_interpreter = partial(
+        Interpreter,
+        mode=app.state.numeric_mode,
+        memo_size=settings.function_memo_size,
+        history_size=settings.history_size,
+    )
+    app.state.interpreter = app.state.new_interpreter()
+    app.state.allocation_profiler = AllocationProfiler(
+        enabled=settings.allocation_profiling
+    )
+    app.state.admission = (
+        AdmissionController(
+            max_concurrency=settings.max_concurrency,
+            max_queue=settings.max_queue,
+            queue_timeout=settings.queue_timeout,
+            expensive_concurrency=settings.expensive_concurrency,
+            cost_threshold=settings.cost_threshold,
+            rate=settings.rate_limit,
+            burst=settings.rate_burst,
+        )
+        if settings.admission_control
+        else None
+    )
+
+    app.state.documents = DocumentStore(settings.max_documents)
+    app.state.result_cache = (
+        ResultCache(settings.result_cache_size)
+        if settings.result_cache_size > 0
+        else None
+    )
+    app.state.parse_cache = (
+        ParseCache(settings.parse_cache_size) if settings.parse_cache_size > 0 else None
+    )
+    app.state.tiers = (
+        TieredExecution(settings.tier_threshold, settings.tier_capacity)
+        if settings.tier_threshold > 0
+        else None
+    )
+    app.state.warmup = None
+    warming: asyncio.Task | None = None
+    if app.state.parse_cache is not None and settings.warmup_top > 0 and history:
+        # runs in the background, the server answers while the cache fills
+        app.state.warmup = Warmup(history, settings.warmup_top)
+        warming = asyncio.create_task(
+            run_in_threadpool(
+                app.state.warmup.run,
+                app.state.parse_cache,
+                preheat(app.state.tiers, app.state.numeric_mode),
+            )
+        )
+
+    store: VariableStore | None = None
+    saver: asyncio.Task | None = None
+    if settings.snapshot_path:
+        store = VariableStore(
+            settings.snapshot_path,
+            journal=settings.snapshot_journal,
+            sync=settings.snapshot_journal_sync,
+        )
+        store.restore(app.state.interpreter.environment)
+        if settings.snapshot_interval > 0:
+            saver = asyncio.create_task(
+                save_periodically(
+                    store, app.state.interpreter, settings.snapshot_interval
+                )
+            )
+
+    yield
+
+    if warming is not None:
+        warming.cancel()
+
+    if app.state.tiers is not None:
+        app.state.tiers.close()
+
+    if saver is not None:
+        saver.cancel()
+        try:
+            await saver
+        except asyncio.CancelledError:
+            pass
+
+    if store is not None:
+        store.save(app.state.interpreter.environment)
+        store.close()
+
+    if app.state.allocation_profiler.enabled:
+        app.state.allocation_profiler.stop()
+
+
+def preheat(
+    tiers: TieredExecution | None, mode: NumericMode
+) -> Callable[[Node, int], None] | None:
+    """
+    Hook of the warm-up that compiles the expressions that were hot in the previous run.
+
+    Args:
+        tiers (TieredExecution | None): Execution manager, None if tiering is disabled.
+        mode (NumericMode): Default numeric mode, the one past evaluations are assumed in.
+
+    Returns:
+        Callable[[Node, int], None] | None: The hook, None if tiering is disabled.
+    """
+    if tiers is None:
+        return None
+    return lambda tree, count: tiers.preheat(tree, count, mode)
+
+
+async def save_periodically(
+    store: VariableStore, interpreter: Interpreter, interval: float
+) -> None:
+    """
+    Snapshot the variables of the interpreter every `interval` seconds, if they changed.
+
+    Args:
+        store (VariableStore): Where the variables are persisted.
+        interpreter (Interpreter): Interpreter whose variables are saved.
+        interval (float): Seconds between snapshots.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(store.save, interpreter.environment)
+        except OSError as error:
+            logger.error(f"Failed to save the variables snapshot: {error}")
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Create the web application.
+
+    Nothing is configured when the module is imported: logging and the
+    interpreter state are set up by the startup hook.
+
+    Args:
+        settings (Settings | None): Server configuration, read from the environment if None.
+
+    Returns:
+        FastAPI: The configured application.
+    """
+    app: FastAPI = FastAPI(lifespan=lifespan)
+    app.state.settings = settings or Settings.from_env()
+
+    # cors to allow access
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=app.state.settings.origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if app.state.settings.fast_serialization:
+        # matched before the router, which still handles unusual bodies
+        standard: APIRoute = next(
+            route
+            for route in router.routes
+            if isinstance(route, APIRoute)
+            and route.path == "/expressions"
+            and "POST" in route.methods
+        )
+        app.state.expressions_handler = standard.get_route_handler()
+        app.add_route(
+            "/expressions",
+            calculate_expression_fast,
+            methods=["POST"],
+            include_in_schema=False,
+        )
+
+    app.include_router(router)
+    return app
 
 
-@app.get("/")
+@router.get("/")
 async def root() -> HTTPResponse:
     """
     Root endpoint of the API.
@@ -118,111 +486,1277 @@ async def root() -> HTTPResponse:
     )
 
 
-@app.post("/expressions")
-async def calculate_expression(req: ExpressionRequest) -> InterpreterResponse:
+def interpret_fields(
+    expression: str,
+    interpreter: Interpreter,
+    allocation_profiler: AllocationProfiler | None = None,
+    parse_cache: ParseCache | None = None,
+    mode: NumericMode | None = None,
+    tiers: TieredExecution | None = None,
+    record: bool = True,
+) -> tuple[str | None, str | None, str | None, Number | None]:
     """
-    Parse, evaluate, and interpret an arithmetic expression.
+    Parse and evaluate an arithmetic expression, turning errors into the response fields.
 
     Args:
-        req (ExpressionRequest): The request body containing the expression.
+        expression (str): The arithmetic expression to be evaluated.
+        interpreter (Interpreter): Interpreter that holds the variables.
+        allocation_profiler (AllocationProfiler | None): Profiler to measure the evaluation, if enabled.
+        parse_cache (ParseCache | None): Cache of syntax trees, skipped when profiling.
+        mode (NumericMode | None): Numeric mode, the default one of the interpreter if None.
+        tiers (TieredExecution | None): Execution manager compiling hot trees, if any.
+        record (bool): Whether to add the result to the history of the interpreter.
+
     Returns:
-        InterpreterResponse: Result of the evaluated expression, or error details.
+        tuple[str | None, str | None, str | None, Number | None]: The result,
+        type_error and error of the InterpreterResponse, and the result if it is
+        constant: always the same whatever the variables are.
     """
+    constant: bool = False
     try:
-        lexer: Lexer = Lexer(req.expression)
-        tokens: Generator = lexer.generate_tokens()
-        parser: Parser = Parser(list(tokens))
-        expression: Node | None = parser.parse()
-
-        if expression is None:
-            return InterpreterResponse(
-                expression=req.expression, result="", type_error="None", error="None"
+        if allocation_profiler is not None and allocation_profiler.enabled:
+            result: Number | None = allocation_profiler.evaluate(
+                expression, interpreter, mode, record
             )
 
         else:
-            result = interpreter.visit(expression)
+            tree: Node | None = (
+                parse_cache.parse(expression)
+                if parse_cache is not None
+                else parse_expression(expression)
+            )
+            constant = tree is not None and is_constant(tree)
+            if tree is None:
+                result = None
+            elif tiers is not None:
+                result = tiers.evaluate(interpreter, tree, mode, record)
+            else:
+                result = interpreter.evaluate(tree, mode, record)
 
-        logger.info(f"Expression: {req.expression} = {result}")
-        return InterpreterResponse(
-            expression=req.expression,
-            result=str(result),
-        )
+        if result is None:
+            return "", "None", "None", None
+
+        text: str = str(result)
+        logger.info(f"Expression: {expression} = {text}")
+        return text, None, None, result if constant else None
 
     except Exception as error:
-        logger.error(f"Error in expression '{req.expression}': {error}")
-        return InterpreterResponse(
-            expression=req.expression,
-            type_error=type(error).__name__,
-            error=str(error),
-        )
+        logger.error(f"Error in expression '{expression}': {error}")
+        return None, type(error).__name__, str(error), None
 
 
-@app.post("/interpreter/reset")
-async def reset_interpreter() -> HTTPResponse:
+def interpret(
+    expression: str,
+    interpreter: Interpreter,
+    allocation_profiler: AllocationProfiler | None = None,
+    parse_cache: ParseCache | None = None,
+    mode: NumericMode | None = None,
+    tiers: TieredExecution | None = None,
+) -> InterpreterResponse:
     """
-    Reset the interpreter instance and clear stored variables.
+    Parse, evaluate, and interpret an arithmetic expression, turning errors into the response.
+
+    Args:
+        expression (str): The arithmetic expression to be evaluated.
+        interpreter (Interpreter): Interpreter that holds the variables.
+        allocation_profiler (AllocationProfiler | None): Profiler to measure the evaluation, if enabled.
+        parse_cache (ParseCache | None): Cache of syntax trees, skipped when profiling.
+        mode (NumericMode | None): Numeric mode, the default one of the interpreter if None.
+        tiers (TieredExecution | None): Execution manager compiling hot trees, if any.
 
     Returns:
-        HTTPResponse: confirmation message and status code.
+        InterpreterResponse: Result of the evaluated expression, or error details.
+    """
+    result, type_error, error, _ = interpret_fields(
+        expression, interpreter, allocation_profiler, parse_cache, mode, tiers
+    )
+    return InterpreterResponse(
+        expression=expression, result=result, type_error=type_error, error=error
+    )
+
+
+def rejection_error(rejection: Rejected) -> HTTPException:
+    """
+    HTTP error answering a request refused by the admission control.
+
+    Args:
+        rejection (Rejected): The rejection.
+
+    Returns:
+        HTTPException: 429 or 503 error telling the client when to retry.
+    """
+    return HTTPException(
+        status_code=rejection.status,
+        detail=(
+            "Too many requests from this client"
+            if rejection.status == 429
+            else "The server is overloaded, try again later"
+        ),
+        headers={
+            "Retry-After": str(rejection.retry_after),
+            "X-Error-Type": "RateLimited" if rejection.status == 429 else "Overloaded",
+            "X-Rejection-Reason": rejection.reason,
+        },
+    )
+
+
+def client_of(request: HTTPConnection) -> str:
+    """
+    Identifier of the client of a request, for rate limiting.
+    """
+    return request.client.host if request.client else "unknown"
+
+
+async def run_admitted(
+    request: HTTPConnection,
+    expression: str,
+    function: Callable,
+    *arguments: Any,
+    offload: bool = False,
+    lane: Lane | None = None,
+    patient: bool = False,
+) -> Any:
+    """
+    Call an evaluation through the admission control, in a worker thread once admitted.
+
+    Args:
+        request (HTTPConnection): The incoming request or WebSocket, used to reach
+            the app state.
+        expression (str): Text the cost of the evaluation is estimated from.
+        function (Callable): The evaluation.
+        *arguments (Any): Arguments of the evaluation.
+        offload (bool): Whether to use a worker thread without admission control too.
+        lane (Lane | None): Admission lane, estimated from `expression` if None.
+        patient (bool): Whether to wait for a slot without being rejected, for the
+            parts of a request already admitted.
+
+    Returns:
+        Any: What the evaluation returned.
 
     Raises:
-        HTTPException: If the interpreter cannot be restarted.
+        HTTPException: If the admission control rejects the request.
     """
+    admission: AdmissionController | None = request.app.state.admission
+    if admission is None:
+        if offload:
+            return await run_in_threadpool(function, *arguments)
+        return function(*arguments)
+
     try:
-        global interpreter
-        interpreter = Interpreter()
-        logger.info("Interpreter was restarted.")
-        return HTTPResponse(
-            message="The interpreter was restarted",
-            status=200,
-        )
+        async with admission.admit(expression, client_of(request), lane, patient):
+            return await run_in_threadpool(function, *arguments)
 
-    except Exception as error:
-        logger.error(f"Error to restart interpreter: {error}")
-        raise HTTPException(
-            status_code=500,
-            detail="Internal error when restarting the interpreter",
-            headers={"X-Error-Type": "ResetError"},
-        )
+    except Rejected as rejection:
+        raise rejection_error(rejection)
 
 
-@app.get("/logs")
-async def get_logs() -> dict:
+def resolve_mode(request: Request, name: str | None) -> NumericMode:
     """
-    Get the contents of the log file.
+    Numeric mode asked by a request, or the default one of the server.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+        name (str | None): Name of the mode, if the request chose one.
 
     Returns:
-        dict: Log lines and status code.
+        NumericMode: The mode.
 
     Raises:
-        HTTPException: If the log file is not found or an unexpected error occurs.
+        HTTPException: If the mode is unknown.
     """
-    try:
-        with open("app.log", "r") as f:
-            logs: list[str] = f.read().splitlines()
-            return {"logs": logs, "status": 200}
+    if not name:
+        return request.app.state.numeric_mode
 
-    except FileNotFoundError:
+    try:
+        return parse_mode(name)
+    except ValueError as error:
         raise HTTPException(
-            status_code=404,
-            detail="The log file wasn't found",
-            headers={
-                "X-Error-Type": "FileNotFound",
-                "X-File-Name": "app.log",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "X-Retry-After": "30",
-            },
+            status_code=422,
+            detail=str(error),
+            headers={"X-Error-Type": "InvalidNumericMode"},
         )
 
-    except Exception as error:
-        logger.error(f"Unexpected error: {error}")
 
-        raise HTTPException(
-            status_code=500,
-            detail="An unexpected error occurred while reading the log file",
-            headers={
-                "X-Error-Type": "InternalServerError",
-                "X-Error-Code": "UNEXPECTED_ERROR",
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-            },
+def profile_fields(
+    expression: str,
+    interpreter: Interpreter,
+    parse_cache: ParseCache | None,
+    mode: NumericMode,
+    output: ProfileFormat,
+    record: bool = True,
+) -> dict[str, Any]:
+    """
+    Parse and evaluate an arithmetic expression, profiling every node of the evaluation.
+
+    The tree is walked by a ProfilingInterpreter over the state of the
+    interpreter, never compiled, so the profile matches the syntax tree.
+
+    Args:
+        expression (str): The arithmetic expression to be evaluated.
+        interpreter (Interpreter): Interpreter that holds the variables.
+        parse_cache (ParseCache | None): Cache of syntax trees.
+        mode (NumericMode): Numeric mode of the evaluation.
+        output (ProfileFormat): "tree" for the annotated syntax tree, "collapsed"
+            for flame graph stacks weighted by exclusive nanoseconds.
+        record (bool): Whether to add the result to the history of the interpreter.
+
+    Returns:
+        dict[str, Any]: The InterpreterResponse fields and the profile, None
+        if the expression wasn't evaluated.
+    """
+    profiler: ProfilingInterpreter = ProfilingInterpreter(interpreter)
+    result, type_error, error, _ = interpret_fields(
+        expression, profiler, None, parse_cache, mode, None, record
+    )
+
+    roots: list = list(profiler.profile.children.values())
+    profile: Any = None
+    if roots and output == "tree":
+        profile = roots[0].as_dict()
+    elif roots:
+        profile = "\n".join(line for root in roots for line in root.collapsed())
+
+    return {
+        "expression": expression,
+        "result": result,
+        "type_error": type_error,
+        "error": error,
+        "profile": profile,
+    }
+
+
+async def answer_expression(
+    request: Request,
+    expression: str,
+    numeric_mode: str | None = None,
+    record: bool = True,
+    debug: ProfileFormat | None = None,
+) -> Response:
+    """
+    Evaluate an expression of `/expressions`, answering constant ones from the result cache.
+
+    Constant answers carry an ETag and may be kept by clients and proxies;
+    a matching If-None-Match gets a 304 without the body. Other answers
+    are marked as not storable. Answers sent from the result cache are
+    recorded in the history and logged too, like evaluated ones.
+
+    With `debug`, the expression is always evaluated, by the tree-walking
+    interpreter, and the answer carries the profile of its nodes.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+        expression (str): The arithmetic expression to be evaluated.
+        numeric_mode (str | None): Name of the numeric mode, the server default if None.
+        record (bool): Whether to add the result to the history of the interpreter.
+        debug (ProfileFormat | None): Format of the profile, None to not profile.
+
+    Returns:
+        Response: JSON InterpreterResponse, or an empty 304 response.
+
+    Raises:
+        HTTPException: If the numeric mode is unknown or the admission control
+            rejects the request.
+    """
+    mode: NumericMode = resolve_mode(request, numeric_mode)
+    if debug is not None:
+        fields: dict[str, Any] = await run_admitted(
+            request,
+            expression,
+            profile_fields,
+            expression,
+            request.app.state.interpreter,
+            request.app.state.parse_cache,
+            mode,
+            debug,
+            record,
+        )
+        return JSONResponse(fields, headers={"Cache-Control": "no-store"})
+
+    result_cache: ResultCache | None = request.app.state.result_cache
+    answer: CachedAnswer | None = (
+        result_cache.get(mode.name, expression) if result_cache is not None else None
+    )
+
+    if answer is None:
+        result, type_error, error, constant = await run_admitted(
+            request,
+            expression,
+            interpret_fields,
+            expression,
+            request.app.state.interpreter,
+            request.app.state.allocation_profiler,
+            request.app.state.parse_cache,
+            mode,
+            request.app.state.tiers,
+            record,
+        )
+        body: bytes = encode_interpreter_response(expression, result, type_error, error)
+        if constant is None:
+            return Response(
+                body,
+                media_type="application/json",
+                headers={"Cache-Control": "no-store"},
+            )
+
+        answer = (
+            result_cache.put(mode.name, expression, body, constant)
+            if result_cache is not None
+            else CachedAnswer(body, make_etag(body), constant)
         )
+
+    elif answer.value is not None:
+        # logged like an evaluation, so the warmup of the next run counts hits too
+        logger.info(f"Expression: {expression} = {answer.value}")
+        if record:
+            request.app.state.interpreter.history.record(answer.value)
+
+    headers: dict[str, str] = {
+        "ETag": answer.etag,
+        "Cache-Control": f"public, max-age={request.app.state.settings.result_max_age}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), answer.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(answer.body, media_type="application/json", headers=headers)
+
+
+@router.post("/expressions", response_model=InterpreterResponse)
+async def calculate_expression(
+    req: ExpressionRequest, request: Request, debug: ProfileFormat | None = None
+) -> Response:
+    """
+    Parse, evaluate, and interpret an arithmetic expression.
+
+    The numbers follow the numeric mode of the request, or the default one
+    of the server. With admission control, the evaluation waits for a slot and runs in a
+    worker thread, keeping the event loop free to answer other requests.
+    Expressions without variables are answered from the result cache.
+
+    With `?debug=tree` or `?debug=collapsed`, the answer has a "profile" too:
+    visits, inclusive and exclusive nanoseconds and biggest integer size of
+    every node, as an annotated tree or as flame graph collapsed stacks.
+
+    Args:
+        req (ExpressionRequest): The request body containing the expression.
+        request (Request): The incoming request, used to reach the app state.
+        debug (ProfileFormat | None): Format of the profile, None to not profile.
+    Returns:
+        Response: JSON InterpreterResponse, with result or error details.
+
+    Raises:
+        HTTPException: If the admission control rejects the request.
+    """
+    return await answer_expression(
+        request, req.expression, req.numeric_mode, debug=debug
+    )
+
+
+def changes_interpreter(tree: Node) -> bool:
+    """
+    Whether evaluating a syntax tree assigns variables or defines functions.
+
+    Args:
+        tree (Node): The syntax tree.
+
+    Returns:
+        bool: True if the tree has an assignment or a function definition.
+    """
+    return any(
+        isinstance(node, (AssignmentNode, FunctionDefinitionNode))
+        for node in iter_nodes(tree)
+    )
+
+
+@router.get("/expressions", response_model=InterpreterResponse)
+async def read_expression_value(
+    request: Request,
+    expression: str,
+    numeric_mode: str | None = None,
+    debug: ProfileFormat | None = None,
+) -> Response:
+    """
+    Evaluate an expression given in the query string, without assigning anything.
+
+    The result isn't recorded in the history, but `ans` and `_N` may be read.
+
+    Being a GET, answers of constant expressions may be kept by any HTTP
+    cache and revalidated with their ETag.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+        expression (str): The arithmetic expression to be evaluated.
+        numeric_mode (str | None): "exact", "float64" or "decimal:N", the server
+            default if None.
+        debug (ProfileFormat | None): Format of the node profile, like for POST.
+
+    Returns:
+        Response: JSON InterpreterResponse, or an empty 304 response.
+
+    Raises:
+        HTTPException: If the expression assigns a variable or defines a function,
+            the numeric mode is unknown or the admission control rejects the request.
+    """
+    parse_cache: ParseCache | None = request.app.state.parse_cache
+    try:
+        tree: Node | None = (
+            parse_cache.parse(expression)
+            if parse_cache is not None
+            else parse_expression(expression)
+        )
+    except Exception:
+        # the evaluation answers with the syntax error
+        tree = None
+
+    if tree is not None and changes_interpreter(tree):
+        raise HTTPException(
+            status_code=400,
+            detail="Assignments and function definitions change the interpreter, "
+            "send them with POST",
+            headers={"X-Error-Type": "AssignmentNotAllowed"},
+        )
+
+    return await answer_expression(
+        request, expression, numeric_mode, record=False, debug=debug
+    )
+
+
+async def calculate_expression_fast(request: Request) -> Response:
+    """
+    Lean variant of `calculate_expression`, answering with the same bytes.
+
+    Plain `{"expression": "..."}` JSON bodies skip the pydantic request
+    model. Any other body goes through the standard route, so validation
+    errors are unchanged.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        Response: JSON InterpreterResponse.
+
+    Raises:
+        HTTPException: If the admission control rejects the request.
+    """
+    expression: str | None = await read_expression(request)
+    if expression is None or "debug" in request.query_params:
+        return await request.app.state.expressions_handler(request)
+
+    return await answer_expression(request, expression)
+
+
+@router.post("/expressions/validate")
+async def validate(req: ExpressionRequest, request: Request) -> ValidationResponse:
+    """
+    Check the syntax of an expression without evaluating it.
+
+    Only the Lexer and the Parser run: no variable is read or assigned and
+    no power is computed, so editors can call it on every keystroke.
+
+    Args:
+        req (ExpressionRequest): The request body containing the expression.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        ValidationResponse: Whether the expression is valid, and where it isn't.
+    """
+    diagnostics: list[Diagnostic] = validate_expression(
+        req.expression, request.app.state.parse_cache
+    )
+    return ValidationResponse(
+        expression=req.expression, valid=not diagnostics, diagnostics=diagnostics
+    )
+
+
+@router.post("/expressions/plot")
+async def plot_expression(req: PlotRequest, request: Request) -> JSONResponse:
+    """
+    Sample an expression of one variable over a range, for a plot, in one request.
+
+    The expression is parsed once and sampled adaptively: finely where the
+    curve bends or leaves its domain, down to one point per pixel column,
+    and sparsely where it is straight. The answer holds either the points,
+    as "x" and "y" lists where a null y breaks the line, or with `envelope`
+    the "min" and "max" of the curve in every pixel column, null where it
+    is undefined. "evaluations" counts the points evaluated, and "error" is
+    the first evaluation error, if any.
+
+    Args:
+        req (PlotRequest): The expression, variable, range and plot width.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        JSONResponse: The samples or the envelope.
+
+    Raises:
+        HTTPException: If the range or width is invalid, the expression can't be
+            parsed or changes the interpreter, or the admission control rejects it.
+    """
+    if not (math.isfinite(req.start) and math.isfinite(req.end) and req.start < req.end):
+        raise HTTPException(
+            status_code=422,
+            detail="The range must be finite, with start before end",
+            headers={"X-Error-Type": "InvalidPlotRange"},
+        )
+    if not 1 <= req.pixels <= MAX_PIXELS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A plot must be between 1 and {MAX_PIXELS} pixels wide",
+            headers={"X-Error-Type": "InvalidPlotRange"},
+        )
+
+    mode: NumericMode = resolve_mode(request, req.numeric_mode)
+    parse_cache: ParseCache | None = request.app.state.parse_cache
+    try:
+        tree: Node | None = (
+            parse_cache.parse(req.expression)
+            if parse_cache is not None
+            else parse_expression(req.expression)
+        )
+    except Exception as error:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{type(error).__name__}: {error}",
+            headers={"X-Error-Type": "InvalidExpression"},
+        )
+
+    if tree is None:
+        raise HTTPException(
+            status_code=400,
+            detail="The expression is empty",
+            headers={"X-Error-Type": "InvalidExpression"},
+        )
+    if changes_interpreter(tree):
+        raise HTTPException(
+            status_code=400,
+            detail="Plotted expressions can't assign variables or define functions",
+            headers={"X-Error-Type": "AssignmentNotAllowed"},
+        )
+
+    def evaluate() -> JSONResponse:
+        curve: Curve = Curve(tree, req.variable, request.app.state.interpreter, mode)
+        samples: Samples = sample(curve, req.start, req.end, req.pixels)
+        answer: dict[str, Any] = {
+            "expression": req.expression,
+            "variable": req.variable,
+            "start": req.start,
+            "end": req.end,
+            "pixels": req.pixels,
+            "evaluations": curve.evaluations,
+            "invalid": curve.invalid,
+            "error": curve.error,
+        }
+        if req.envelope:
+            answer["min"], answer["max"] = envelope(
+                samples, req.start, req.end, req.pixels
+            )
+        else:
+            answer["x"], answer["y"] = samples.x, samples.y
+
+        logger.info(f"Plot of {req.expression} with {curve.evaluations} evaluations")
+        return JSONResponse(answer)
+
+    # one plot evaluates the expression up to twice per pixel column
+    return await run_admitted(
+        request, req.expression, evaluate, offload=True, lane="expensive"
+    )
+
+
+def get_document(request: Request, document_id: str) -> Document:
+    try:
+        return request.app.state.documents.get(document_id)
+    except KeyError:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Document not found: '{document_id}'",
+            headers={"X-Error-Type": "DocumentNotFound"},
+        )
+
+
+@router.post("/documents")
+async def open_document(req: DocumentRequest, request: Request) -> DocumentResponse:
+    """
+    Open a document whose syntax is checked incrementally as it is edited.
+
+    Args:
+        req (DocumentRequest): The initial text.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        DocumentResponse: Identifier and syntax state of the document.
+    """
+    document_id, document = request.app.state.documents.create(req.text)
+    return document_response(document_id, document)
+
+
+@router.get("/documents/{document_id}")
+async def read_document(document_id: str, request: Request) -> DocumentResponse:
+    """
+    Get the text and syntax state of a document.
+
+    Args:
+        document_id (str): Identifier of the document.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        DocumentResponse: Syntax state of the document, with its text.
+
+    Raises:
+        HTTPException: If there is no such document.
+    """
+    return document_response(document_id, get_document(request, document_id), True)
+
+
+@router.patch("/documents/{document_id}")
+async def edit_document(
+    document_id: str, req: DocumentEditRequest, request: Request
+) -> DocumentResponse:
+    """
+    Apply edits to a document, lexing and parsing again only what they changed.
+
+    The diagnostics are always the same as validating the whole text.
+
+    Args:
+        document_id (str): Identifier of the document.
+        req (DocumentEditRequest): The edits and the version they were made against.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        DocumentResponse: Syntax state of the edited document.
+
+    Raises:
+        HTTPException: If there is no such document, the version doesn't match
+            or an edit is outside of the text.
+    """
+    document: Document = get_document(request, document_id)
+    if req.version is not None and req.version != document.version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"The document is at version {document.version}, not {req.version}",
+            headers={"X-Error-Type": "VersionConflict"},
+        )
+
+    try:
+        document.apply(req.edits)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=400,
+            detail=str(error),
+            headers={"X-Error-Type": "InvalidEdit"},
+        )
+
+    return document_response(document_id, document)
+
+
+@router.delete("/documents/{document_id}")
+async def close_document(document_id: str, request: Request) -> HTTPResponse:
+    """
+    Forget a document.
+
+    Args:
+        document_id (str): Identifier of the document.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        HTTPResponse: Confirmation message and status code.
+
+    Raises:
+        HTTPException: If there is no such document.
+    """
+    get_document(request, document_id)
+    request.app.state.documents.delete(document_id)
+    return HTTPResponse(message="The document was closed", status=200)
+
+
+def interpret_batch(
+    expressions: list[str],
+    mode: str,
+    parse_cache: ParseCache | None = None,
+    numeric_mode: NumericMode | None = None,
+    tiers: TieredExecution | None = None,
+    new_interpreter: Callable[[], Interpreter] = Interpreter,
+    shared: Interpreter | None = None,
+) -> list[InterpreterResponse]:
+    """
+    Interpret the expressions of a batch, each with its result or error details.
+
+    Args:
+        expressions (list[str]): The expressions, in order.
+        mode (str): "stateful" to share one interpreter, "stateless" for one per expression,
+            "shared" to evaluate them all on `shared`.
+        parse_cache (ParseCache | None): Cache of syntax trees.
+        numeric_mode (NumericMode | None): Numeric mode of every expression, exact if None.
+        tiers (TieredExecution | None): Execution manager compiling hot trees, if any.
+        new_interpreter (Callable[[], Interpreter]): Maker of the empty interpreters.
+        shared (Interpreter | None): Interpreter of the "shared" mode, recording the
+            results in its history.
+
+    Returns:
+        list[InterpreterResponse]: One response per expression.
+    """
+    session: Interpreter = (
+        shared if mode == "shared" and shared is not None else new_interpreter()
+    )
+    return [
+        interpret(
+            expression,
+            session if mode != "stateless" else new_interpreter(),
+            parse_cache=parse_cache,
+            mode=numeric_mode,
+            tiers=tiers,
+        )
+        for expression in expressions
+    ]
+
+
+@router.post("/expressions/batch", response_model=list[InterpreterResponse])
+async def calculate_batch(req: BatchRequest, request: Request) -> Response:
+    """
+    Evaluate many expressions in one request.
+
+    Variables live only during the batch, except in the "shared" mode, where
+    the expressions change the server variables and enter its history in
+    order, as if each was sent to `/expressions`. The answer format is
+    negotiated with the Accept header: a JSON list of InterpreterResponse by default,
+    "application/vnd.interpreter.float64" for a validity bitmap and raw
+    little-endian float64 values, or "application/vnd.apache.arrow.stream"
+    for an Arrow IPC stream when pyarrow is installed. Binary formats carry
+    only the values: failed, empty and non-real results are marked invalid.
+
+    Args:
+        req (BatchRequest): The expressions and how they share variables.
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        Response: The results in the negotiated format.
+
+    Raises:
+        HTTPException: If the batch is too big or the admission control rejects it.
+    """
+    settings: Settings = request.app.state.settings
+    if len(req.expressions) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch may hold at most {settings.max_batch_size} expressions",
+            headers={"X-Error-Type": "BatchTooLarge"},
+        )
+
+    media_type: str = negotiate(request.headers.get("accept"))
+    parse_cache: ParseCache | None = request.app.state.parse_cache
+    numeric_mode: NumericMode = resolve_mode(request, req.numeric_mode)
+    tiers: TieredExecution | None = request.app.state.tiers
+    new_interpreter: Callable[[], Interpreter] = request.app.state.new_interpreter
+
+    def evaluate() -> Response:
+        if media_type == JSON_MEDIA_TYPE:
+            responses: list[InterpreterResponse] = interpret_batch(
+                req.expressions,
+                req.mode,
+                parse_cache,
+                numeric_mode,
+                tiers,
+                new_interpreter,
+                request.app.state.interpreter,
+            )
+            return JSONResponse(
+                [response.model_dump() for response in responses],
+                headers={"Vary": "Accept"},
+            )
+
+        results: ColumnarResults = evaluate_columns(
+            req.expressions,
+            (
+                request.app.state.interpreter
+                if req.mode == "shared"
+                else new_interpreter() if req.mode == "stateful" else None
+            ),
+            parse_cache,
+            numeric_mode,
+            tiers,
+            new_interpreter,
+        )
+        logger.info(
+            f"Batch of {len(results)} expressions, {results.null_count} without result"
+        )
+        return BufferResponse(
+            (
+                results.float64_buffers()
+                if media_type == FLOAT64_MEDIA_TYPE
+                else results.arrow_buffers()
+            ),
+            media_type=media_type,
+            headers={"Vary": "Accept"},
+        )
+
+    # the whole batch is weighed, so big batches take the expensive lane
+    return await run_admitted(
+        request, "\n".join(req.expressions), evaluate, offload=True
+    )
+
+
+@router.post("/expressions/stream")
+async def stream_expressions(
+    request: Request,
+    mode: Literal["stateful", "stateless"] = "stateful",
+    numeric_mode: str | None = None,
+) -> DuplexStreamingResponse:
+    """
+    Evaluate a streamed body of expressions, streaming one result per line back.
+
+    The body is newline-separated text or, with an "application/x-ndjson"
+    content type, one JSON object like {"expression": "..."} (or a JSON string)
+    per line, whose "numeric_mode" overrides the one of the stream. Lines are evaluated as they arrive and every result is an
+    NDJSON line with the fields of InterpreterResponse, so neither side holds
+    the whole file and a slow reader slows down the evaluation.
+
+    The stream counts once against the rate limit of its client. Every line
+    is then evaluated in a worker thread once the admission control has a
+    slot for it, waiting as long as it takes: on a busy server the stream
+    slows down, and the body is read more slowly, but no line fails because
+    of the load. A line longer than the `max_line_length` setting ends the
+    stream with a LineTooLong error line.
+
+    Args:
+        request (Request): The incoming request with the streamed body.
+        mode (Literal["stateful", "stateless"]): "stateful" shares variables across the
+            lines of the body, "stateless" evaluates every line on its own.
+        numeric_mode (str | None): "exact", "float64" or "decimal:N", the server
+            default if None.
+
+    Returns:
+        DuplexStreamingResponse: NDJSON stream of InterpreterResponse objects.
+
+    Raises:
+        HTTPException: If the numeric mode is unknown or the client is over its rate.
+    """
+    admission: AdmissionController | None = request.app.state.admission
+    if admission is not None:
+        try:
+            admission.check_rate(client_of(request))
+        except Rejected as rejection:
+            raise rejection_error(rejection)
+
+    ndjson: bool = request.headers.get("content-type", "").startswith(
+        "application/x-ndjson"
+    )
+    stream_mode: NumericMode = resolve_mode(request, numeric_mode)
+    max_length: int = request.app.state.settings.max_line_length
+    new_interpreter: Callable[[], Interpreter] = request.app.state.new_interpreter
+    session: Interpreter = new_interpreter()
+
+    async def results() -> AsyncIterator[bytes]:
+        try:
+            async for line in iter_lines(request.stream(), max_length):
+                if not ndjson or line.strip():
+                    yield await answer_line(line)
+        except LineTooLong as error:
+            response: InterpreterResponse = InterpreterResponse(
+                expression="", type_error=type(error).__name__, error=str(error)
+            )
+            yield response.model_dump_json().encode() + b"\n"
+
+    async def answer_line(line: bytes) -> bytes:
+        try:
+            expression: str = line.decode("utf-8")
+            line_mode: NumericMode = stream_mode
+            if ndjson:
+                payload = json.loads(expression)
+                if isinstance(payload, str):
+                    expression = payload
+                else:
+                    body: ExpressionRequest = ExpressionRequest.model_validate(
+                        payload
+                    )
+                    expression = body.expression
+                    if body.numeric_mode:
+                        line_mode = parse_mode(body.numeric_mode)
+
+        except (ValueError, ValidationError) as error:
+            response: InterpreterResponse = InterpreterResponse(
+                expression=line.decode("utf-8", errors="replace"),
+                type_error=type(error).__name__,
+                error=str(error),
+            )
+
+        else:
+            interpreter: Interpreter = (
+                session if mode == "stateful" else new_interpreter()
+            )
+            response = await run_admitted(
+                request,
+                expression,
+                interpret,
+                expression,
+                interpreter,
+                None,
+                request.app.state.parse_cache,
+                line_mode,
+                request.app.state.tiers,
+                offload=True,
+                patient=True,
+            )
+
+        return response.model_dump_json().encode() + b"\n"
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.websocket("/ws")
+async def interpreter_session(websocket: WebSocket) -> None:
+    """
+    Interactive session over a WebSocket, bound to its own interpreter.
+
+    Every message is a JSON object with a "type" and an optional "id", which
+    is echoed back in the answer:
+        {"type": "evaluate", "expression": "x = 2"} -> {"type": "result", ...InterpreterResponse}
+        {"type": "reset"}                           -> {"type": "reset", "message": ...}
+        {"type": "variables"}                       -> {"type": "variables", "variables": {...}}
+        {"type": "functions"}                       -> {"type": "functions", "functions": {...}}
+        {"type": "history"}                         -> {"type": "history", ...history}
+        {"type": "mode", "mode": "float64"}         -> {"type": "mode", "mode": "float64"}
+
+    A "mode" message sets the numeric mode of the session, which starts
+    with the server default; "evaluate" messages may override it with a
+    "numeric_mode" of their own. Expressions read the previous results of
+    the session as `ans` and `_N`.
+
+    Clients may send many messages without waiting: they are received while
+    earlier ones are evaluated, processed in order, and each answer is sent
+    as soon as it is ready. Evaluations go through the admission control and
+    run in a worker thread, so the event loop keeps serving other clients;
+    a rejected evaluation is answered with an "error" message.
+
+    Args:
+        websocket (WebSocket): The client connection.
+    """
+    await websocket.accept()
+    interpreter: Interpreter = websocket.app.state.new_interpreter()
+    pending: asyncio.Queue = asyncio.Queue(maxsize=SESSION_QUEUE_SIZE)
+
+    async def receive() -> None:
+        try:
+            while True:
+                await pending.put(await websocket.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await pending.put(None)
+
+    receiver: asyncio.Task = asyncio.create_task(receive())
+
+    try:
+        while (text := await pending.get()) is not None:
+            message_id: object = None
+            try:
+                message: dict = json.loads(text)
+                message_id = message.get("id")
+                kind: str = message["type"]
+                answer: dict = {"id": message_id, "type": kind}
+
+                if kind == "evaluate":
+                    numeric_mode: str | None = message.get("numeric_mode")
+                    expression: str = str(message["expression"])
+                    response: InterpreterResponse = await run_admitted(
+                        websocket,
+                        expression,
+                        interpret,
+                        expression,
+                        interpreter,
+                        None,
+                        websocket.app.state.parse_cache,
+                        parse_mode(numeric_mode) if numeric_mode else None,
+                        websocket.app.state.tiers,
+                        offload=True,
+                    )
+                    answer.update(type="result", **response.model_dump())
+
+                elif kind == "reset":
+                    interpreter.environment.reset()
+                    answer["message"] = "The interpreter was restarted"
+
+                elif kind == "mode":
+                    if "mode" in message:
+                        interpreter.mode = parse_mode(message["mode"])
+                    answer["mode"] = interpreter.mode.name
+
+                elif kind == "variables":
+                    answer["variables"] = {
+                        name: str(value) for name, value in interpreter.variables.items()
+                    }
+
+                elif kind == "history":
+                    answer.update(history_fields(interpreter.history))
+
+                elif kind == "functions":
+                    answer["functions"] = {
+                        name: repr(function)
+                        for name, function in interpreter.functions.items()
+                    }
+
+                else:
+                    raise ValueError(f"Unknown message type: '{kind}'.")
+
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                answer = {
+                    "id": message_id,
+                    "type": "error",
+                    "error": f"Invalid message: {error}",
+                }
+
+            except HTTPException as rejection:
+                answer = {
+                    "id": message_id,
+                    "type": "error",
+                    "error": rejection.detail,
+                    "retry_after": int((rejection.headers or {})["Retry-After"]),
+                }
+
+            await websocket.send_json(answer)
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        receiver.cancel()
+
+
+def history_fields(history: History) -> dict:
+    """
+    Results kept by a history, as sent to clients.
+
+    Args:
+        history (History): The history of an interpreter.
+
+    Returns:
+        dict: Results kept, results recorded, and each result by its name, oldest first.
+    """
+    return {
+        "size": history.size,
+        "count": history.count,
+        "results": {f"_{index}": str(result) for index, result in history.entries()},
+    }
+
+
+@router.get("/history")
+async def get_history(request: Request) -> dict:
+    """
+    Get the last results of the interpreter, which expressions read as `ans` and `_N`.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        dict: Results kept, results recorded, and each result by its name, oldest first.
+    """
+    return history_fields(request.app.state.interpreter.history)
+
+
+@router.get("/functions")
+async def get_functions(request: Request) -> dict:
+    """
+    Get the user functions defined in the interpreter, with their memo counters.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        dict: Definition and memo counters of each function, by name.
+    """
+    return {
+        name: function.stats()
+        for name, function in request.app.state.interpreter.functions.items()
+    }
+
+
+@router.post("/interpreter/reset")
+async def reset_interpreter(request: Request) -> HTTPResponse:
+    """
+    Reset the interpreter and clear stored variables, user functions and results.
+
+    Evaluations already running keep their snapshot, and their assignments
+    are discarded instead of leaking into the reset environment.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        HTTPResponse: confirmation message and status code.
+
+    Raises:
+        HTTPException: If the interpreter cannot be restarted.
+    """
+    try:
+        request.app.state.interpreter.environment.reset()
+        logger.info("Interpreter was restarted.")
+        return HTTPResponse(
+            message="The interpreter was restarted",
+            status=200,
+        )
+
+    except Exception as error:
+        logger.error(f"Error to restart interpreter: {error}")
+        raise HTTPException(
+            status_code=500,
+            detail="Internal error when restarting the interpreter",
+            headers={"X-Error-Type": "ResetError"},
+        )
+
+
+@router.get("/logs")
+async def get_logs(request: Request) -> dict:
+    """
+    Get the contents of the log file.
+
+    Args:
+        request (Request): The incoming request, used to reach the app settings.
+
+    Returns:
+        dict: Log lines and status code.
+
+    Raises:
+        HTTPException: If the log file is not found or an unexpected error occurs.
+    """
+    log_filename: str = request.app.state.settings.log_filename
+
+    try:
+        with open(log_filename, "r") as f:
+            logs: list[str] = f.read().splitlines()
+            return {"logs": logs, "status": 200}
+
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="The log file wasn't found",
+            headers={
+                "X-Error-Type": "FileNotFound",
+                "X-File-Name": log_filename,
+                "Cache-Control": "no-cache, no-store, must-revalidate",
+                "X-Retry-After": "30",
+            },
+        )
+
+    except Exception as error:
+        logger.error(f"Unexpected error: {error}")
+
+        raise HTTPException(
+            status_code=500,
+            detail="An unexpected error occurred while reading the log file",
+            headers={
+                "X-Error-Type": "InternalServerError",
+                "X-Error-Code": "UNEXPECTED_ERROR",
+                "Cache-Control": "no-cache, no-store, must-revalidate",
+            },
+        )
+
+
+@router.get("/admission")
+async def get_admission(request: Request) -> dict:
+    """
+    Get the counters of the admission control in front of `/expressions`.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        dict: Admissions and rejections per reason, running and queued requests per lane.
+
+    Raises:
+        HTTPException: If admission control is disabled.
+    """
+    admission: AdmissionController | None = request.app.state.admission
+    if admission is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Admission control is disabled, set ADMISSION_CONTROL=1 to enable it",
+            headers={"X-Error-Type": "AdmissionDisabled"},
+        )
+
+    return admission.stats()
+
+
+@router.get("/cache")
+async def get_cache(request: Request) -> dict:
+    """
+    Get the state of the parse and result caches and of the startup warm-up.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        dict: Counters of each cache (None if disabled), and warm-up progress and
+        coverage (None without history).
+
+    Raises:
+        HTTPException: If both caches are disabled.
+    """
+    parse_cache: ParseCache | None = request.app.state.parse_cache
+    result_cache: ResultCache | None = request.app.state.result_cache
+    if parse_cache is None and result_cache is None:
+        raise HTTPException(
+            status_code=404,
+            detail=(
+                "The caches are disabled, set PARSE_CACHE_SIZE or RESULT_CACHE_SIZE "
+                "to enable them"
+            ),
+            headers={"X-Error-Type": "CacheDisabled"},
+        )
+
+    warmup: Warmup | None = request.app.state.warmup
+    return {
+        "parse_cache": parse_cache.stats() if parse_cache is not None else None,
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "warmup": warmup.status() if warmup is not None else None,
+    }
+
+
+@router.get("/tiers")
+async def get_tiers(request: Request) -> dict:
+    """
+    Get the counters of the tiered execution, to tune its threshold.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+
+    Returns:
+        dict: Evaluations in each tier and compilation counters.
+
+    Raises:
+        HTTPException: If tiered execution is disabled.
+    """
+    tiers: TieredExecution | None = request.app.state.tiers
+    if tiers is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Tiered execution is disabled, set TIER_THRESHOLD to enable it",
+            headers={"X-Error-Type": "TieringDisabled"},
+        )
+
+    return tiers.stats()
+
+
+@router.get("/debug/allocations")
+async def get_allocations(request: Request, limit: int = 10) -> dict:
+    """
+    Get the allocation profile of the evaluated expressions.
+
+    Args:
+        request (Request): The incoming request, used to reach the app state.
+        limit (int): Number of allocation sites and recent requests to include.
+
+    Returns:
+        dict: Peak and retained bytes per stage, recent requests and top allocation sites.
+
+    Raises:
+        HTTPException: If allocation profiling is disabled.
+    """
+    allocation_profiler: AllocationProfiler = request.app.state.allocation_profiler
+    if not allocation_profiler.enabled:
+        raise HTTPException(
+            status_code=404,
+            detail="Allocation profiling is disabled, set ALLOCATION_PROFILING=1 to enable it",
+            headers={"X-Error-Type": "ProfilingDisabled"},
+        )
+
+    return allocation_profiler.report(limit)
+
+
+app: FastAPI = create_app()
@@ -1,26 +1,54 @@
 from src.backend.parser.nodes import *
 from src.backend.token.tokens import Token, TokenType
 
-from typing import Iterator
+from typing import Iterable, Iterator
 import logging
 
 log = logging.getLogger(__name__)
 
+# names of the built-in functions, as the Interpreter looks them up
+_FUNCTION_NAMES: dict[TokenType, str] = {
+    TokenType.LOG: "log",
+    TokenType.EXP: "exp",
+    TokenType.COS: "cos",
+    TokenType.SIN: "sin",
+    TokenType.SQRT: "sqrt",
+}
+
+
+def is_history_name(name: str) -> bool:
+    """
+    Whether a variable name refers to the result history instead of a variable
+
+    Args:
+        name (str): Variable name
+
+    Returns:
+        bool: True for "ans" (the last result) and "_N" (the result number N)
+    """
+    return name == "ans" or (name[:1] == "_" and name[1:].isdigit())
+
 
 class Parser:
     """
     Parser to analyze syntax and organize operations maintaining the order of precedence
     """
 
-    def __init__(self, tokens: list[Token]) -> None:
+    def __init__(self, tokens: Iterable[Token]) -> None:
         """
         Constructor from Parser
 
+        Tokens are consumed one at a time, so a Lexer generator can be passed
+        directly, without building a list first.
+
         Args:
-            tokens (Generator[Token]): All tokens to parser in a Generator
+            tokens (Iterable[Token]): All tokens to parser, in a list or a Generator
         """
         self.tokens: Iterator = iter(tokens)
         self._current_token: Token | None = None
+        # groups being parsed and functions defined, to keep definitions at the top
+        self._depth: int = 0
+        self._definitions: int = 0
         self.next_token()
 
     @property
@@ -52,7 +80,7 @@ class Parser:
         except StopIteration:
             self.current_token = None
 
-        log.info(f"Next Token: '{self.current_token}'")
+        log.info("Next Token: '%s'", self.current_token)
 
     @staticmethod
     def left_bind_power(token: Token) -> int:
@@ -103,19 +131,10 @@ class Parser:
 
     @staticmethod
     def convert_function_to_string(token: Token) -> str:
-        match token.type:
-            case TokenType.LOG:
-                return "log"
-            case TokenType.EXP:
-                return "exp"
-            case TokenType.COS:
-                return "cos"
-            case TokenType.SIN:
-                return "sin"
-            case TokenType.SQRT:
-                return "sqrt"
-            case _:
-                raise RuntimeError(f"Unsuported function: '{token}'.")
+        function_name: str | None = _FUNCTION_NAMES.get(token.type)
+        if function_name is None:
+            raise RuntimeError(f"Unsuported function: '{token}'.")
+        return function_name
 
     def expression(self, right_bind_power: int) -> Node:
         """
@@ -168,17 +187,23 @@ class Parser:
             Node: Node to represent function call
         """
         if token.type == TokenType.NUMBER:
-            log.info(f"Number Node created: '{token.value}'")
+            log.info("Number Node created: '%s'", token.value)
             return NumberNode(token.value)
 
         elif token.type == TokenType.VARIABLE:
-            log.info(f"Variable Node created: '{token.value}'")
+            if (
+                self.current_token is not None
+                and self.current_token.type == TokenType.LEFT_PARENTHESES
+            ):
+                return self.call(token.value)
+
+            log.info("Variable Node created: '%s'", token.value)
             return VariableNode(token.value)
 
         elif token.type in (TokenType.PLUS, TokenType.MINUS):
             expression: Node = self.expression(100)
             operation: Literal["-", "+"] = "+" if token.type == TokenType.PLUS else "-"
-            log.info(f"Unary Node created: '{operation}'")
+            log.info("Unary Node created: '%s'", operation)
             return UnaryOperationNode(operation, expression)
 
         elif token.type in (
@@ -201,6 +226,7 @@ class Parser:
             function_name: str = self.convert_function_to_string(token)
 
             self.next_token()
+            self._depth += 1
             expression: Node = self.expression(0)
 
             # if don't have right parenthesis
@@ -213,11 +239,13 @@ class Parser:
                 )
 
             # consume the parenthesis ")"
+            self._depth -= 1
             self.next_token()
-            log.info(f"Function Node created: '{function_name}'.")
+            log.info("Function Node created: '%s'.", function_name)
             return FunctionNode(function_name, expression)
 
         elif token.type == TokenType.LEFT_PARENTHESES:
+            self._depth += 1
             expression: Node = self.expression(0)
             if (
                 self.current_token is None
@@ -226,11 +254,90 @@ class Parser:
                 raise SyntaxError(
                     f"Expect a right parenthesis. passed token: '{self.current_token}'."
                 )
+            self._depth -= 1
             self.next_token()
             return expression
 
         raise SyntaxError(f"No value token: '{token}'.")
 
+    def call(self, function_name: str) -> CallNode:
+        """
+        Parse the arguments of a user function call, separated by commas
+
+        Args:
+            function_name (str): Name of the called function, already consumed
+
+        Returns:
+            CallNode: Node to represent the call
+        """
+        # consume the parenthesis "("
+        self.next_token()
+        self._depth += 1
+
+        arguments: list[Node] = []
+        if (
+            self.current_token is None
+            or self.current_token.type != TokenType.RIGHT_PARENTHESES
+        ):
+            arguments.append(self.expression(0))
+            while (
+                self.current_token is not None
+                and self.current_token.type == TokenType.COMMA
+            ):
+                self.next_token()
+                arguments.append(self.expression(0))
+
+        if (
+            self.current_token is None
+            or self.current_token.type != TokenType.RIGHT_PARENTHESES
+        ):
+            raise SyntaxError(
+                f"Miss right parenthesis to close the arguments of function: '{function_name}'."
+            )
+
+        # consume the parenthesis ")"
+        self._depth -= 1
+        self.next_token()
+        log.info("Call Node created: '%s'.", function_name)
+        return CallNode(function_name, arguments)
+
+    def definition(self, token: Token, call: CallNode) -> FunctionDefinitionNode:
+        """
+        Parse the body of a user function, turning the call before "=" into its signature
+
+        Args:
+            token (Token): The "=" Token
+            call (CallNode): Left side of "=", with a variable name for each parameter
+
+        Returns:
+            FunctionDefinitionNode: Node to represent the definition
+        """
+        if self._depth:
+            raise SyntaxError(
+                f"Functions can only be defined at the start of an expression: '{call}'."
+            )
+
+        parameters: list[str] = []
+        for argument in call.arguments:
+            if not isinstance(argument, VariableNode):
+                raise SyntaxError(
+                    f"Function parameters must be variable names: '{argument}'."
+                )
+            if is_history_name(argument.name):
+                raise SyntaxError(
+                    f"'{argument.name}' refers to the result history, it can't be a parameter."
+                )
+            if argument.name in parameters:
+                raise SyntaxError(
+                    f"Duplicate parameter '{argument.name}' in function: '{call.function_name}'."
+                )
+            parameters.append(argument.name)
+
+        body: Node = self.expression(self.left_bind_power(token) - 1)
+        self._definitions += 1
+        log.info("Function Definition Node created: '%s'", call.function_name)
+        return FunctionDefinitionNode(call.function_name, parameters, body)
+
     def led(self, token: Token, left_node: Node) -> Node:
         """
         Parse Operations like: +, -, /, *, ^ and =
@@ -254,19 +361,29 @@ class Parser:
         ):
             right_node: Node = self.expression(self.left_bind_power(token))
             operation: str = self.convert_operation_to_string(token)
-            log.info(f"Binary Operation Node created: '{operation}'")
+            log.info("Binary Operation Node created: '%s'", operation)
             return BinOperationNode(left_node, operation, right_node)
 
         if token.type == TokenType.POWER:
             right_node = self.expression(self.left_bind_power(token) - 1)
-            log.info(f"Binary Operation Node created: '^'")
+            log.info("Binary Operation Node created: '^'")
             return BinOperationNode(left_node, "^", right_node)
 
         if token.type == TokenType.EQUAL:
+            if isinstance(left_node, CallNode):
+                return self.definition(token, left_node)
+            if isinstance(left_node, FunctionNode):
+                raise SyntaxError(
+                    f"Built-in functions can't be redefined: '{left_node.function_name}'."
+                )
             if not isinstance(left_node, VariableNode):
                 raise SyntaxError(f"Just variables can be assigned: '{left_node}'")
+            if is_history_name(left_node.name):
+                raise SyntaxError(
+                    f"'{left_node.name}' refers to the result history, it can't be assigned."
+                )
             right_node = self.expression(self.left_bind_power(token) - 1)
-            log.info(f"Assigment Node created: '='")
+            log.info("Assigment Node created: '='")
             return AssignmentNode(left_node.name, right_node)
 
         raise SyntaxError(f"This operation doesn' exists: '{token}'.")
@@ -282,4 +399,15 @@ class Parser:
         if not self.current_token:
             return None
 
-        return self.expression(0)
+        tree: Node = self.expression(0)
+        if self.current_token is not None and self.current_token.type == TokenType.COMMA:
+            raise SyntaxError("Unexpected ',' outside of a function call.")
+
+        # a definition nested in an assignment or in another definition
+        if self._definitions and not (
+            self._definitions == 1 and isinstance(tree, FunctionDefinitionNode)
+        ):
+            raise SyntaxError(
+                f"Functions can only be defined at the start of an expression: '{tree}'."
+            )
+        return tree
@@ -0,0 +1,109 @@
+from src.backend.lexer.lexer import Lexer
+from src.backend.parser.arithmetic_parser import Parser
+from src.backend.parser.nodes import Node
+
+from collections import OrderedDict
+
+import threading
+
+_MISSING: object = object()
+
+
+class ParseCache:
+    """
+    Least recently used cache of syntax trees by expression text.
+
+    Syntax trees are never modified by the interpreter, so one cached tree
+    may be evaluated by many requests at the same time. Expressions that
+    fail to parse are not cached.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Constructor for ParseCache.
+
+        Args:
+            capacity (int): Number of syntax trees kept.
+        """
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[str, Node | None] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._entries
+
+    def get(self, text: str, default: object = None) -> Node | None | object:
+        """
+        Cached syntax tree of an expression, without parsing it.
+
+        Args:
+            text (str): The expression.
+            default (object): Returned when the expression isn't cached.
+
+        Returns:
+            Node | None | object: The syntax tree, or `default`.
+        """
+        with self._lock:
+            if text in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(text)
+                return self._entries[text]
+            self.misses += 1
+            return default
+
+    def put(self, text: str, tree: Node | None) -> None:
+        """
+        Store the syntax tree of an expression, evicting the least recently used one.
+
+        Args:
+            text (str): The expression.
+            tree (Node | None): Its syntax tree, None if the expression is empty.
+        """
+        with self._lock:
+            self._entries[text] = tree
+            self._entries.move_to_end(text)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def parse(self, text: str) -> Node | None:
+        """
+        Syntax tree of an expression, lexing and parsing it only if it isn't cached.
+
+        Args:
+            text (str): The expression to parse.
+
+        Returns:
+            Node: First node of the syntax tree.
+            None: If the expression is empty.
+
+        Raises:
+            Exception: Any lexing or parsing error of the expression.
+        """
+        tree: Node | None | object = self.get(text, _MISSING)
+        if tree is not _MISSING:
+            return tree  # type: ignore
+
+        tree = Parser(Lexer(text).generate_tokens()).parse()
+        self.put(text, tree)
+        return tree
+
+    def stats(self) -> dict:
+        """
+        Size and hit counters of the cache.
+
+        Returns:
+            dict: Capacity, entries, hits, misses and hit ratio.
+        """
+        lookups: int = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,309 @@
+"""
+Incremental lexing and parsing of a document edited in small steps.
+
+The Lexer only looks forward from the position it starts at, so after an
+edit only the tokens from the one touching the edit are lexed again, until
+a new token starts where a shifted old token started after the edit: from
+there on, every old token is reused as is.
+
+Groups closed by a right parenthesis, "( ... )" and "f( ... )", parse to
+the same subtree wherever they appear. The IncrementalParser remembers
+them by their first token and reuses a group whose tokens were not
+replaced by an edit, instead of parsing it again. The resulting tokens,
+tree and diagnostics are the same as a full parse of the text.
+"""
+
+from src.backend.lexer.lexer import Lexer
+from src.backend.parser.arithmetic_parser import Parser
+from src.backend.parser.nodes import Node
+from src.backend.parser.validation import (
+    Diagnostic,
+    check_expression,
+    parser_diagnostic,
+)
+from src.backend.token.tokens import Token, TokenType
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable
+
+# first tokens of the groups that parse the same in any context
+_GROUP_TYPES: frozenset[TokenType] = frozenset(
+    (
+        TokenType.LEFT_PARENTHESES,
+        TokenType.LOG,
+        TokenType.SQRT,
+        TokenType.COS,
+        TokenType.SIN,
+        TokenType.EXP,
+    )
+)
+
+
+@dataclass
+class Edit:
+    """
+    Replacement of a range of a document.
+
+    Attributes:
+        offset (int): Offset where the replaced range starts.
+        deleted (int): Number of characters removed from `offset`.
+        inserted (str): Text inserted at `offset`.
+    """
+
+    offset: int
+    deleted: int = 0
+    inserted: str = ""
+
+
+@dataclass
+class _Group:
+    first_token: Token
+    last_token: Token
+    first: int
+    last: int
+    node: Node
+
+
+def _check_edit(offset: int, deleted: int, length: int) -> None:
+    if offset < 0 or deleted < 0 or offset + deleted > length:
+        raise ValueError(
+            f"Edit out of the text: offset {offset}, deleted {deleted}, length {length}."
+        )
+
+
+class IncrementalParser(Parser):
+    """
+    Parser over a token list that reuses the unchanged groups of a previous parse.
+    """
+
+    def __init__(self, tokens: list[Token], groups: dict[int, _Group]) -> None:
+        """
+        Constructor for IncrementalParser.
+
+        Args:
+            tokens (list[Token]): All tokens of the text.
+            groups (dict[int, _Group]): Groups of previous parses by their first token,
+                updated with the groups parsed now.
+        """
+        self.token_list: list[Token] = tokens
+        self.groups: dict[int, _Group] = groups
+        self.index: int = -1
+        self._current_token: Token | None = None
+        self._depth: int = 0
+        self._definitions: int = 0
+        self.next_token()
+
+    def next_token(self) -> None:
+        """
+        Advance to next Token in the list
+        """
+        self.index += 1
+        self.current_token = (
+            self.token_list[self.index] if self.index < len(self.token_list) else None
+        )
+
+    def nud(self, token: Token) -> Node:
+        if token.type not in _GROUP_TYPES:
+            return super().nud(token)
+
+        # `expression` consumed the token right before calling nud
+        first: int = self.index - 1
+        group: _Group | None = self.groups.get(id(token))
+        if (
+            group is not None
+            and group.first_token is token
+            and group.first == first
+            and group.last < len(self.token_list)
+            and self.token_list[group.last] is group.last_token
+        ):
+            self.index = group.last
+            self.next_token()
+            return group.node
+
+        node: Node = super().nud(token)
+        last: int = self.index - 1
+        self.groups[id(token)] = _Group(token, self.token_list[last], first, last, node)
+        return node
+
+
+class Document:
+    """
+    Text edited in small steps, keeping its tokens and syntax tree up to date.
+
+    Attributes:
+        text (str): Current text.
+        version (int): Number of edits applied.
+        tokens (list[Token] | None): Tokens of the text, None if lexing failed.
+        tree (Node | None): Syntax tree, None if the text is empty or invalid.
+        diagnostics (list[Diagnostic]): Problems found, empty if the text is valid.
+        relexed (int): Tokens lexed by the last edits.
+    """
+
+    def __init__(self, text: str = "") -> None:
+        """
+        Constructor for Document.
+
+        Args:
+            text (str): Initial text.
+        """
+        self.text: str = text
+        self.version: int = 0
+        self.tokens: list[Token] | None = None
+        self.tree: Node | None = None
+        self.diagnostics: list[Diagnostic] = []
+        self.relexed: int = 0
+        self._groups: dict[int, _Group] = {}
+        self._analyze()
+
+    @property
+    def valid(self) -> bool:
+        return not self.diagnostics
+
+    def _analyze(self) -> None:
+        """
+        Lex and parse the whole text.
+        """
+        self._groups = {}
+        try:
+            self.tokens = list(Lexer(self.text).generate_tokens())
+        except Exception:
+            self.tokens = None
+            self.tree, self.diagnostics = check_expression(self.text)
+            return
+
+        self.relexed = len(self.tokens)
+        self._parse()
+
+    def _parse(self) -> None:
+        parser: IncrementalParser = IncrementalParser(self.tokens, self._groups)  # type: ignore
+        try:
+            self.tree = parser.parse()
+            self.diagnostics = []
+        except Exception as error:
+            self.tree = None
+            self.diagnostics = [
+                parser_diagnostic(error, parser.current_token, len(self.text))
+            ]
+
+    def apply(self, edits: Iterable[Edit]) -> None:
+        """
+        Apply edits in order, each one against the text left by the previous one.
+
+        Either every edit is applied or, if one is invalid, none is. The
+        tokens are updated after every edit and the text is parsed once.
+
+        Args:
+            edits (Iterable[Edit]): The edits.
+
+        Raises:
+            ValueError: If an edit is outside of the text.
+        """
+        edits = list(edits)
+        length: int = len(self.text)
+        for edit in edits:
+            _check_edit(edit.offset, edit.deleted, length)
+            length += len(edit.inserted) - edit.deleted
+
+        self.relexed = 0
+        for edit in edits:
+            self._replace(edit.offset, edit.deleted, edit.inserted)
+
+        if self.tokens is None:
+            self._analyze()
+        else:
+            self._parse()
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> None:
+        """
+        Replace a range of the text, lexing and parsing again only what changed.
+
+        Args:
+            offset (int): Offset where the replaced range starts.
+            deleted (int): Number of characters removed from `offset`.
+            inserted (str): Text inserted at `offset`.
+
+        Raises:
+            ValueError: If the range is outside of the text.
+        """
+        self.apply((Edit(offset, deleted, inserted),))
+
+    def _replace(self, offset: int, deleted: int, inserted: str) -> None:
+        self.text = self.text[:offset] + inserted + self.text[offset + deleted :]
+        self.version += 1
+        if self.tokens is None:
+            return
+
+        try:
+            first, resync, fresh = self._relex(offset, deleted, len(inserted))
+        except Exception:
+            # lexed again in full, to report the error like a full analysis
+            self.tokens = None
+            return
+
+        self._move_groups(first, resync, len(fresh) - (resync - first))
+        self.tokens[first:resync] = fresh
+        self.relexed += len(fresh)
+
+    def _relex(
+        self, offset: int, deleted: int, inserted: int
+    ) -> tuple[int, int, list[Token]]:
+        """
+        Lex the text again from the first token an edit may change.
+
+        Returns:
+            tuple[int, int, list[Token]]: The old tokens in [first, resync) are replaced
+            by the fresh ones, the old tokens from `resync` are kept and shifted.
+        """
+        tokens: list[Token] = self.tokens  # type: ignore
+        delta: int = inserted - deleted
+        edited_end: int = offset + inserted
+
+        # a token ending right at the edit may grow with the inserted text
+        first: int = bisect_left(tokens, offset, key=lambda token: token.end)
+        start: int = offset if first == len(tokens) else min(offset, tokens[first].start)
+        old: int = bisect_left(tokens, offset + deleted, key=lambda token: token.start)
+
+        lexer: Lexer = Lexer(self.text)
+        lexer.move_to(start)
+        fresh: list[Token] = []
+
+        resync: int = len(tokens)
+        for token in lexer.generate_tokens():
+            while old < len(tokens) and tokens[old].start + delta < token.start:
+                old += 1
+
+            # same start in the same remaining text: every old token is valid again
+            if (
+                token.start >= edited_end
+                and old < len(tokens)
+                and tokens[old].start + delta == token.start
+            ):
+                resync = old
+                break
+
+            fresh.append(token)
+
+        if delta:
+            for token in tokens[resync:]:
+                token.start += delta  # type: ignore
+                token.end += delta  # type: ignore
+
+        return first, resync, fresh
+
+    def _move_groups(self, first: int, resync: int, shift: int) -> None:
+        """
+        Forget the groups with replaced tokens, and shift the indexes of those after them.
+        """
+        if first == resync and shift == 0:
+            return
+
+        for key, group in list(self._groups.items()):
+            if group.last < first:
+                continue
+
+            if group.first >= resync:
+                group.first += shift
+                group.last += shift
+            else:
+                del self._groups[key]
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Iterator, Literal
 from dataclasses import dataclass
 
 
@@ -112,3 +112,61 @@ class FunctionNode(Node):
 
     def __repr__(self) -> str:
         return f"{self.function_name}({self.expression})"
+
+
+# User functions
+@dataclass
+class CallNode(Node):
+    """
+    Node to represent calls of user functions like: f(x, 2)
+
+    Attributes:
+        function_name (str): Name of the called function
+        arguments (list[Node]): Expressions of the arguments, in order
+    """
+
+    function_name: str
+    arguments: list[Node]
+
+    def __repr__(self) -> str:
+        return f"{self.function_name}({','.join(map(repr, self.arguments))})"
+
+
+@dataclass
+class FunctionDefinitionNode(Node):
+    """
+    Node to represent definitions of user functions like: f(x, y) = x^2 + y
+
+    Attributes:
+        function_name (str): Name of the defined function
+        parameters (list[str]): Names of the parameters, in order
+        body (Node): Expression evaluated by each call
+    """
+
+    function_name: str
+    parameters: list[str]
+    body: Node
+
+    def __repr__(self) -> str:
+        return f"{self.function_name}({','.join(self.parameters)})={self.body}"
+
+
+def iter_nodes(node: Node) -> Iterator[Node]:
+    """
+    Walk a syntax tree, parents before their children.
+
+    Args:
+        node (Node): Root of the tree.
+
+    Returns:
+        Iterator[Node]: Every node of the tree.
+    """
+    pending: list[Node] = [node]
+    while pending:
+        current: Node = pending.pop()
+        yield current
+        for value in vars(current).values():
+            if isinstance(value, Node):
+                pending.append(value)
+            elif isinstance(value, (list, tuple)):
+                pending.extend(item for item in value if isinstance(item, Node))
@@ -0,0 +1,136 @@
+from src.backend.lexer.lexer import Lexer
+from src.backend.parser.arithmetic_parser import Parser
+from src.backend.parser.cache import ParseCache
+from src.backend.parser.nodes import Node
+from src.backend.token.tokens import Token
+
+from dataclasses import dataclass
+from typing import Iterator
+
+_MISSING: object = object()
+
+
+@dataclass
+class Diagnostic:
+    """
+    Problem found in an expression, located by character offsets.
+
+    Offsets count characters (code points) of the expression. An empty
+    range at the end of the text means the expression ended too early.
+
+    Attributes:
+        stage (str): "lexer" or "parser".
+        type (str): Name of the error raised by the stage.
+        message (str): Readable description of the problem.
+        start (int): Offset of the first character of the problem.
+        end (int): Offset after the last character of the problem.
+    """
+
+    stage: str
+    type: str
+    message: str
+    start: int
+    end: int
+
+
+class _TrackedTokens:
+    """
+    Tokens of a Lexer, remembering whether lexing is what failed.
+    """
+
+    def __init__(self, lexer: Lexer) -> None:
+        self.lexer: Lexer = lexer
+        self.failed: bool = False
+
+    def __iter__(self) -> Iterator[Token]:
+        try:
+            yield from self.lexer.generate_tokens()
+        except Exception:
+            self.failed = True
+            raise
+
+
+def check_expression(text: str) -> tuple[Node | None, list[Diagnostic]]:
+    """
+    Lex and parse an expression, locating the first error.
+
+    Args:
+        text (str): The expression.
+
+    Returns:
+        tuple[Node | None, list[Diagnostic]]: The syntax tree if the expression is
+        valid, and its diagnostics, empty if it is valid.
+    """
+    lexer: Lexer = Lexer(text)
+    tokens: _TrackedTokens = _TrackedTokens(lexer)
+    parser: Parser | None = None
+
+    try:
+        parser = Parser(tokens)
+        return parser.parse(), []
+
+    except Exception as error:
+        if tokens.failed:
+            return None, [lexer_diagnostic(error, lexer, len(text))]
+
+        return None, [
+            parser_diagnostic(error, parser.current_token if parser else None, len(text))
+        ]
+
+
+def lexer_diagnostic(error: Exception, lexer: Lexer, length: int) -> Diagnostic:
+    """
+    Locate an error raised by a Lexer at the token it was generating.
+
+    Args:
+        error (Exception): The error.
+        lexer (Lexer): The Lexer that raised it.
+        length (int): Length of the text.
+
+    Returns:
+        Diagnostic: The located error.
+    """
+    start: int = lexer.token_start
+    end: int = min(length, max(lexer.position, start) + 1)
+    return Diagnostic("lexer", type(error).__name__, str(error), start, end)
+
+
+def parser_diagnostic(error: Exception, token: Token | None, length: int) -> Diagnostic:
+    """
+    Locate an error raised by a Parser at the token it was looking at.
+
+    Args:
+        error (Exception): The error.
+        token (Token | None): Current token of the Parser, None at the end of the text.
+        length (int): Length of the text.
+
+    Returns:
+        Diagnostic: The located error.
+    """
+    start: int = length if token is None or token.start is None else token.start
+    end: int = length if token is None or token.end is None else token.end
+    return Diagnostic("parser", type(error).__name__, str(error), start, end)
+
+
+def validate_expression(text: str, cache: ParseCache | None = None) -> list[Diagnostic]:
+    """
+    Check the syntax of an expression without evaluating it.
+
+    Valid expressions are stored in the cache, so evaluating them later
+    doesn't parse them again, and cached ones aren't parsed at all.
+
+    Args:
+        text (str): The expression.
+        cache (ParseCache | None): Cache of syntax trees shared with the evaluation.
+
+    Returns:
+        list[Diagnostic]: Problems found, empty if the expression is valid.
+    """
+    if cache is not None and cache.get(text, _MISSING) is not _MISSING:
+        return []
+
+    tree, diagnostics = check_expression(text)
+    if cache is not None and not diagnostics:
+        cache.put(text, tree)
+
+    return diagnostics
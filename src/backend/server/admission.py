@@ -0,0 +1,387 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Literal
+
+import asyncio
+import math
+import re
+import time
+
+Lane = Literal["cheap", "expensive"]
+
+# extra estimated cost of every power, the operation that makes numbers explode
+POWER_COST: int = 32
+
+# bits of a power result that cost as much as one character
+BITS_PER_COST: int = 1024
+
+# powers of number literals, like "9^9^7", whose result size the text tells
+_POWER_CHAIN: re.Pattern = re.compile(
+    r"(?<![\w.])\d+(?:\.\d*)?(?:\s*\^\s*\d+(?:\.\d*)?)+"
+)
+_POWER: re.Pattern = re.compile(r"\s*\^\s*")
+
+
+def power_bits(chain: str) -> float:
+    """
+    Estimate the bit length of a power of number literals, grouped from the right.
+
+    Args:
+        chain (str): The power, like "9^9^7".
+
+    Returns:
+        float: Bits of the result, inf if they don't fit a float.
+    """
+    values: list[float] = [float(value) for value in _POWER.split(chain)]
+    # base 2 logarithm of the power of the values seen so far
+    magnitude: float = math.log2(values[-1]) if values[-1] > 0 else -math.inf
+    for base in reversed(values[:-1]):
+        if base <= 1:
+            magnitude = 0.0
+        elif magnitude > 1000:
+            return math.inf
+        else:
+            magnitude = math.log2(base) * 2.0**magnitude
+    return max(0.0, magnitude)
+
+
+def estimate_cost(expression: str) -> int:
+    """
+    Estimate how expensive an expression is, without lexing it.
+
+    Args:
+        expression (str): The expression to evaluate.
+
+    Returns:
+        int: Length of the expression plus a penalty for every power, and for
+        the size of the powers of number literals.
+    """
+    bits: float = sum(power_bits(chain) for chain in _POWER_CHAIN.findall(expression))
+    return (
+        len(expression)
+        + POWER_COST * expression.count("^")
+        + int(min(bits, 2.0**62)) // BITS_PER_COST
+    )
+
+
+class Rejected(Exception):
+    """
+    A request refused by the admission control
+
+    Attributes:
+        status (int): HTTP status to answer with, 429 or 503.
+        reason (str): Counter name of the rejection reason.
+        retry_after (int): Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, status: int, reason: str, retry_after: float) -> None:
+        super().__init__(f"Request rejected: {reason}")
+        self.status: int = status
+        self.reason: str = reason
+        self.retry_after: int = max(1, math.ceil(retry_after))
+
+
+@dataclass
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second up to `burst`.
+    """
+
+    rate: float
+    burst: float
+    tokens: float = 0.0
+    updated: float = 0.0
+
+    def take(self, now: float) -> float:
+        """
+        Take one token.
+
+        Args:
+            now (float): Current monotonic time.
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Per-client token buckets, keeping only the most recently seen clients.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000) -> None:
+        """
+        Constructor for RateLimiter.
+
+        Args:
+            rate (float): Requests per second allowed for each client.
+            burst (float): Requests a client may send at once after being idle.
+            max_clients (int): Number of client buckets kept in memory.
+        """
+        self.rate: float = rate
+        self.burst: float = burst
+        self.max_clients: int = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def check(self, client: str, now: float) -> float:
+        """
+        Count a request of a client.
+
+        Args:
+            client (str): Identifier of the client.
+            now (float): Current monotonic time.
+
+        Returns:
+            float: 0 if the request is allowed, otherwise seconds until it would be.
+        """
+        bucket: TokenBucket | None = self._buckets.pop(client, None)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self.burst, now)
+            if len(self._buckets) >= self.max_clients:
+                self._buckets.popitem(last=False)
+
+        self._buckets[client] = bucket
+        return bucket.take(now)
+
+
+@dataclass
+class _LaneState:
+    limit: int
+    running: int = 0
+    waiting: deque[asyncio.Future] = field(default_factory=deque)
+    # exponentially weighted average of the seconds spent running a request
+    service_time: float = 0.0
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded wait queue, priority lanes and rate limiting.
+
+    Requests are split into a cheap and an expensive lane by estimated cost.
+    Freed slots go to cheap requests first, and expensive requests may only
+    hold `expensive_concurrency` slots, so a burst of expensive expressions
+    can't starve the cheap ones. Requests that would wait longer than the
+    queue budget are rejected right away instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 64,
+        queue_timeout: float = 2.0,
+        expensive_concurrency: int = 1,
+        cost_threshold: int = 64,
+        rate: float = 0.0,
+        burst: float = 20.0,
+    ) -> None:
+        """
+        Constructor for AdmissionController.
+
+        Args:
+            max_concurrency (int): Requests evaluated at the same time.
+            max_queue (int): Requests allowed to wait for a slot.
+            queue_timeout (float): Seconds a request may wait for a slot.
+            expensive_concurrency (int): Slots the expensive lane may hold at once.
+            cost_threshold (int): Estimated cost from which a request is expensive.
+            rate (float): Requests per second allowed for each client, 0 to disable.
+            burst (float): Requests a client may send at once after being idle.
+        """
+        self.max_concurrency: int = max_concurrency
+        self.max_queue: int = max_queue
+        self.queue_timeout: float = queue_timeout
+        self.cost_threshold: int = cost_threshold
+        self.rate_limiter: RateLimiter | None = (
+            RateLimiter(rate, burst) if rate > 0 else None
+        )
+        self.lanes: dict[Lane, _LaneState] = {
+            "cheap": _LaneState(max_concurrency),
+            "expensive": _LaneState(min(expensive_concurrency, max_concurrency)),
+        }
+        self.counters: dict[str, int] = {
+            "admitted_cheap": 0,
+            "admitted_expensive": 0,
+            "rejected_rate_limited": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_budget": 0,
+            "rejected_queue_timeout": 0,
+        }
+        self.queue_wait_total: float = 0.0
+
+    @property
+    def running(self) -> int:
+        return sum(lane.running for lane in self.lanes.values())
+
+    @property
+    def queued(self) -> int:
+        return sum(len(lane.waiting) for lane in self.lanes.values())
+
+    def lane_of(self, expression: str) -> Lane:
+        return "expensive" if estimate_cost(expression) >= self.cost_threshold else "cheap"
+
+    def _has_slot(self, lane: _LaneState) -> bool:
+        return self.running < self.max_concurrency and lane.running < lane.limit
+
+    def _expected_wait(self, name: Lane) -> float:
+        """
+        Estimate how long a new request of a lane would wait for a slot.
+        """
+        lane: _LaneState = self.lanes[name]
+        ahead: int = len(self.lanes["cheap"].waiting)
+        if name == "expensive":
+            ahead += len(lane.waiting)
+
+        return (ahead + 1) * lane.service_time / max(1, lane.limit)
+
+    def _wake_next(self) -> None:
+        """
+        Hand free slots to waiting requests, cheap lane first.
+        """
+        for lane in (self.lanes["cheap"], self.lanes["expensive"]):
+            while lane.waiting and self._has_slot(lane):
+                waiter: asyncio.Future = lane.waiting.popleft()
+                if not waiter.done():
+                    lane.running += 1
+                    waiter.set_result(None)
+
+    def check_rate(self, client: str) -> None:
+        """
+        Count a request of a client against its rate.
+
+        Args:
+            client (str): Identifier of the client.
+
+        Raises:
+            Rejected: If the client is over its rate.
+        """
+        if self.rate_limiter is not None:
+            retry_after: float = self.rate_limiter.check(client, time.monotonic())
+            if retry_after > 0:
+                self.counters["rejected_rate_limited"] += 1
+                raise Rejected(429, "rate_limited", retry_after)
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        expression: str,
+        client: str,
+        lane_name: Lane | None = None,
+        patient: bool = False,
+    ) -> AsyncIterator[Lane]:
+        """
+        Wait for a slot to evaluate an expression, or reject the request.
+
+        Patient requests are parts of a bigger one that was already counted
+        against the rate of its client, like the lines of a stream: they
+        wait for a slot however long it takes, so their sender slows down
+        instead of losing some of its parts.
+
+        Args:
+            expression (str): The expression to evaluate.
+            client (str): Identifier of the client, for rate limiting.
+            lane_name (Lane | None): Lane of the request, estimated from the expression if None.
+            patient (bool): Whether to wait without rate limit, queue limit or timeout.
+
+        Returns:
+            AsyncIterator[Lane]: The lane that admitted the request.
+
+        Raises:
+            Rejected: If the request isn't patient and the client is over its rate
+                or the server is overloaded.
+        """
+        now: float = time.monotonic()
+        if not patient:
+            self.check_rate(client)
+
+        name: Lane = lane_name or self.lane_of(expression)
+        lane: _LaneState = self.lanes[name]
+
+        if self._has_slot(lane) and not lane.waiting:
+            lane.running += 1
+        else:
+            await self._wait(name, lane, patient)
+
+        self.counters[f"admitted_{name}"] += 1
+        self.queue_wait_total += time.monotonic() - now
+        started: float = time.monotonic()
+
+        try:
+            yield name
+        finally:
+            elapsed: float = time.monotonic() - started
+            lane.service_time = (
+                elapsed if not lane.service_time else 0.8 * lane.service_time + 0.2 * elapsed
+            )
+            lane.running -= 1
+            self._wake_next()
+
+    async def _wait(self, name: Lane, lane: _LaneState, patient: bool = False) -> None:
+        if not patient:
+            if self.queued >= self.max_queue:
+                self.counters["rejected_queue_full"] += 1
+                raise Rejected(503, "queue_full", self._expected_wait(name))
+
+            expected_wait: float = self._expected_wait(name)
+            if expected_wait > self.queue_timeout:
+                self.counters["rejected_queue_budget"] += 1
+                raise Rejected(503, "queue_budget", expected_wait)
+
+        waiter: asyncio.Future = asyncio.get_running_loop().create_future()
+        lane.waiting.append(waiter)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(waiter), None if patient else self.queue_timeout
+            )
+
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # the slot arrived together with the timeout, keep it
+                return
+            waiter.cancel()
+            lane.waiting.remove(waiter)
+            self.counters["rejected_queue_timeout"] += 1
+            raise Rejected(503, "queue_timeout", self._expected_wait(name))
+
+        except asyncio.CancelledError:
+            # client gone while waiting: give back a slot it may have received
+            if waiter.done() and not waiter.cancelled():
+                lane.running -= 1
+                self._wake_next()
+            elif waiter in lane.waiting:
+                lane.waiting.remove(waiter)
+            raise
+
+    def stats(self) -> dict:
+        """
+        Counters and current state of the admission control.
+
+        Returns:
+            dict: Admissions and rejections per reason, running and queued requests per lane.
+        """
+        admitted: int = self.counters["admitted_cheap"] + self.counters["admitted_expensive"]
+        return {
+            "counters": dict(self.counters),
+            "running": self.running,
+            "queued": self.queued,
+            "average_queue_wait_ms": (
+                self.queue_wait_total / admitted * 1000 if admitted else 0.0
+            ),
+            "lanes": {
+                name: {
+                    "limit": lane.limit,
+                    "running": lane.running,
+                    "queued": len(lane.waiting),
+                    "service_time_ms": lane.service_time * 1000,
+                }
+                for name, lane in self.lanes.items()
+            },
+        }
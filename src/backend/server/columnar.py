@@ -0,0 +1,264 @@
+"""
+Columnar encodings of many results at once, for the batch endpoint.
+
+The float64 format is, little-endian:
+    header   magic b"IAF1", u16 format version, u16 reserved, u32 count, u32 null count
+    validity one bit per result (least significant bit first), 1 when valid,
+             padded with zeros to a multiple of 8 bytes
+    values   one float64 per result, 0 for invalid results
+
+Results that are empty, failed, or have no float64 value (complex numbers,
+integers beyond the float range) are invalid. The Arrow IPC stream holds
+the same data as a single nullable float64 column named "result", and is
+only offered when pyarrow is installed.
+"""
+
+from src.backend.interpreter.evaluator import evaluate_expression
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.tiers import TieredExecution
+from src.backend.parser.cache import ParseCache
+
+from array import array
+from decimal import Decimal
+from typing import Callable, Iterable
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+import struct
+import sys
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+JSON_MEDIA_TYPE: str = "application/json"
+FLOAT64_MEDIA_TYPE: str = "application/vnd.interpreter.float64"
+ARROW_MEDIA_TYPE: str = "application/vnd.apache.arrow.stream"
+
+MAGIC: bytes = b"IAF1"
+FORMAT_VERSION: int = 1
+_HEADER: struct.Struct = struct.Struct("<4sHxxII")
+
+
+def supported_media_types() -> list[str]:
+    """
+    Media types the batch endpoint can answer with, JSON first.
+
+    Returns:
+        list[str]: The supported media types.
+    """
+    types: list[str] = [JSON_MEDIA_TYPE, FLOAT64_MEDIA_TYPE]
+    if pyarrow is not None:
+        types.append(ARROW_MEDIA_TYPE)
+    return types
+
+
+def negotiate(accept: str | None) -> str:
+    """
+    Pick the response media type from an Accept header.
+
+    Args:
+        accept (str | None): The Accept header of the request.
+
+    Returns:
+        str: The supported type with the highest quality, JSON if none matches.
+    """
+    supported: list[str] = supported_media_types()
+    best: tuple[float, str] = (0.0, JSON_MEDIA_TYPE)
+
+    for entry in (accept or "").split(","):
+        media_type, *parameters = (part.strip() for part in entry.split(";"))
+        quality: float = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        # wildcards keep the JSON default
+        if media_type in supported and quality > best[0]:
+            best = (quality, media_type)
+
+    return best[1]
+
+
+class ColumnarResults:
+    """
+    Results of a batch as a float64 column with a validity bitmap.
+
+    Attributes:
+        values (array): One float64 per result, 0 for invalid results.
+        validity (bytearray): One bit per result, 1 when the value is valid.
+        null_count (int): Number of invalid results.
+    """
+
+    def __init__(self) -> None:
+        self.values: array = array("d")
+        self.validity: bytearray = bytearray()
+        self.null_count: int = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def append(self, value: float | None) -> None:
+        """
+        Add the next result.
+
+        Args:
+            value (float | None): The result, None if it isn't valid.
+        """
+        index: int = len(self.values)
+        if index % 8 == 0:
+            self.validity.append(0)
+
+        if value is None:
+            self.values.append(0.0)
+            self.null_count += 1
+        else:
+            self.values.append(value)
+            self.validity[-1] |= 1 << (index % 8)
+
+    def _little_endian_values(self) -> memoryview:
+        values: array = self.values
+        if sys.byteorder != "little":
+            values = array("d", values)
+            values.byteswap()
+        return memoryview(values).cast("B")
+
+    def float64_buffers(self) -> list[bytes | memoryview]:
+        """
+        Encode the results in the float64 format, without copying the values.
+
+        Returns:
+            list[bytes | memoryview]: The header, validity and values buffers, in order.
+        """
+        header: bytes = _HEADER.pack(MAGIC, FORMAT_VERSION, len(self), self.null_count)
+        padding: bytes = bytes(-len(self.validity) % 8)
+        return [header, bytes(self.validity) + padding, self._little_endian_values()]
+
+    def arrow_buffers(self) -> list[memoryview]:
+        """
+        Encode the results as an Arrow IPC stream wrapping the evaluation buffers.
+
+        Returns:
+            list[memoryview]: The stream.
+
+        Raises:
+            RuntimeError: If pyarrow isn't installed.
+        """
+        if pyarrow is None:
+            raise RuntimeError("pyarrow is required for the Arrow IPC format")
+
+        column = pyarrow.Array.from_buffers(
+            pyarrow.float64(),
+            len(self),
+            [
+                pyarrow.py_buffer(self.validity) if self.null_count else None,
+                # Arrow buffers are in native byte order
+                pyarrow.py_buffer(self.values),
+            ],
+            null_count=self.null_count,
+        )
+        batch = pyarrow.record_batch([column], names=["result"])
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+
+        return [memoryview(sink.getvalue())]
+
+
+def evaluate_columns(
+    expressions: Iterable[str],
+    interpreter: Interpreter | None,
+    parse_cache: ParseCache | None = None,
+    mode: NumericMode | None = None,
+    tiers: TieredExecution | None = None,
+    new_interpreter: Callable[[], Interpreter] = Interpreter,
+) -> ColumnarResults:
+    """
+    Evaluate expressions straight into a float64 column.
+
+    Args:
+        expressions (Iterable[str]): The expressions, in order.
+        interpreter (Interpreter | None): Interpreter shared by all expressions,
+            None to evaluate each one on its own.
+        parse_cache (ParseCache | None): Cache of syntax trees.
+        mode (NumericMode | None): Numeric mode, exact if None.
+        tiers (TieredExecution | None): Execution manager compiling hot trees, if any.
+        new_interpreter (Callable[[], Interpreter]): Maker of the interpreter of each
+            expression evaluated on its own.
+
+    Returns:
+        ColumnarResults: One result per expression.
+    """
+    results: ColumnarResults = ColumnarResults()
+    for expression in expressions:
+        try:
+            number = evaluate_expression(
+                expression,
+                interpreter if interpreter is not None else new_interpreter(),
+                parse_cache,
+                mode,
+                tiers,
+            )
+            value = number.Value if number is not None else None
+            results.append(
+                float(value) if isinstance(value, (int, float, Decimal)) else None
+            )
+        except Exception:
+            results.append(None)
+
+    return results
+
+
+class BufferResponse(Response):
+    """
+    Response whose body is sent as a sequence of buffers, without joining them.
+
+    Every buffer goes out as one `http.response.body` message. ASGI bodies
+    must be `bytes`, so memoryviews are copied one at a time, just before
+    being sent, and the whole body is never held twice.
+    """
+
+    def __init__(
+        self,
+        buffers: list[bytes | memoryview],
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        media_type: str | None = None,
+    ) -> None:
+        self.buffers: list[bytes | memoryview] = buffers
+        length: int = sum(memoryview(buffer).nbytes for buffer in buffers)
+        super().__init__(
+            b"",
+            status_code,
+            {**(headers or {}), "content-length": str(length)},
+            media_type,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        for index, buffer in enumerate(self.buffers):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": buffer if type(buffer) is bytes else bytes(buffer),
+                    "more_body": index < len(self.buffers) - 1,
+                }
+            )
+        if not self.buffers:
+            await send({"type": "http.response.body", "body": b""})
+
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,71 @@
+from src.backend.parser.incremental import Document
+
+from collections import OrderedDict
+
+import uuid
+
+
+class DocumentStore:
+    """
+    Documents being edited, keeping only the most recently used ones.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """
+        Constructor for DocumentStore.
+
+        Args:
+            capacity (int): Number of documents kept in memory.
+        """
+        self.capacity: int = capacity
+        self._documents: OrderedDict[str, Document] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def create(self, text: str) -> tuple[str, Document]:
+        """
+        Store a new document, evicting the least recently used one if full.
+
+        Args:
+            text (str): Initial text.
+
+        Returns:
+            tuple[str, Document]: Identifier and the document.
+        """
+        document_id: str = uuid.uuid4().hex
+        document: Document = Document(text)
+        self._documents[document_id] = document
+        if len(self._documents) > self.capacity:
+            self._documents.popitem(last=False)
+
+        return document_id, document
+
+    def get(self, document_id: str) -> Document:
+        """
+        Get a document.
+
+        Args:
+            document_id (str): Identifier of the document.
+
+        Returns:
+            Document: The document.
+
+        Raises:
+            KeyError: If there is no such document, or it was evicted.
+        """
+        document: Document = self._documents[document_id]
+        self._documents.move_to_end(document_id)
+        return document
+
+    def delete(self, document_id: str) -> None:
+        """
+        Forget a document.
+
+        Args:
+            document_id (str): Identifier of the document.
+
+        Raises:
+            KeyError: If there is no such document.
+        """
+        del self._documents[document_id]
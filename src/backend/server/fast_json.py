@@ -0,0 +1,98 @@
+"""
+Lean JSON reading and writing for the single-expression endpoint.
+
+FastAPI renders responses with `json.dumps(..., ensure_ascii=False,
+separators=(",", ":"))`. Here the constant parts of an InterpreterResponse
+are pre-encoded and only its strings go through the C string encoder of
+the json module, which produces the same bytes without building a
+pydantic model or a dict.
+"""
+
+from json.encoder import encode_basestring
+
+from starlette.requests import Request
+
+import json
+
+_EXPRESSION: bytes = b'{"expression":'
+_RESULT: bytes = b',"result":'
+_TYPE_ERROR: bytes = b',"type_error":'
+_ERROR: bytes = b',"error":'
+_END: bytes = b"}"
+_NULL: bytes = b"null"
+
+# tails of the two most common answers: a result, and an empty expression
+_SUCCESS_END: bytes = b',"type_error":null,"error":null}'
+_EMPTY_RESULT: bytes = b',"result":"","type_error":"None","error":"None"}'
+
+
+def _encode(value: str | None) -> bytes:
+    return _NULL if value is None else encode_basestring(value).encode()
+
+
+def encode_interpreter_response(
+    expression: str, result: str | None, type_error: str | None, error: str | None
+) -> bytes:
+    """
+    Encode the fields of an InterpreterResponse exactly like FastAPI would.
+
+    Args:
+        expression (str): The original expression.
+        result (str | None): The result, if any.
+        type_error (str | None): Type of the error, if any.
+        error (str | None): Error message, if any.
+
+    Returns:
+        bytes: The JSON body.
+    """
+    head: bytes = _EXPRESSION + encode_basestring(expression).encode()
+
+    if type_error is None and error is None and result is not None:
+        return head + _RESULT + encode_basestring(result).encode() + _SUCCESS_END
+
+    if result == "" and type_error == "None" and error == "None":
+        return head + _EMPTY_RESULT
+
+    return b"".join(
+        (
+            head,
+            _RESULT,
+            _encode(result),
+            _TYPE_ERROR,
+            _encode(type_error),
+            _ERROR,
+            _encode(error),
+            _END,
+        )
+    )
+
+
+async def read_expression(request: Request) -> str | None:
+    """
+    Read the expression of a plain `{"expression": "..."}` JSON body.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The expression.
+        None: If the body needs the full validation, because it isn't a JSON
+            object with a string "expression" and no other field sent as JSON.
+    """
+    content_type: str = request.headers.get("content-type", "application/json")
+    if content_type.partition(";")[0].strip().lower() != "application/json":
+        return None
+
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        return None
+
+    if (
+        isinstance(payload, dict)
+        and len(payload) == 1
+        and isinstance(expression := payload.get("expression"), str)
+    ):
+        return expression
+
+    return None
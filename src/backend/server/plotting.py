@@ -0,0 +1,239 @@
+"""
+Adaptive sampling of an expression of one variable, for plotting.
+
+The expression is parsed and compiled once, then evaluated on a coarse
+uniform grid. Each interval of the grid is halved while its midpoint
+strays from the straight line between its ends, or while one side is
+outside the domain of the expression (division by zero, log of a
+negative, ...), down to the width of one pixel column. Straight parts of
+the curve cost a few evaluations, bends and domain boundaries get up to
+two per column.
+
+Results are either the sampled points, with null y where the curve is
+undefined or jumps across a pole, or the min/max envelope of the curve
+over every pixel column.
+"""
+
+from src.backend.interpreter.compiler import Program, compile_tree
+from src.backend.interpreter.interpreter import Interpreter, Scope
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import Node
+
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import math
+
+# widest plot accepted, a request evaluates at most about twice as many points
+MAX_PIXELS: int = 8192
+
+# pixel columns between the points of the initial grid
+GRID_STEP: int = 8
+
+# fewest intervals of the initial grid, so narrow plots still see the curve
+MIN_GRID: int = 16
+
+
+class Curve:
+    """
+    Expression of one variable compiled for sampling.
+
+    Evaluations read the variables and user functions of the interpreter
+    as they were when the curve was made, and never change them.
+
+    Attributes:
+        evaluations (int): Points evaluated.
+        invalid (int): Points where the expression has no finite real value.
+        error (str | None): Message of the first failed evaluation.
+    """
+
+    def __init__(
+        self, tree: Node, variable: str, interpreter: Interpreter, mode: NumericMode
+    ) -> None:
+        """
+        Constructor for Curve.
+
+        Args:
+            tree (Node): Syntax tree of the expression, without assignments.
+            variable (str): Name of the variable bound to each sampled value.
+            interpreter (Interpreter): Interpreter that holds the other variables.
+            mode (NumericMode): Numeric mode of the evaluations.
+
+        Raises:
+            CompileError: If the tree can't be compiled.
+        """
+        self.variable: str = variable
+        self.evaluations: int = 0
+        self.invalid: int = 0
+        self.error: str | None = None
+        self._program: Program = compile_tree(tree, mode)
+        self._convert: Callable[[Any], Any] = mode.convert
+        self._scope: Scope = Scope(
+            interpreter, interpreter.environment.snapshot(), mode
+        )
+
+    def __call__(self, x: float) -> float | None:
+        """
+        Evaluate the expression at a point.
+
+        Args:
+            x (float): Value of the variable.
+
+        Returns:
+            float | None: The value, None if it isn't a finite real number.
+        """
+        self.evaluations += 1
+        self._scope.arguments = {self.variable: Number(self._convert(x))}
+        try:
+            value: Any = self._program(self._scope)
+            y: float | None = None if type(value) is complex else float(value)
+        except (ArithmeticError, ValueError, TypeError, RecursionError) as error:
+            if self.error is None:
+                self.error = str(error)
+            y = None
+
+        if y is None or not math.isfinite(y):
+            self.invalid += 1
+            return None
+        return y
+
+
+@dataclass
+class Samples:
+    """
+    Points of a curve, ordered by x.
+
+    Attributes:
+        x (list[float]): Values of the variable.
+        y (list[float | None]): Values of the curve, None where the line is broken.
+    """
+
+    x: list[float] = field(default_factory=list)
+    y: list[float | None] = field(default_factory=list)
+
+
+def _spread(values: list[float | None]) -> float:
+    # range of the curve without its most extreme values, which poles blow up
+    finite: list[float] = sorted(value for value in values if value is not None)
+    if not finite:
+        return 0.0
+    cut: int = len(finite) // 20
+    return finite[len(finite) - 1 - cut] - finite[cut]
+
+
+def _bends(
+    y0: float | None, middle: float | None, y1: float | None, tolerance: float
+) -> bool:
+    if y0 is None or middle is None or y1 is None:
+        # a domain boundary, unless the whole interval is outside the domain
+        return not (y0 is None and middle is None and y1 is None)
+    return abs(middle - (y0 + y1) / 2) > tolerance
+
+
+def sample(
+    curve: Callable[[float], float | None], start: float, end: float, pixels: int
+) -> Samples:
+    """
+    Sample a curve adaptively, finely where it bends or is undefined.
+
+    Args:
+        curve (Callable[[float], float | None]): The curve, None where it is undefined.
+        start (float): First value of the variable.
+        end (float): Last value of the variable, greater than `start`.
+        pixels (int): Pixel columns of the plot, the finest resolution.
+
+    Returns:
+        Samples: The points, with a None y to break the line across a pole.
+    """
+    column: float = (end - start) / pixels
+    intervals: int = min(pixels, max(MIN_GRID, pixels // GRID_STEP))
+    grid: list[float] = [
+        start + (end - start) * i / intervals for i in range(intervals + 1)
+    ]
+    values: list[float | None] = [curve(x) for x in grid]
+
+    spread: float = _spread(values)
+    tolerance: float = spread / pixels
+    samples: Samples = Samples([grid[0]], [values[0]])
+
+    def refine(x0: float, y0: float | None, x1: float, y1: float | None) -> None:
+        # adds the points after x0 up to x1
+        if x1 - x0 > column:
+            middle: float = (x0 + x1) / 2
+            y: float | None = curve(middle)
+            if _bends(y0, y, y1, tolerance):
+                refine(x0, y0, middle, y)
+                refine(middle, y, x1, y1)
+                return
+            samples.x.append(middle)
+            samples.y.append(y)
+
+        elif (
+            y0 is not None
+            and y1 is not None
+            and y0 * y1 < 0
+            and abs(y1 - y0) > spread
+        ):
+            # changes sign with a jump taller than the plot: a pole, not a line
+            samples.x.append((x0 + x1) / 2)
+            samples.y.append(None)
+
+        samples.x.append(x1)
+        samples.y.append(y1)
+
+    for i in range(intervals):
+        refine(grid[i], values[i], grid[i + 1], values[i + 1])
+    return samples
+
+
+def envelope(
+    samples: Samples, start: float, end: float, pixels: int
+) -> tuple[list[float | None], list[float | None]]:
+    """
+    Lowest and highest value of the sampled curve over every pixel column.
+
+    The curve is taken as straight between consecutive points, so columns
+    crossed by a long straight part get their share of it.
+
+    Args:
+        samples (Samples): Points of the curve.
+        start (float): First value of the variable.
+        end (float): Last value of the variable.
+        pixels (int): Pixel columns of the plot.
+
+    Returns:
+        tuple[list[float | None], list[float | None]]: Minimum and maximum by
+        column, None for columns where the curve is undefined.
+    """
+    low: list[float | None] = [None] * pixels
+    high: list[float | None] = [None] * pixels
+    width: float = (end - start) / pixels
+
+    def include(index: int, value: float) -> None:
+        current: float | None = low[index]
+        if current is None or value < current:
+            low[index] = value
+        current = high[index]
+        if current is None or value > current:
+            high[index] = value
+
+    def column(x: float) -> int:
+        return min(pixels - 1, max(0, int((x - start) / width)))
+
+    points: list[tuple[float, float | None]] = list(zip(samples.x, samples.y))
+    for x, y in points:
+        if y is not None:
+            include(column(x), y)
+
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if y0 is None or y1 is None or x1 <= x0:
+            continue
+        slope: float = (y1 - y0) / (x1 - x0)
+        for index in range(column(x0), column(x1) + 1):
+            left: float = max(x0, start + index * width)
+            right: float = min(x1, start + (index + 1) * width)
+            include(index, y0 + slope * (left - x0))
+            include(index, y0 + slope * (right - x0))
+
+    return low, high
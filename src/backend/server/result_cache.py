@@ -0,0 +1,182 @@
+"""
+Cache of the answers of expressions whose value never changes.
+
+An expression without variables, assignments or user functions always
+evaluates to the same value in a given numeric mode, so its encoded
+answer is kept and sent again without parsing or evaluating anything. The ETag of an answer
+is a digest of its bytes, so it is the same on every server and after
+restarts, and clients may revalidate it with If-None-Match.
+"""
+
+from src.backend.interpreter.values import Number
+from src.backend.parser.nodes import (
+    AssignmentNode,
+    CallNode,
+    FunctionDefinitionNode,
+    Node,
+    VariableNode,
+    iter_nodes,
+)
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import hashlib
+import threading
+
+
+# nodes that read or change the variables and functions of the interpreter
+_STATEFUL: tuple[type[Node], ...] = (
+    VariableNode,
+    AssignmentNode,
+    CallNode,
+    FunctionDefinitionNode,
+)
+
+
+def is_constant(tree: Node) -> bool:
+    """
+    Whether a syntax tree evaluates to the same value whatever the variables are.
+
+    Args:
+        tree (Node): The syntax tree.
+
+    Returns:
+        bool: False if the tree reads or assigns any variable, or calls or defines
+        a user function.
+    """
+    return not any(isinstance(node, _STATEFUL) for node in iter_nodes(tree))
+
+
+def make_etag(body: bytes) -> str:
+    """
+    Strong entity tag of a response body.
+
+    Args:
+        body (bytes): The body.
+
+    Returns:
+        str: The quoted tag.
+    """
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an entity tag, with the weak comparison.
+
+    Args:
+        if_none_match (str | None): The header, if sent.
+        etag (str): The current tag of the response.
+
+    Returns:
+        bool: True if the client already holds the response.
+    """
+    if not if_none_match:
+        return False
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    """
+    Encoded answer of a constant expression.
+
+    Attributes:
+        body (bytes): JSON body of the response.
+        etag (str): Entity tag of the body.
+        value (Number | None): The result, recorded in the history of the
+            interpreter when the answer is sent again.
+    """
+
+    body: bytes
+    etag: str
+    value: Number | None = None
+
+
+class ResultCache:
+    """
+    Least recently used cache of answers by numeric mode and expression text.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Constructor for ResultCache.
+
+        Args:
+            capacity (int): Number of answers kept.
+        """
+        self.capacity: int = capacity
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[tuple[str, str], CachedAnswer] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, mode: str, expression: str) -> CachedAnswer | None:
+        """
+        Cached answer of an expression.
+
+        Args:
+            mode (str): Name of the numeric mode of the evaluation.
+            expression (str): The expression.
+
+        Returns:
+            CachedAnswer | None: The answer, None if it isn't cached.
+        """
+        key: tuple[str, str] = (mode, expression)
+        with self._lock:
+            answer: CachedAnswer | None = self._entries.get(key)
+            if answer is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(
+        self, mode: str, expression: str, body: bytes, value: Number | None = None
+    ) -> CachedAnswer:
+        """
+        Store the answer of a constant expression, evicting the least recently used one.
+
+        Args:
+            mode (str): Name of the numeric mode of the evaluation.
+            expression (str): The expression.
+            body (bytes): JSON body of its response.
+            value (Number | None): The result, None if the expression has an error.
+
+        Returns:
+            CachedAnswer: The stored answer, with its entity tag.
+        """
+        answer: CachedAnswer = CachedAnswer(body, make_etag(body), value)
+        key: tuple[str, str] = (mode, expression)
+        with self._lock:
+            self._entries[key] = answer
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return answer
+
+    def stats(self) -> dict:
+        """
+        Size and hit counters of the cache.
+
+        Returns:
+            dict: Capacity, entries, hits, misses and hit ratio.
+        """
+        lookups: int = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
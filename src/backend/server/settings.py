@@ -0,0 +1,187 @@
+from dataclasses import dataclass, field
+
+import logging
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value: str | None = os.environ.get(name)
+    if value is None:
+        return default
+
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+@dataclass
+class Settings:
+    """
+    Configuration of the web server, read once when the app is created.
+
+    Attributes:
+        log_filename (str): File that keeps the logs, recreated on startup.
+        log_level (int): Level of the logs written to `log_filename`.
+        allocation_profiling (bool): Whether to profile allocations of every request.
+        origins (list[str]): Origins allowed by CORS.
+        admission_control (bool): Whether `/expressions` goes through the admission control.
+        max_concurrency (int): Expressions evaluated at the same time.
+        max_queue (int): Requests allowed to wait for an evaluation slot.
+        queue_timeout (float): Seconds a request may wait for an evaluation slot.
+        expensive_concurrency (int): Slots that expensive expressions may hold at once.
+        cost_threshold (int): Estimated cost from which an expression is expensive.
+        rate_limit (float): Requests per second allowed for each client, 0 to disable.
+        rate_burst (float): Requests a client may send at once after being idle.
+        snapshot_path (str | None): File where the variables are persisted, None to disable.
+        snapshot_interval (float): Seconds between periodic snapshots, 0 for shutdown only.
+        snapshot_journal (bool): Whether to journal every change between snapshots.
+        snapshot_journal_sync (bool): Whether every journal entry is synced to disk
+            before the change is acknowledged; without it, a power failure may lose
+            the latest changes.
+        parse_cache_size (int): Syntax trees kept by the parse cache, 0 to disable it.
+        warmup_top (int): Most frequent past expressions parsed on startup, 0 to disable.
+        warmup_history (str | None): Log or frequency file to warm up from, None for the
+            log of the previous run.
+        max_batch_size (int): Expressions accepted by one batch request.
+        max_line_length (int): Longest line of a streamed body, in bytes.
+        fast_serialization (bool): Whether `/expressions` skips the pydantic models
+            for plain JSON bodies.
+        max_documents (int): Documents kept for incremental editing.
+        result_cache_size (int): Answers of constant expressions kept, 0 to disable it.
+        result_max_age (int): Seconds clients may reuse the answer of a constant
+            expression without asking again.
+        tier_threshold (int): Evaluations of an expression before it is compiled,
+            0 to always use the interpreter.
+        tier_capacity (int): Expressions whose evaluations are counted for tiering.
+        numeric_mode (str): Numeric mode of requests that don't choose one: "exact",
+            "float64" or "decimal:N".
+        function_memo_size (int): Results remembered by each pure user function of
+            the server and WebSocket interpreters, 0 to disable the memo.
+        history_size (int): Last results of the server and WebSocket interpreters
+            kept as `ans` and `_N`, 0 to keep none.
+    """
+
+    log_filename: str = "app.log"
+    log_level: int = logging.INFO
+    allocation_profiling: bool = False
+    origins: list[str] = field(
+        default_factory=lambda: [
+            "http://127.0.0.1:8080",
+            "http://localhost:8080",
+            "http://127.0.0.1:3000",
+            "http://localhost:3000",
+        ]
+    )
+    admission_control: bool = True
+    max_concurrency: int = 4
+    max_queue: int = 64
+    queue_timeout: float = 2.0
+    expensive_concurrency: int = 1
+    cost_threshold: int = 64
+    rate_limit: float = 0.0
+    rate_burst: float = 20.0
+    snapshot_path: str | None = None
+    snapshot_interval: float = 60.0
+    snapshot_journal: bool = False
+    snapshot_journal_sync: bool = True
+    parse_cache_size: int = 4096
+    warmup_top: int = 1000
+    warmup_history: str | None = None
+    max_batch_size: int = 10000
+    max_line_length: int = 1048576
+    fast_serialization: bool = False
+    max_documents: int = 1000
+    result_cache_size: int = 4096
+    result_max_age: int = 86400
+    tier_threshold: int = 32
+    tier_capacity: int = 4096
+    numeric_mode: str = "exact"
+    function_memo_size: int = 256
+    history_size: int = 100
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build the settings from environment variables, falling back to the defaults.
+
+        Variables:
+            LOG_FILENAME, LOG_LEVEL (name like "INFO"), ALLOCATION_PROFILING,
+            CORS_ORIGINS (comma separated), ADMISSION_CONTROL, MAX_CONCURRENCY,
+            MAX_QUEUE, QUEUE_TIMEOUT, EXPENSIVE_CONCURRENCY, COST_THRESHOLD,
+            RATE_LIMIT, RATE_BURST, SNAPSHOT_PATH, SNAPSHOT_INTERVAL,
+            SNAPSHOT_JOURNAL, SNAPSHOT_JOURNAL_SYNC, PARSE_CACHE_SIZE, WARMUP_TOP,
+            WARMUP_HISTORY, MAX_BATCH_SIZE, MAX_LINE_LENGTH, FAST_SERIALIZATION,
+            MAX_DOCUMENTS, RESULT_CACHE_SIZE, RESULT_MAX_AGE, TIER_THRESHOLD,
+            TIER_CAPACITY, NUMERIC_MODE, FUNCTION_MEMO_SIZE, HISTORY_SIZE.
+
+        Returns:
+            Settings: The server configuration.
+        """
+        settings: Settings = cls()
+        settings.log_filename = os.environ.get("LOG_FILENAME", settings.log_filename)
+        settings.log_level = logging.getLevelName(
+            os.environ.get("LOG_LEVEL", logging.getLevelName(settings.log_level))
+        )
+        settings.allocation_profiling = _env_bool(
+            "ALLOCATION_PROFILING", settings.allocation_profiling
+        )
+        settings.admission_control = _env_bool(
+            "ADMISSION_CONTROL", settings.admission_control
+        )
+        settings.max_concurrency = _env_int("MAX_CONCURRENCY", settings.max_concurrency)
+        settings.max_queue = _env_int("MAX_QUEUE", settings.max_queue)
+        settings.queue_timeout = _env_float("QUEUE_TIMEOUT", settings.queue_timeout)
+        settings.expensive_concurrency = _env_int(
+            "EXPENSIVE_CONCURRENCY", settings.expensive_concurrency
+        )
+        settings.cost_threshold = _env_int("COST_THRESHOLD", settings.cost_threshold)
+        settings.rate_limit = _env_float("RATE_LIMIT", settings.rate_limit)
+        settings.rate_burst = _env_float("RATE_BURST", settings.rate_burst)
+        settings.snapshot_path = (
+            os.environ.get("SNAPSHOT_PATH", settings.snapshot_path) or None
+        )
+        settings.snapshot_interval = _env_float(
+            "SNAPSHOT_INTERVAL", settings.snapshot_interval
+        )
+        settings.snapshot_journal = _env_bool(
+            "SNAPSHOT_JOURNAL", settings.snapshot_journal
+        )
+        settings.snapshot_journal_sync = _env_bool(
+            "SNAPSHOT_JOURNAL_SYNC", settings.snapshot_journal_sync
+        )
+        settings.parse_cache_size = _env_int(
+            "PARSE_CACHE_SIZE", settings.parse_cache_size
+        )
+        settings.warmup_top = _env_int("WARMUP_TOP", settings.warmup_top)
+        settings.warmup_history = (
+            os.environ.get("WARMUP_HISTORY", settings.warmup_history) or None
+        )
+        settings.max_batch_size = _env_int("MAX_BATCH_SIZE", settings.max_batch_size)
+        settings.max_line_length = _env_int(
+            "MAX_LINE_LENGTH", settings.max_line_length
+        )
+        settings.fast_serialization = _env_bool(
+            "FAST_SERIALIZATION", settings.fast_serialization
+        )
+        settings.max_documents = _env_int("MAX_DOCUMENTS", settings.max_documents)
+        settings.result_cache_size = _env_int(
+            "RESULT_CACHE_SIZE", settings.result_cache_size
+        )
+        settings.result_max_age = _env_int("RESULT_MAX_AGE", settings.result_max_age)
+        settings.tier_threshold = _env_int("TIER_THRESHOLD", settings.tier_threshold)
+        settings.tier_capacity = _env_int("TIER_CAPACITY", settings.tier_capacity)
+        settings.numeric_mode = os.environ.get("NUMERIC_MODE", settings.numeric_mode)
+        settings.function_memo_size = _env_int(
+            "FUNCTION_MEMO_SIZE", settings.function_memo_size
+        )
+        settings.history_size = _env_int("HISTORY_SIZE", settings.history_size)
+        if origins := os.environ.get("CORS_ORIGINS"):
+            settings.origins = [origin.strip() for origin in origins.split(",")]
+
+        return settings
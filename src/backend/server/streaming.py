@@ -0,0 +1,76 @@
+from typing import AsyncIterator
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# longest line of a streamed body, buffered until its line ending arrives
+MAX_LINE_LENGTH: int = 1 << 20
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response that can be sent while the request body is still being read.
+
+    Starlette's StreamingResponse may listen for the client disconnect by
+    consuming `receive()`, which would steal the request body chunks from an
+    endpoint that streams its answer while reading. Here only the response
+    is sent, and a disconnect surfaces as an error when reading or sending.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+class LineTooLong(ValueError):
+    """
+    Raised when a line of a streamed body is longer than allowed.
+    """
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes], max_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[bytes]:
+    """
+    Split a stream of byte chunks into lines, without the line endings.
+
+    Only the incomplete last line of the received data is buffered, so the
+    whole body is never held in memory.
+
+    Args:
+        chunks (AsyncIterator[bytes]): Chunks of the request body.
+        max_length (int): Longest line accepted, in bytes.
+
+    Returns:
+        AsyncIterator[bytes]: The lines, in order.
+
+    Raises:
+        LineTooLong: If a line is longer than `max_length`, before buffering more of it.
+    """
+
+    def checked(line: bytes | bytearray) -> bytes | bytearray:
+        if len(line) > max_length:
+            raise LineTooLong(f"A line may hold at most {max_length} bytes.")
+        return line
+
+    pending: bytearray = bytearray()
+    async for chunk in chunks:
+        end: int = chunk.rfind(b"\n")
+        if end < 0:
+            pending += chunk
+            checked(pending)
+            continue
+
+        pending += chunk[:end]
+        for line in bytes(pending).split(b"\n"):
+            yield checked(line).rstrip(b"\r")
+        pending = bytearray(checked(chunk[end + 1 :]))
+
+    if pending:
+        yield bytes(pending).rstrip(b"\r")
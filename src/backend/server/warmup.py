@@ -0,0 +1,174 @@
+from src.backend.parser.cache import ParseCache
+from src.backend.parser.nodes import Node
+
+from collections import Counter
+from typing import Callable, Iterable
+
+import logging
+import re
+import time
+
+log = logging.getLogger(__name__)
+
+# line written by `interpret` for every successful evaluation
+_LOG_LINE: re.Pattern = re.compile(r" - INFO - Expression: (.*)$")
+
+# start of a function definition like "f(x, y) = ...", whose logged result
+# is the definition again
+_DEFINITION: re.Pattern = re.compile(r"\s*([A-Za-z_]\w*)\s*\(([^()]*)\)\s*=")
+
+
+def _logged_expression(text: str) -> str | None:
+    # the result of a definition is written "f(x, y) = body", with its own " = "
+    if definition := _DEFINITION.match(text):
+        name, parameters = definition.groups()
+        signature: str = ", ".join(
+            parameter.strip() for parameter in parameters.split(",")
+        )
+        end: int = text.rfind(f" = {name}({signature}) = ")
+        if end > 0:
+            return text[:end]
+
+    expression, separator, _ = text.rpartition(" = ")
+    return expression if separator else None
+
+
+def read_history(lines: Iterable[str]) -> Counter[str]:
+    """
+    Count how often each expression was evaluated.
+
+    Accepts the server log, where the result follows the last " = " of an
+    `Expression: ... = ...` line (or the " = " before the signature, for
+    function definitions), and frequency files with one
+    "<count><TAB><expression>" per line. Other lines are ignored.
+
+    Args:
+        lines (Iterable[str]): Lines of the history file.
+
+    Returns:
+        Counter[str]: Number of evaluations per expression.
+    """
+    counts: Counter[str] = Counter()
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if match := _LOG_LINE.search(line):
+            expression: str | None = _logged_expression(match.group(1))
+            if expression is not None:
+                counts[expression] += 1
+            continue
+
+        count, separator, text = line.partition("\t")
+        if separator and count.isdigit() and text:
+            counts[text] += int(count)
+
+    return counts
+
+
+class Warmup:
+    """
+    Parse the most frequent expressions of past traffic into the parse cache.
+
+    Meant to run in a worker thread while the server already answers, with
+    its progress read from `status()` at any time.
+    """
+
+    def __init__(self, history: str, top: int) -> None:
+        """
+        Constructor for Warmup.
+
+        Args:
+            history (str): Server log or frequency file of past traffic.
+            top (int): Number of most frequent expressions to parse.
+        """
+        self.history: str = history
+        self.top: int = top
+        self.state: str = "pending"
+        self.total: int = 0
+        self.parsed: int = 0
+        self.failed: int = 0
+        self.distinct: int = 0
+        self.requests: int = 0
+        self.covered_requests: int = 0
+        self.seconds: float = 0.0
+
+    def run(
+        self,
+        cache: ParseCache,
+        on_parsed: Callable[[Node, int], None] | None = None,
+    ) -> None:
+        """
+        Read the history and parse its top expressions into a cache.
+
+        Args:
+            cache (ParseCache): Cache to fill.
+            on_parsed (Callable[[Node, int], None] | None): Called with the syntax tree
+                of every parsed expression and its number of past evaluations.
+        """
+        started: float = time.perf_counter()
+        self.state = "running"
+        try:
+            with open(self.history, encoding="utf-8", errors="replace") as file:
+                counts: Counter[str] = read_history(file)
+
+            self.distinct = len(counts)
+            self.requests = sum(counts.values())
+            selected: list[tuple[str, int]] = counts.most_common(
+                min(self.top, cache.capacity)
+            )
+            self.total = len(selected)
+
+            # least frequent first, so the most frequent are the last evicted
+            for expression, count in reversed(selected):
+                try:
+                    tree: Node | None = cache.parse(expression)
+                except Exception:
+                    self.failed += 1
+                    continue
+
+                if on_parsed is not None and tree is not None:
+                    on_parsed(tree, count)
+                self.parsed += 1
+                self.covered_requests += count
+
+            self.state = "done"
+
+        except FileNotFoundError:
+            self.state = "no_history"
+
+        except OSError as error:
+            log.error("Warm-up failed reading %s: %s", self.history, error)
+            self.state = "failed"
+
+        self.seconds = time.perf_counter() - started
+        log.info(
+            "Warm-up %s: %d of %d expressions parsed, covering %d of %d requests",
+            self.state,
+            self.parsed,
+            self.total,
+            self.covered_requests,
+            self.requests,
+        )
+
+    def status(self) -> dict:
+        """
+        Progress and coverage of the warm-up.
+
+        Returns:
+            dict: State, expressions parsed so far and share of past requests they cover.
+        """
+        return {
+            "state": self.state,
+            "history": self.history,
+            "top": self.top,
+            "total": self.total,
+            "parsed": self.parsed,
+            "failed": self.failed,
+            "progress": (self.parsed + self.failed) / self.total if self.total else 1.0,
+            "distinct_expressions": self.distinct,
+            "history_requests": self.requests,
+            "covered_requests": self.covered_requests,
+            "coverage": (
+                self.covered_requests / self.requests if self.requests else 0.0
+            ),
+            "seconds": self.seconds,
+        }
@@ -16,6 +16,7 @@ class Operations(metaclass=_OperationsMeta):
     LEFT_PARENTHESES: str = "("
     RIGHT_PARENTHESES: str = ")"
     EQUAL: str = "="
+    COMMA: str = ","
 
     # Named operations
     LOG: str = "log"
@@ -35,6 +36,7 @@ class Operations(metaclass=_OperationsMeta):
             cls.RIGHT_PARENTHESES,
             cls.LEFT_PARENTHESES,
             cls.EQUAL,
+            cls.COMMA,
         ]
 
     @classmethod
@@ -1,5 +1,5 @@
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 
@@ -23,16 +23,25 @@ class TokenType(Enum):
     COS = 12
     SQRT = 13
     EXP = 14
+    COMMA = 15
 
 
 @dataclass
 class Token:
     """
     Minimal package of information to use in Lexer
+
+    Attributes:
+        type (TokenType): Kind of the token
+        value (Any): Number or variable name, None for symbols
+        start (int | None): Offset of the first character in the text, ignored in comparisons
+        end (int | None): Offset after the last character in the text, ignored in comparisons
     """
 
     type: TokenType
     value: Any = None
+    start: int | None = field(default=None, compare=False)
+    end: int | None = field(default=None, compare=False)
 
     def __repr__(self) -> str:
         return self.type.name + (f": {self.value}" if self.value is not None else "")
@@ -0,0 +1,320 @@
+"""
+Opt-in allocation profiling of the lexing, parsing and evaluation stages.
+
+Usage (from the repository root):
+    python -m src.backend.utils.profiling "1+2" "x = 3^200" "x*2"
+    python -m src.backend.utils.profiling < expressions.txt
+"""
+
+from src.backend.lexer.lexer import Lexer
+from src.backend.parser.arithmetic_parser import Parser
+from src.backend.parser.nodes import Node
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import NumericMode
+from src.backend.interpreter.values import Number
+
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+import argparse
+import json
+import sys
+import tracemalloc
+
+
+@dataclass
+class StageAllocations:
+    """
+    Memory used by one stage of one request.
+
+    Attributes:
+        peak_bytes (int): Highest traced memory during the stage, above the stage start.
+        retained_bytes (int): Traced memory still alive when the stage ended, above the stage start.
+    """
+
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+
+
+@dataclass
+class RequestAllocations:
+    """
+    Memory used by the stages of one evaluated expression.
+
+    Attributes:
+        expression (str): The evaluated expression.
+        stages (dict[str, StageAllocations]): Allocations per stage, in execution order.
+        peak_bytes (int): Highest traced memory during the request, above the request start.
+        retained_bytes (int): Traced memory still alive after the request, above the request start.
+    """
+
+    expression: str
+    stages: dict[str, StageAllocations] = field(default_factory=dict)
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+    _base: int = field(default=0, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageAllocations]:
+        """
+        Measure the allocations of a stage.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        allocations: StageAllocations = StageAllocations()
+        self.stages[name] = allocations
+
+        try:
+            yield allocations
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            allocations.peak_bytes = peak - start
+            allocations.retained_bytes = current - start
+            self.peak_bytes = max(self.peak_bytes, peak - self._base)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "expression": self.expression,
+            "peak_bytes": self.peak_bytes,
+            "retained_bytes": self.retained_bytes,
+            "stages": {
+                name: {
+                    "peak_bytes": stage.peak_bytes,
+                    "retained_bytes": stage.retained_bytes,
+                }
+                for name, stage in self.stages.items()
+            },
+        }
+
+
+@dataclass
+class _StageTotals:
+    count: int = 0
+    peak_bytes_total: int = 0
+    peak_bytes_max: int = 0
+    retained_bytes_total: int = 0
+
+    def add(self, stage: StageAllocations) -> None:
+        self.count += 1
+        self.peak_bytes_total += stage.peak_bytes
+        self.peak_bytes_max = max(self.peak_bytes_max, stage.peak_bytes)
+        self.retained_bytes_total += stage.retained_bytes
+
+
+class AllocationProfiler:
+    """
+    Record peak and retained memory per stage and per request using tracemalloc.
+
+    When disabled, tracemalloc is never started and callers are expected to
+    skip the profiler entirely, so the normal request path pays nothing.
+    Measurements rely on the global tracemalloc counters, so requests being
+    evaluated concurrently are attributed to each other.
+    """
+
+    def __init__(self, enabled: bool = False, history: int = 100, frames: int = 1):
+        """
+        Constructor for AllocationProfiler.
+
+        Args:
+            enabled (bool): Whether profiling is active.
+            history (int): Number of recent requests kept for the report.
+            frames (int): Traceback depth stored by tracemalloc for each allocation.
+        """
+        self.enabled: bool = enabled
+        self.frames: int = frames
+        self.requests: int = 0
+        self.recent: deque[RequestAllocations] = deque(maxlen=history)
+        self._totals: dict[str, _StageTotals] = {}
+
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        """
+        Stop tracing allocations and disable the profiler.
+        """
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def request(self, expression: str) -> Iterator[RequestAllocations]:
+        """
+        Measure one request, whose stages are measured with `RequestAllocations.stage`.
+
+        Args:
+            expression (str): The expression handled by the request.
+        """
+        start, _ = tracemalloc.get_traced_memory()
+        record: RequestAllocations = RequestAllocations(expression, _base=start)
+
+        try:
+            yield record
+        finally:
+            current, _ = tracemalloc.get_traced_memory()
+            record.retained_bytes = current - start
+            self.requests += 1
+            self.recent.append(record)
+            for name, stage in record.stages.items():
+                self._totals.setdefault(name, _StageTotals()).add(stage)
+
+    def evaluate(
+        self,
+        text: str,
+        interpreter: Interpreter,
+        mode: NumericMode | None = None,
+        record: bool = True,
+    ) -> Number | None:
+        """
+        Lex, parse and evaluate an expression, measuring each stage.
+
+        Args:
+            text (str): The expression to evaluate.
+            interpreter (Interpreter): Interpreter used for the evaluation.
+            mode (NumericMode | None): Numeric mode, the default one of the interpreter if None.
+            record (bool): Whether to add the result to the history of the interpreter.
+
+        Returns:
+            Number | None: The result, or None if the expression is empty.
+        """
+        with self.request(text) as allocations:
+            # tokens are materialized here so both stages are measured apart
+            with allocations.stage("lexing"):
+                tokens: list = list(Lexer(text).generate_tokens())
+
+            with allocations.stage("parsing"):
+                expression: Node | None = Parser(tokens).parse()
+
+            if expression is None:
+                return None
+
+            with allocations.stage("evaluation"):
+                return interpreter.evaluate(expression, mode, record)
+
+    def top_sites(self, limit: int = 10) -> list[dict[str, Any]]:
+        """
+        Group the memory currently retained by allocation site.
+
+        Args:
+            limit (int): Number of sites to return.
+
+        Returns:
+            list[dict[str, Any]]: Biggest sites first, with retained size and block count.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+
+    def report(self, limit: int = 10) -> dict[str, Any]:
+        """
+        Aggregate the recorded requests.
+
+        Args:
+            limit (int): Number of allocation sites and recent requests to include.
+
+        Returns:
+            dict[str, Any]: Totals per stage, recent requests and top allocation sites.
+        """
+        current, peak = (
+            tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        )
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "traced": {"current_bytes": current, "peak_bytes": peak},
+            "stages": {
+                name: {
+                    "count": totals.count,
+                    "peak_bytes_avg": totals.peak_bytes_total / totals.count,
+                    "peak_bytes_max": totals.peak_bytes_max,
+                    "retained_bytes_avg": totals.retained_bytes_total / totals.count,
+                    "retained_bytes_total": totals.retained_bytes_total,
+                }
+                for name, totals in self._totals.items()
+            },
+            "recent": [record.as_dict() for record in list(self.recent)[-limit:]],
+            "top_sites": self.top_sites(limit),
+        }
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """
+    Render a profiler report as readable text.
+
+    Args:
+        report (dict[str, Any]): Output of `AllocationProfiler.report()`.
+
+    Returns:
+        str: Human readable report.
+    """
+    lines: list[str] = [
+        f"requests: {report['requests']}  traced now: "
+        f"{report['traced']['current_bytes']} B  traced peak: "
+        f"{report['traced']['peak_bytes']} B",
+        "",
+        f"{'stage':>12}  {'count':>7}  {'peak avg':>10}  {'peak max':>10}  "
+        f"{'retained avg':>12}  {'retained total':>14}",
+    ]
+
+    for name, stage in report["stages"].items():
+        lines.append(
+            f"{name:>12}  {stage['count']:>7}  {stage['peak_bytes_avg']:>10.0f}  "
+            f"{stage['peak_bytes_max']:>10}  {stage['retained_bytes_avg']:>12.0f}  "
+            f"{stage['retained_bytes_total']:>14}"
+        )
+
+    lines += ["", "top allocation sites (retained):"]
+    for site in report["top_sites"]:
+        lines.append(f"{site['size_bytes']:>12} B  {site['count']:>7} blocks  {site['site']}")
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    arguments.add_argument("expressions", nargs="*", help="expressions to evaluate")
+    arguments.add_argument("--limit", type=int, default=10)
+    arguments.add_argument("--frames", type=int, default=1)
+    arguments.add_argument("--json", action="store_true", help="print a JSON report")
+    options = arguments.parse_args(argv)
+
+    expressions = options.expressions or (line.strip() for line in sys.stdin)
+    profiler: AllocationProfiler = AllocationProfiler(
+        enabled=True, history=options.limit, frames=options.frames
+    )
+    interpreter: Interpreter = Interpreter()
+
+    for expression in expressions:
+        if not expression:
+            continue
+        try:
+            profiler.evaluate(expression, interpreter)
+        except Exception as error:
+            print(f"Error in expression '{expression}': {error}", file=sys.stderr)
+
+    report: dict[str, Any] = profiler.report(options.limit)
+    profiler.stop()
+    print(json.dumps(report, indent=2) if options.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,8 @@ const resetButton = document.getElementById('reset-button');
 
 /** @description URL base para o API. */
 const apiUrl = 'http://127.0.0.1:8000'
+/** @description Modo numérico das expressões ("exact", "float64" ou "decimal:N"), null para o padrão do servidor. */
+const numericMode = null;
 
 // --- Functions ---
 
@@ -27,51 +29,372 @@ function addOperator(operator) {
     inputField.focus()
 }
 
+// --- Request Coalescing ---
+
+/** @description Tempo (ms) que o envio espera por novas expressões antes de ir para a API. */
+const debounceDelay = 150;
 /**
- * Envia de maneira assíncrona a expressão matemática do input para a API do backend para análise.
- * Ele trata a resposta da API, atualizando o frontend ou com um resultado ou com uma mensagem de erro.
- * Também trata os erros de conexão se a API não estiver disponível.
- * @async
- * @returns {Promise<void>} Uma promessa que é cumprida quando a operação de busca e a atualização do frontend foram completadas.
+ * @description Tempo (ms) que as expressões respondidas pelo cache local esperam
+ * antes de ir para o histórico do servidor, junto com as que chegarem depois.
  */
-const sendExpression = async () => {
-    const expression = inputField.value;
-    if (!expression) {
-        result.textContent = '0';
+const recordDelay = 2000;
+/** @description Máximo de resultados guardados no cache local. */
+const cacheSize = 256;
+/** @description Funções nativas do interpretador, as únicas palavras de uma expressão sem variáveis. */
+const builtinFunctions = new Set(['sqrt', 'log', 'sin', 'cos', 'exp']);
+
+/** @description Resultados de expressões sem variáveis por modo e expressão, do mais antigo para o mais recente uso. */
+const resultCache = new Map();
+/**
+ * @description Se o servidor guarda o histórico de resultados (ans, _N). Enquanto
+ * for verdadeiro, toda expressão chega ao servidor, em ordem, para que o
+ * histórico e os logs do servidor vejam o mesmo que o usuário; as acumuladas
+ * vão juntas em um lote "shared", avaliado pelo interpretador do servidor.
+ */
+let serverKeepsHistory = true;
+/** @description Expressões enviadas pelo usuário que aguardam o fim do debounce. */
+let pendingExpressions = [];
+/** @description Timer do debounce em andamento. */
+let debounceTimer = null;
+/** @description Controlador que cancela as requisições do último envio. */
+let currentController = null;
+/** @description Promessa do último envio, cada envio espera o anterior terminar. */
+let lastFlush = Promise.resolve();
+
+/**
+ * Verifica se o resultado de uma expressão depende apenas do seu texto.
+ * Expressões sem atribuições, variáveis, funções do usuário e referências ao
+ * histórico (ans, _N) dão sempre o mesmo resultado.
+ * @param {string} expression Expressão digitada.
+ * @returns {boolean} Verdadeiro se a expressão pode ser guardada no cache local.
+ */
+function isVariableFree(expression) {
+    if (expression.includes('=')) {
+        return false;
+    }
+    const names = expression.match(/[A-Za-z_]\w*/g) || [];
+    return names.every((name) => builtinFunctions.has(name));
+}
+
+/**
+ * Verifica se uma expressão pode ser respondida sem o interpretador do servidor,
+ * pelo cache local ou pelo endpoint de lote, que não registram no histórico.
+ * @param {string} expression Expressão digitada.
+ * @returns {boolean} Verdadeiro se a expressão não tem variáveis e o servidor não guarda histórico.
+ */
+function isAnsweredLocally(expression) {
+    return !serverKeepsHistory && isVariableFree(expression);
+}
+
+/**
+ * Chave de uma expressão no cache local, que inclui o modo numérico.
+ * @param {string} expression Expressão digitada.
+ * @returns {string} A chave.
+ */
+function cacheKey(expression) {
+    return `${numericMode || 'default'}\n${expression}`;
+}
+
+/**
+ * Corpo da requisição de uma expressão para /expressions.
+ * @param {string} expression Expressão digitada.
+ * @returns {object} A expressão e, se escolhido, o modo numérico.
+ */
+function expressionBody(expression) {
+    return numericMode ? { expression: expression, numeric_mode: numericMode } : { expression: expression };
+}
+
+/**
+ * Corpo da requisição de um lote de expressões para /expressions/batch.
+ * @param {string[]} expressions Expressões, em ordem.
+ * @param {string} mode "stateless" para avaliar cada uma sozinha, "shared" para o interpretador do servidor.
+ * @returns {object} As expressões, o modo e, se escolhido, o modo numérico.
+ */
+function batchBody(expressions, mode) {
+    return numericMode
+        ? { expressions: expressions, mode: mode, numeric_mode: numericMode }
+        : { expressions: expressions, mode: mode };
+}
+
+/**
+ * Guarda o resultado de uma expressão sem variáveis, descartando o usado há mais tempo.
+ * Apenas resultados sem erro são guardados.
+ * @param {string} expression Expressão avaliada.
+ * @param {object} data Resposta da API para a expressão.
+ */
+function rememberResult(expression, data) {
+    if (data.error) {
         return;
     }
+    const key = cacheKey(expression);
+    resultCache.delete(key);
+    resultCache.set(key, data);
+    if (resultCache.size > cacheSize) {
+        resultCache.delete(resultCache.keys().next().value);
+    }
+}
 
-    const apiUrl_expressions = apiUrl + "/expressions"
+/**
+ * Busca o resultado de uma expressão no cache local, marcando-o como usado.
+ * @param {string} expression Expressão digitada.
+ * @returns {object | undefined} Resposta guardada, ou undefined se não houver.
+ */
+function recallResult(expression) {
+    const key = cacheKey(expression);
+    const data = resultCache.get(key);
+    if (data !== undefined) {
+        resultCache.delete(key);
+        resultCache.set(key, data);
+    }
+    return data;
+}
+
+/**
+ * Consulta se o servidor guarda o histórico de resultados, o que decide se o
+ * cache local e o endpoint de lote podem ser usados. Na falta de resposta,
+ * considera que guarda.
+ * @async
+ * @returns {Promise<void>} Uma promessa que é cumprida quando a consulta termina.
+ */
+const checkServerHistory = async () => {
+    try {
+        const response = await fetch(apiUrl + '/history');
+        const data = await response.json();
+        serverKeepsHistory = !response.ok || data.size > 0;
+    } catch (error) {
+        serverKeepsHistory = true;
+    }
+    resultCache.clear();
+};
 
+/**
+ * Envia um JSON para a API e retorna a resposta decodificada.
+ * @async
+ * @param {string} path Caminho do endpoint.
+ * @param {object} body Corpo da requisição.
+ * @param {AbortSignal | undefined} signal Sinal para cancelar a requisição.
+ * @returns {Promise<object | null>} Resposta da API, ou null se o status HTTP for de erro ou a requisição foi cancelada.
+ */
+const postJson = async (path, body, signal) => {
+    let data;
+    let response;
     try {
-        const response = await fetch(apiUrl_expressions, {
+        response = await fetch(apiUrl + path, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ expression: expression }),
+            body: JSON.stringify(body),
+            signal: signal,
         });
+        data = await response.json();
+    } catch (error) {
+        if (error.name === 'AbortError') {
+            return null;
+        }
+        throw error;
+    }
 
-        const data = await response.json();
+    if (!response.ok) {
+        console.error('Erro com a resposta da requisição HTTP.', data);
+        return null;
+    }
+    return data;
+};
 
-        if (response.ok) {
-            // if error is null
-            if (!data.error) {
-                // If it is a success, show the API result
-                result.textContent = `${data.result}`;
-                errorArea.textContent = ''; // cleanup previous errors
-            } else {
-                // If it has a error, show error type and API message.
-                result.textContent = '';
-                errorArea.textContent = `${data.type_error}:` + `\n${data.error}`;
+/**
+ * Mostra a resposta da API para uma expressão no frontend.
+ * @param {object | null} data Resposta da API, null se a requisição falhou.
+ */
+function showResponse(data) {
+    if (!data) {
+        return;
+    }
+    // if error is null
+    if (!data.error) {
+        // If it is a success, show the API result
+        result.textContent = `${data.result}`;
+        errorArea.textContent = ''; // cleanup previous errors
+    } else {
+        // If it has a error, show error type and API message.
+        result.textContent = '';
+        errorArea.textContent = `${data.type_error}:` + `\n${data.error}`;
+    }
+}
+
+/**
+ * Avalia as expressões sem variáveis que não estão no cache local.
+ * Uma expressão vai sozinha para /expressions, várias vão juntas em uma
+ * requisição para /expressions/batch, que as avalia sem estado.
+ * @async
+ * @param {string[]} expressions Expressões distintas, sem variáveis.
+ * @param {AbortSignal} signal Sinal para cancelar a requisição.
+ * @returns {Promise<Map<string, object>>} Resposta da API por expressão.
+ */
+const evaluateConstants = async (expressions, signal) => {
+    const responses = new Map();
+    if (expressions.length === 1) {
+        const data = await postJson('/expressions', expressionBody(expressions[0]), signal);
+        if (data) {
+            responses.set(expressions[0], data);
+        }
+    } else if (expressions.length > 1) {
+        const data = await postJson('/expressions/batch', batchBody(expressions, 'stateless'), signal);
+        (data || []).forEach((item, index) => responses.set(expressions[index], item));
+    }
+    responses.forEach((data, expression) => rememberResult(expression, data));
+    return responses;
+};
+
+/**
+ * Envia as expressões acumuladas para o servidor que guarda histórico, em uma
+ * única requisição: /expressions para uma só, um lote "shared" para várias.
+ * Todas entram no histórico em ordem, mesmo as já respondidas pelo cache local
+ * e mesmo se um envio mais novo começar, que apenas impede mostrar o resultado.
+ * @async
+ * @param {string[]} expressions Expressões na ordem em que foram enviadas.
+ * @param {AbortController} controller Controlador que indica se este envio foi superado.
+ * @returns {Promise<void>} Uma promessa que é cumprida quando a resposta foi tratada.
+ */
+const flushToHistory = async (expressions, controller) => {
+    let responses;
+    if (expressions.length === 1) {
+        const data = await postJson('/expressions', expressionBody(expressions[0]));
+        responses = data ? [data] : [];
+    } else {
+        responses = await postJson('/expressions/batch', batchBody(expressions, 'shared')) || [];
+    }
+
+    responses.forEach((data, index) => {
+        if (isVariableFree(expressions[index])) {
+            rememberResult(expressions[index], data);
+        }
+    });
+    if (!controller.signal.aborted) {
+        showResponse(responses[responses.length - 1] || null);
+    }
+};
+
+/**
+ * Envia para a API as expressões acumuladas durante o debounce e mostra o
+ * resultado da última. Se o servidor guarda histórico, vão todas juntas em
+ * uma requisição. Se não guarda, as que não têm
+ * variáveis saem do cache local ou vão juntas em uma única requisição. As
+ * demais vão uma por vez, em ordem, para que cada uma veja as variáveis
+ * definidas pelas anteriores e entre no histórico. Quando um envio mais novo
+ * começa, o resultado deste não é mostrado; sem histórico no servidor, as
+ * requisições que apenas leem valores também são canceladas.
+ * @async
+ * @param {string[]} expressions Expressões na ordem em que foram enviadas.
+ * @param {AbortController} controller Controlador que cancela este envio.
+ * @returns {Promise<void>} Uma promessa que é cumprida quando todas as expressões foram tratadas.
+ */
+const flushExpressions = async (expressions, controller) => {
+    if (serverKeepsHistory) {
+        return flushToHistory(expressions, controller);
+    }
+
+    const constants = [...new Set(expressions.filter(
+        (expression) => isAnsweredLocally(expression) && !resultCache.has(cacheKey(expression))
+    ))];
+    const constantsDone = evaluateConstants(constants, controller.signal);
+
+    const responses = new Map();
+    for (const expression of expressions) {
+        if (isAnsweredLocally(expression)) {
+            continue;
+        }
+        // assignments must reach the server even if this flush was superseded
+        const required = expression.includes('=');
+        if (controller.signal.aborted && !required) {
+            continue;
+        }
+        responses.set(expression, await postJson(
+            '/expressions', expressionBody(expression), required ? undefined : controller.signal
+        ));
+    }
+
+    const constantResponses = await constantsDone;
+    if (controller.signal.aborted) {
+        return;
+    }
+    const last = expressions[expressions.length - 1];
+    showResponse(
+        isAnsweredLocally(last)
+            ? constantResponses.get(last) || recallResult(last) || null
+            : responses.get(last)
+    );
+};
+
+/**
+ * Agenda o envio das expressões acumuladas, substituindo o agendamento anterior.
+ * @param {number} delay Tempo (ms) até o envio.
+ */
+function scheduleFlush(delay) {
+    clearTimeout(debounceTimer);
+    debounceTimer = setTimeout(() => {
+        const expressions = pendingExpressions;
+        const controller = new AbortController();
+        pendingExpressions = [];
+        currentController = controller;
+
+        lastFlush = lastFlush
+            .then(() => flushExpressions(expressions, controller))
+            .catch((error) => {
+                console.error('Erro ao conectar com a API:', error);
+                errorArea.textContent = 'Não foi possível conectar ao servidor.';
+            });
+    }, delay);
+}
+
+/**
+ * Recebe uma expressão do input e agenda o seu envio para a API do backend.
+ * Envios em sequência rápida são acumulados e vão juntos depois do debounce.
+ * O resultado de uma expressão sem variáveis já avaliada sai do cache local
+ * na hora. Se o servidor guarda histórico, ela ainda vai para ele, junto com
+ * as próximas expressões ou depois de `recordDelay`; se não guarda, nenhuma
+ * requisição é feita, e repetições seguidas de uma expressão sem atribuição
+ * são enviadas uma vez só.
+ * Também trata os erros de conexão se a API não estiver disponível.
+ */
+const sendExpression = () => {
+    const expression = inputField.value;
+    if (!expression) {
+        result.textContent = '0';
+        return;
+    }
+
+    if (serverKeepsHistory || !pendingExpressions.length) {
+        const data = isVariableFree(expression) ? recallResult(expression) : undefined;
+        if (data) {
+            // a newer answer is already on screen
+            if (currentController) {
+                currentController.abort();
             }
-        } else {
-            console.error('Erro com a resposta da requisição HTTP.');
+            showResponse(data);
+            if (!serverKeepsHistory) {
+                return;
+            }
+            pendingExpressions.push(expression);
+            // only the history is waiting for these, so more of them can go together
+            const cachedOnly = pendingExpressions.every(
+                (pending) => isVariableFree(pending) && resultCache.has(cacheKey(pending))
+            );
+            scheduleFlush(cachedOnly ? recordDelay : debounceDelay);
+            return;
         }
-    } catch (error) {
-        console.error('Erro ao conectar com a API:', error);
-        errorArea.textContent = 'Não foi possível conectar ao servidor.';
     }
+
+    const previous = pendingExpressions[pendingExpressions.length - 1];
+    if (serverKeepsHistory || expression !== previous || expression.includes('=')) {
+        pendingExpressions.push(expression);
+    }
+
+    // a newer expression makes the results of the last flush useless
+    if (currentController) {
+        currentController.abort();
+    }
+    scheduleFlush(debounceDelay);
 };
 
 /**
@@ -83,6 +406,13 @@ const sendExpression = async () => {
 const resetData = async () => {
     const resetUrl = apiUrl + "/interpreter/reset";
 
+    // expressions still waiting for the debounce would run after the reset
+    clearTimeout(debounceTimer);
+    pendingExpressions = [];
+    if (currentController) {
+        currentController.abort();
+    }
+
     try {
         const response = await fetch(resetUrl, {
             method: 'POST',
@@ -130,3 +460,9 @@ inputField.addEventListener('keypress', (event) => {
         sendExpression();
     }
 });
+
+/**
+ * Checks on load whether the server keeps a result history, which decides
+ * if expressions may be answered by the local cache and the batch endpoint.
+ */
+checkServerHistory();
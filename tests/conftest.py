@@ -0,0 +1,26 @@
+from src.backend.main import create_app
+from src.backend.server.settings import Settings
+
+from fastapi.testclient import TestClient
+
+import pytest
+
+
+@pytest.fixture
+def settings(tmp_path) -> Settings:
+    """
+    Server settings that keep every file of the app in a temporary directory.
+    """
+    settings: Settings = Settings()
+    settings.log_filename = str(tmp_path / "app.log")
+    settings.warmup_top = 0
+    return settings
+
+
+@pytest.fixture
+def client(settings: Settings):
+    """
+    Test client of an app started with `settings`.
+    """
+    with TestClient(create_app(settings)) as client:
+        yield client
@@ -0,0 +1,136 @@
+from src.backend.server.admission import (
+    AdmissionController,
+    Rejected,
+    estimate_cost,
+    power_bits,
+)
+
+import asyncio
+import math
+
+import pytest
+
+
+def test_lanes_follow_the_estimated_cost() -> None:
+    controller: AdmissionController = AdmissionController(cost_threshold=64)
+
+    assert estimate_cost("1+2") == 3
+    assert estimate_cost("2^3") == 3 + 32
+    assert controller.lane_of("1+2") == "cheap"
+    assert controller.lane_of("2^3^4") == "expensive"
+
+
+def test_slots_are_released() -> None:
+    controller: AdmissionController = AdmissionController(max_concurrency=1)
+
+    async def run() -> None:
+        for _ in range(3):
+            async with controller.admit("1+2", "client") as lane:
+                assert lane == "cheap"
+                assert controller.running == 1
+        assert controller.running == 0
+
+    asyncio.run(run())
+    assert controller.counters["admitted_cheap"] == 3
+
+
+def test_waiting_requests_get_the_freed_slot() -> None:
+    controller: AdmissionController = AdmissionController(max_concurrency=1)
+    order: list[str] = []
+
+    async def request(name: str) -> None:
+        async with controller.admit("1", "client"):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run() -> None:
+        await asyncio.gather(request("first"), request("second"))
+
+    asyncio.run(run())
+    assert order == ["first", "second"]
+
+
+def test_expensive_requests_leave_slots_to_cheap_ones() -> None:
+    controller: AdmissionController = AdmissionController(
+        max_concurrency=2, expensive_concurrency=1, queue_timeout=0.05
+    )
+
+    async def run() -> None:
+        async with controller.admit("", "client", "expensive"):
+            with pytest.raises(Rejected) as rejected:
+                async with controller.admit("", "client", "expensive"):
+                    pass
+            assert rejected.value.reason == "queue_timeout"
+
+            async with controller.admit("", "client", "cheap") as lane:
+                assert lane == "cheap"
+
+    asyncio.run(run())
+
+
+def test_full_queue_rejects_at_once() -> None:
+    controller: AdmissionController = AdmissionController(
+        max_concurrency=1, max_queue=0
+    )
+
+    async def run() -> None:
+        async with controller.admit("1", "client"):
+            with pytest.raises(Rejected) as rejected:
+                async with controller.admit("1", "client"):
+                    pass
+            assert (rejected.value.status, rejected.value.reason) == (503, "queue_full")
+
+    asyncio.run(run())
+    assert controller.counters["rejected_queue_full"] == 1
+
+
+def test_clients_over_their_rate_are_rejected() -> None:
+    controller: AdmissionController = AdmissionController(rate=1.0, burst=2.0)
+
+    async def run() -> None:
+        for _ in range(2):
+            async with controller.admit("1", "greedy"):
+                pass
+        with pytest.raises(Rejected) as rejected:
+            async with controller.admit("1", "greedy"):
+                pass
+        assert (rejected.value.status, rejected.value.reason) == (429, "rate_limited")
+        assert rejected.value.retry_after > 0
+
+        async with controller.admit("1", "other"):
+            pass
+
+    asyncio.run(run())
+
+
+def test_patient_requests_wait_instead_of_being_rejected() -> None:
+    controller: AdmissionController = AdmissionController(
+        max_concurrency=1, max_queue=0, queue_timeout=0.01, rate=1.0, burst=1.0
+    )
+
+    async def hold() -> None:
+        async with controller.admit("1", "holder"):
+            await asyncio.sleep(0.05)
+
+    async def run() -> None:
+        holder: asyncio.Task = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        for _ in range(3):
+            async with controller.admit("1", "stream", patient=True):
+                pass
+        await holder
+
+    asyncio.run(run())
+    assert controller.counters["admitted_cheap"] == 4
+    assert controller.running == controller.queued == 0
+
+
+def test_literal_powers_are_weighed_by_their_size() -> None:
+    controller: AdmissionController = AdmissionController(cost_threshold=64)
+
+    assert power_bits("2^10") == pytest.approx(10)
+    assert power_bits("9^9^7") == pytest.approx(9**7 * math.log2(9))
+    assert power_bits("1^99^99") == 0
+    assert controller.lane_of("2^10 + 1") == "cheap"
+    assert controller.lane_of("9^9^7") == "expensive"
+    assert estimate_cost("9^9^9^9") > 2**50
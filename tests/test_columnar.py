@@ -0,0 +1,61 @@
+from src.backend.server.columnar import FLOAT64_MEDIA_TYPE, BufferResponse
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from array import array
+
+import pytest
+
+BUFFERS: list = [b"head", memoryview(array("d", [1.5, 2.5])).cast("B"), b"!" * 600]
+BODY: bytes = b"".join(bytes(buffer) for buffer in BUFFERS)
+
+
+def buffer_app() -> FastAPI:
+    app: FastAPI = FastAPI()
+
+    @app.get("/buffers")
+    async def buffers() -> BufferResponse:
+        return BufferResponse(BUFFERS, media_type=FLOAT64_MEDIA_TYPE)
+
+    return app
+
+
+async def passthrough(request, call_next):
+    return await call_next(request)
+
+
+@pytest.mark.parametrize("middleware", [None, "gzip", "base"])
+def test_buffer_response_sends_bytes_through_middleware(middleware) -> None:
+    sent: list = []
+    app: FastAPI = buffer_app()
+    if middleware == "gzip":
+        app.add_middleware(GZipMiddleware, minimum_size=10)
+    elif middleware == "base":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=passthrough)
+
+    async def recording(scope, receive, send):
+        async def record(message):
+            sent.append(message)
+            await send(message)
+
+        await app(scope, receive, record)
+
+    with TestClient(recording) as client:
+        response = client.get("/buffers", headers={"Accept-Encoding": "gzip"})
+
+    assert response.content == BODY
+    assert response.headers["content-type"] == FLOAT64_MEDIA_TYPE
+    assert all(
+        type(message["body"]) is bytes
+        for message in sent
+        if message["type"] == "http.response.body"
+    )
+
+
+def test_buffer_response_counts_bytes_of_every_buffer() -> None:
+    response: BufferResponse = BufferResponse(BUFFERS)
+
+    assert response.headers["content-length"] == str(len(BODY))
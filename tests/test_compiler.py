@@ -0,0 +1,39 @@
+from src.backend.interpreter.compiler import MAX_FOLDED_BITS, _compile, compile_tree
+from src.backend.interpreter.evaluator import parse_expression
+from src.backend.interpreter.functions import UserFunction
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import EXACT
+
+import time
+
+
+def test_small_constant_subtrees_are_folded() -> None:
+    assert type(_compile(parse_expression("2^100 * 3"), EXACT)).__name__ == "_Constant"
+
+
+def test_huge_powers_are_left_to_run_time() -> None:
+    started: float = time.perf_counter()
+    compiled = _compile(parse_expression("9^9^9 + x"), EXACT)
+
+    assert callable(compiled)
+    assert time.perf_counter() - started < 1.0
+    assert callable(_compile(parse_expression(f"2^{MAX_FOLDED_BITS + 1}"), EXACT))
+
+
+def test_compiled_programs_match_the_interpreter() -> None:
+    interpreter: Interpreter = Interpreter()
+    for text in ("x = 3", "2^5000 - x", "-(7^3) * x / 2", "sqrt(16) + 2^0.5"):
+        tree = parse_expression(text)
+        assert interpreter.run(compile_tree(tree, EXACT), record=False) == (
+            interpreter.evaluate(tree, record=False)
+        )
+
+
+def test_add_program_keeps_the_first_one() -> None:
+    function: UserFunction = UserFunction("f", ("x",), parse_expression("x + 1"))
+
+    first = function.add_program("exact", "first")
+    second = function.add_program("exact", "second")
+
+    assert first == second == "first"
+    assert function.programs == {"exact": "first"}
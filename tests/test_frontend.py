@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+SCRIPT: Path = Path(__file__).parent.parent / "src" / "frontend" / "script.js"
+
+# runs the frontend with a fake page, clock and API, then prints the requests
+HARNESS: str = """
+const fs = require('fs');
+const vm = require('vm');
+
+const elements = {};
+const element = (id) => elements[id] ??= {
+    value: '', textContent: '', focus() {},
+    addEventListener(type, listener) { this[type] = listener; },
+};
+let now = 0;
+let timers = [];
+const requests = [];
+const answer = (expression) => ({ expression: expression, result: `r(${expression})` });
+
+const page = {
+    document: { getElementById: element }, console: console, alert() {},
+    AbortController: AbortController,
+    setTimeout: (callback, delay) => {
+        const timer = { at: now + delay, callback: callback };
+        timers.push(timer);
+        return timer;
+    },
+    clearTimeout: (timer) => { timers = timers.filter((other) => other !== timer); },
+    fetch: async (url, options = {}) => {
+        const path = url.replace(/^https?:\\/\\/[^/]+/, '');
+        const body = options.body ? JSON.parse(options.body) : null;
+        requests.push({ path: path, body: body });
+        const data = path === '/history' ? { size: 100, count: 0, results: {} }
+            : path === '/expressions' ? answer(body.expression)
+            : body.expressions.map(answer);
+        return { ok: true, json: async () => data };
+    },
+};
+vm.runInNewContext(fs.readFileSync(process.argv[1], 'utf8'), page);
+
+const settle = () => new Promise((resolve) => setImmediate(resolve));
+const advance = async (milliseconds) => {
+    const until = now + milliseconds;
+    for (;;) {
+        for (let round = 0; round < 20; round++) await settle();
+        const due = timers.filter((timer) => timer.at <= until).sort((a, b) => a.at - b.at)[0];
+        if (!due) break;
+        timers = timers.filter((timer) => timer !== due);
+        now = due.at;
+        due.callback();
+    }
+    now = until;
+};
+
+(async () => {
+    await advance(0);
+    const shown = [];
+    for (const expression of JSON.parse(process.argv[2])) {
+        element('expression-input').value = expression;
+        element('enter-btn').click();
+        shown.push(element('result').textContent);
+        await advance(300);
+    }
+    await advance(5000);
+    console.log(JSON.stringify({ requests: requests, shown: shown }));
+})();
+"""
+
+
+def run_frontend(expressions: list[str]) -> dict:
+    output = subprocess.run(
+        ["node", "-e", HARNESS, str(SCRIPT), json.dumps(expressions)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs Node.js")
+def test_cached_answers_reach_the_history_in_fewer_requests() -> None:
+    typed: list[str] = ["2+2", "2+2", "2+2", "x = 1", "2+2"]
+
+    run: dict = run_frontend(typed)
+
+    requests: list[dict] = [r for r in run["requests"] if r["path"] != "/history"]
+    sent: list[str] = []
+    for request in requests:
+        body: dict = request["body"]
+        sent += body["expressions"] if "expressions" in body else [body["expression"]]
+        assert body.get("mode", "shared") == "shared"
+    # every expression enters the server history, in order, in fewer requests
+    assert sent == typed
+    assert len(requests) == 3
+    # repeats are shown from the local cache before their request
+    assert run["shown"][1:3] == ["r(2+2)", "r(2+2)"]
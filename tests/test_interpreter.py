@@ -0,0 +1,205 @@
+from src.backend.batch import BatchResult, evaluate_sequential, read_expressions
+from src.backend.benchmarks.import_time import CORE_MODULES, WEB_PACKAGES
+from src.backend.interpreter.environment import Environment, VariableMap
+from src.backend.interpreter.evaluator import evaluate_expression, parse_expression
+from src.backend.interpreter.interpreter import Interpreter
+from src.backend.interpreter.numeric import parse_mode
+from src.backend.interpreter.profiler import ProfilingInterpreter
+from src.backend.interpreter.values import Number
+from src.backend.utils.profiling import AllocationProfiler
+
+from concurrent.futures import ThreadPoolExecutor
+
+import subprocess
+import sys
+
+import pytest
+
+
+def variables(interpreter: Interpreter) -> dict:
+    return {name: number.Value for name, number in interpreter.variables.items()}
+
+
+def value(text: str, interpreter: Interpreter, mode: str | None = None):
+    result = evaluate_expression(
+        text, interpreter, mode=parse_mode(mode) if mode else None
+    )
+    return result.Value
+
+
+@pytest.mark.parametrize(
+    "mode, text, result",
+    [
+        ("exact", "2^100 + 1", str(2**100 + 1)),
+        ("float64", "1/3", "0.3333333333333333"),
+        ("decimal:30", "1/3", "0.333333333333333333333333333333"),
+    ],
+)
+def test_numeric_modes(mode: str, text: str, result: str) -> None:
+    assert str(value(text, Interpreter(), mode)) == result
+
+
+def test_assignments_are_committed() -> None:
+    interpreter: Interpreter = Interpreter()
+
+    assert value("x = 4", interpreter) == 4
+    assert value("x * 2 + 1", interpreter) == 9
+    assert variables(interpreter) == {"x": 4}
+
+
+def test_concurrent_assignments_are_all_committed() -> None:
+    interpreter: Interpreter = Interpreter()
+    names: list[str] = [f"v{index}" for index in range(64)]
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda name: value(f"{name} = 1", interpreter), names))
+
+    assert sorted(interpreter.variables) == sorted(names)
+
+
+def test_commits_from_before_a_reset_are_dropped() -> None:
+    interpreter: Interpreter = Interpreter()
+    value("x = 1", interpreter)
+    stale = interpreter.environment.snapshot()
+
+    interpreter.environment.reset()
+
+    assert interpreter.environment.commit({"y": Number(2)}, stale) is None
+    assert variables(interpreter) == {}
+
+
+def test_read_only_evaluations_from_before_a_reset_are_dropped() -> None:
+    interpreter: Interpreter = Interpreter()
+    value("x = 1", interpreter)
+    stale = interpreter.environment.snapshot()
+
+    interpreter.environment.reset()
+
+    assert interpreter.environment.commit({}, stale) is None
+    assert interpreter.history.record(Number(1), stale.epoch) == 0
+    assert interpreter.history.entries() == []
+
+
+def test_variable_maps_share_what_commits_leave_untouched() -> None:
+    loaded: dict = {f"v{index}": Number(index) for index in range(1000)}
+    environment: Environment = Environment()
+    first = environment.load(loaded, 0)
+    expected: dict = dict(loaded)
+
+    snapshot = first
+    for index in range(500):
+        changes: dict = {f"v{index * 3}": Number(-index), f"w{index}": Number(index)}
+        snapshot = environment.commit(changes, snapshot)
+        expected.update(changes)
+
+    variables: VariableMap = snapshot.variables
+    assert len(variables) == len(expected)
+    assert dict(variables.items()) == expected
+    assert sorted(variables) == sorted(expected)
+    assert variables.get("missing") is None and "missing" not in variables
+    # earlier snapshots and the loaded dict are never modified
+    assert dict(first.variables.items()) == loaded
+    assert len(loaded) == 1000
+
+
+def test_user_functions_remember_pure_calls() -> None:
+    interpreter: Interpreter = Interpreter()
+    value("f(n) = n*2 + 1", interpreter)
+
+    assert value("f(4) + f(4)", interpreter) == 18
+    assert interpreter.functions["f"].stats()["memo_hits"] == 1
+
+    value("g(n) = n*x", interpreter)
+    assert not interpreter.functions["g"].stats()["memoized"]
+
+
+def test_wrong_calls_raise() -> None:
+    interpreter: Interpreter = Interpreter()
+    value("f(a) = a", interpreter)
+
+    with pytest.raises(ValueError):
+        value("g(1)", interpreter)
+    with pytest.raises(TypeError):
+        value("f(1, 2)", interpreter)
+
+
+def test_history_names_refer_to_results() -> None:
+    interpreter: Interpreter = Interpreter(history_size=2)
+    for text in ("10", "20", "30"):
+        value(text, interpreter)
+
+    assert value("ans + _2", interpreter) == 50
+    with pytest.raises(ValueError):
+        value("_1", interpreter)
+
+    interpreter.environment.reset()
+    assert interpreter.history.entries() == []
+
+
+def test_profiling_keeps_the_effects_of_the_evaluation() -> None:
+    interpreter: Interpreter = Interpreter()
+    profiler: ProfilingInterpreter = ProfilingInterpreter(interpreter)
+
+    result: Number = profiler.evaluate(parse_expression("y = 2^10 + 1"))
+
+    assert result.Value == 1025
+    assert variables(interpreter) == {"y": 1025}
+    (root,) = profiler.profile.children.values()
+    assert root.label == "Assignment(y)"
+    assert root.as_dict()["children"][0]["max_bits"] == 11
+    assert all(line.startswith("Assignment(y)") for line in root.collapsed())
+
+
+def test_allocation_profiler_measures_each_stage() -> None:
+    profiler: AllocationProfiler = AllocationProfiler(enabled=True)
+    try:
+        assert profiler.evaluate("3^1000 - 7", Interpreter()).Value == 3**1000 - 7
+        report = profiler.report()
+    finally:
+        profiler.stop()
+
+    assert report["requests"] == 1
+    assert set(report["stages"]) == {"lexing", "parsing", "evaluation"}
+
+
+def test_batch_carries_variables_between_lines(tmp_path) -> None:
+    path = tmp_path / "input.txt"
+    path.write_text("x = 2\r\n\nx ^ 10\n1 +\n")
+
+    results: list[BatchResult] = list(
+        evaluate_sequential(read_expressions([str(path)]))
+    )
+
+    assert results[:3] == [
+        BatchResult(1, "x = 2", "2"),
+        BatchResult(2, "", ""),
+        BatchResult(3, "x ^ 10", "1024"),
+    ]
+    assert (results[3].line, results[3].result, results[3].type_error) == (
+        4,
+        None,
+        "SyntaxError",
+    )
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_imports_no_web_packages(module: str) -> None:
+    probe: str = (
+        f"import sys, {module}\n"
+        f"print(sorted(name for name in {WEB_PACKAGES!r} if name in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    )
+
+    assert output.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("text", ["9^9^7", "(2^600000) * (2^600000)", "x = 3^2^20"])
+def test_exact_integers_are_bounded(text: str) -> None:
+    interpreter: Interpreter = Interpreter()
+
+    with pytest.raises(OverflowError):
+        value(text, interpreter)
+    assert variables(interpreter) == {}
+    assert value("2^1000000 - 2^1000000", interpreter) == 0
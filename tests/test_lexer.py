@@ -0,0 +1,74 @@
+from src.backend.lexer.lexer import Lexer
+from src.backend.token.tokens import TokenType
+from src.backend.utils.raises import InvalidCharacterInLexerError
+
+import logging
+
+import pytest
+
+
+def kinds(text) -> list[tuple[TokenType, object]]:
+    return [(token.type, token.value) for token in Lexer(text).generate_tokens()]
+
+
+def test_tokens_of_an_assignment() -> None:
+    assert kinds("x1 = 2.5 * sqrt(4)") == [
+        (TokenType.VARIABLE, "x1"),
+        (TokenType.EQUAL, None),
+        (TokenType.NUMBER, 2.5),
+        (TokenType.MULTIPLY, None),
+        (TokenType.SQRT, None),
+        (TokenType.LEFT_PARENTHESES, None),
+        (TokenType.NUMBER, 4),
+        (TokenType.RIGHT_PARENTHESES, None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "text", ["1+2\r\n", "\t 1+2 \n", " 1+2 ", b"1+2\r\n", b" 1+2\x0c"]
+)
+def test_surrounding_whitespace_is_skipped(text) -> None:
+    assert kinds(text) == [
+        (TokenType.NUMBER, 1),
+        (TokenType.PLUS, None),
+        (TokenType.NUMBER, 2),
+    ]
+
+
+def test_positions_are_offsets_in_the_untrimmed_text() -> None:
+    tokens = list(Lexer("  ab+1").generate_tokens())
+
+    assert [(token.start, token.end) for token in tokens] == [(2, 4), (4, 5), (5, 6)]
+
+
+@pytest.mark.parametrize("source", [bytes, bytearray, memoryview])
+def test_binary_sources_match_text(source) -> None:
+    text: str = "f(x, y) = x^2 + 3.25/y"
+
+    assert kinds(source(text.encode("ascii"))) == kinds(text)
+
+
+def test_memory_mapped_file(tmp_path) -> None:
+    path = tmp_path / "expression.txt"
+    path.write_bytes(b"(1 + 2) * 3\n")
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+
+    assert kinds(Lexer.from_file(str(path)).text) == kinds("(1 + 2) * 3")
+    assert list(Lexer.from_file(str(empty)).generate_tokens()) == []
+
+
+@pytest.mark.parametrize("text", ["1 $ 2", b"1 \xc3\xa9"])
+def test_illegal_characters_raise(text) -> None:
+    with pytest.raises(InvalidCharacterInLexerError):
+        kinds(text)
+
+
+def test_tokens_are_logged_at_debug_only(caplog) -> None:
+    with caplog.at_level(logging.INFO, logger="src.backend.lexer.lexer"):
+        kinds("x = 1 + 2")
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger="src.backend.lexer.lexer"):
+        kinds("x = 1 + 2")
+    assert len(caplog.records) == 6
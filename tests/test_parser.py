@@ -0,0 +1,103 @@
+from src.backend.interpreter.evaluator import parse_expression
+from src.backend.parser.arithmetic_parser import is_history_name
+from src.backend.parser.cache import ParseCache
+from src.backend.parser.incremental import Document, Edit
+from src.backend.parser.validation import Diagnostic, validate_expression
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "text, tree",
+    [
+        ("1 + 2*3", "(1+(2*3))"),
+        ("2^3^2", "(2^(3^2))"),
+        ("(1 + 2) * 3", "((1+2)*3)"),
+    ],
+)
+def test_precedence(text: str, tree: str) -> None:
+    assert repr(parse_expression(text)) == tree
+
+
+def test_empty_expression() -> None:
+    assert parse_expression("   ") is None
+
+
+@pytest.mark.parametrize("text", ["1 2", "(1 + 2", "1 +"])
+def test_invalid_expressions_raise(text: str) -> None:
+    with pytest.raises(Exception):
+        parse_expression(text)
+
+
+def test_function_definitions() -> None:
+    assert repr(parse_expression("f(a, b) = a*b")) == "f(a,b)=(a*b)"
+    assert repr(parse_expression("f(2, 3)")) == "f(2,3)"
+
+    with pytest.raises(Exception):
+        parse_expression("f(1) = 2")
+
+
+def test_history_names() -> None:
+    assert is_history_name("ans")
+    assert is_history_name("_3")
+    assert not is_history_name("_")
+    assert not is_history_name("answer")
+
+
+def test_diagnostics_locate_errors() -> None:
+    assert validate_expression("1 + 2") == []
+    assert validate_expression("1 $ 2") == [
+        Diagnostic(
+            "lexer", "InvalidCharacterInLexerError", "Illegal character: '$'.", 2, 3
+        )
+    ]
+
+    (unterminated,) = validate_expression("(1+2")
+    assert (unterminated.stage, unterminated.start, unterminated.end) == (
+        "parser",
+        4,
+        4,
+    )
+
+    (extra,) = validate_expression("1 2")
+    assert (extra.stage, extra.start, extra.end) == ("parser", 2, 3)
+
+
+def test_valid_expressions_fill_the_cache() -> None:
+    cache: ParseCache = ParseCache()
+
+    assert validate_expression("1+2", cache) == []
+    assert repr(cache.get("1+2", None)) == "(1+2)"
+    assert validate_expression("1+", cache) != []
+    assert cache.get("1+", None) is None
+
+
+def test_incremental_edits_match_a_full_parse() -> None:
+    document: Document = Document("1 + 2*3")
+
+    document.edit(4, 1, "(4-1)")
+    assert document.text == "1 + (4-1)*3"
+    assert repr(document.tree) == repr(parse_expression(document.text))
+
+    document.apply([Edit(0, 1, "9"), Edit(len(document.text), 0, " - x")])
+    assert document.text == "9 + (4-1)*3 - x"
+    assert repr(document.tree) == repr(parse_expression(document.text))
+    assert document.version == 3
+
+
+def test_incremental_edits_report_errors_and_recover() -> None:
+    document: Document = Document("1 + 2")
+
+    document.edit(0, 0, "*")
+    assert not document.valid
+    assert document.tree is None
+    assert document.diagnostics[0].stage == "parser"
+
+    document.edit(0, 1, "")
+    assert document.valid
+    assert repr(document.tree) == "(1+2)"
+
+
+def test_edits_out_of_the_text_raise() -> None:
+    with pytest.raises(ValueError):
+        Document("1").edit(5, 0, "2")
@@ -0,0 +1,136 @@
+from src.backend.interpreter import persistence
+from src.backend.interpreter.environment import Environment
+from src.backend.interpreter.persistence import (
+    SnapshotError,
+    VariableStore,
+    decode_snapshot,
+    encode_snapshot,
+)
+from src.backend.interpreter.values import Number
+
+from decimal import Decimal
+
+import threading
+import time
+
+import pytest
+
+VALUES: dict = {
+    "small": 42,
+    "negative": -7,
+    "big": 3**200,
+    "real": 2.5,
+    "complex": 1 + 2j,
+    "decimal": Decimal("0.1000000000000000000000000001"),
+}
+
+
+def filled_environment() -> Environment:
+    environment: Environment = Environment()
+    environment.commit(
+        {name: Number(value) for name, value in VALUES.items()},
+        environment.snapshot(),
+    )
+    return environment
+
+
+def test_snapshot_round_trip_keeps_values_and_types() -> None:
+    environment: Environment = filled_environment()
+
+    variables, version = decode_snapshot(encode_snapshot(environment.snapshot()))
+
+    assert version == environment.snapshot().version
+    assert {name: number.Value for name, number in variables.items()} == VALUES
+    assert all(
+        type(variables[name].Value) is type(value) for name, value in VALUES.items()
+    )
+
+
+def test_damaged_snapshot_is_rejected() -> None:
+    data: bytes = encode_snapshot(filled_environment().snapshot())
+
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"XXXX" + data[4:])
+
+
+def test_store_restores_snapshot_and_journal(tmp_path) -> None:
+    path: str = str(tmp_path / "variables.snap")
+    environment: Environment = filled_environment()
+    store: VariableStore = VariableStore(path, journal=True)
+    store.restore(Environment())
+    store.save(environment)
+    store.close()
+
+    store = VariableStore(path, journal=True)
+    restored: Environment = Environment()
+    store.restore(restored)
+    restored.commit({"after": Number(1)}, restored.snapshot())
+    store.close()
+
+    again: Environment = Environment()
+    VariableStore(path).restore(again)
+    variables = again.snapshot().variables
+    assert {name: variables[name].Value for name in VALUES} == VALUES
+    assert variables["after"].Value == 1
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_journal_entries_are_synced_when_asked(tmp_path, monkeypatch, sync) -> None:
+    synced: list[int] = []
+    monkeypatch.setattr(persistence, "_sync_data", synced.append)
+    environment: Environment = Environment()
+    store: VariableStore = VariableStore(
+        str(tmp_path / "variables.snap"), journal=True, sync=sync
+    )
+    store.restore(environment)
+
+    environment.commit({"x": Number(1)}, environment.snapshot())
+    environment.commit({"y": Number(2)}, environment.snapshot())
+    store.close()
+
+    assert len(synced) == (2 if sync else 0)
+
+
+def test_journal_syncs_outside_the_lock_in_groups(tmp_path, monkeypatch) -> None:
+    syncing: threading.Event = threading.Event()
+    release: threading.Event = threading.Event()
+    synced: list[int] = []
+
+    def slow_sync(descriptor: int) -> None:
+        synced.append(descriptor)
+        syncing.set()
+        release.wait(5)
+
+    monkeypatch.setattr(persistence, "_sync_data", slow_sync)
+    environment: Environment = Environment()
+    store: VariableStore = VariableStore(str(tmp_path / "variables.snap"), journal=True)
+    store.restore(environment)
+
+    def assign(name: str) -> None:
+        environment.commit({name: Number(1)}, environment.snapshot())
+
+    first: threading.Thread = threading.Thread(target=assign, args=("a",))
+    first.start()
+    assert syncing.wait(5)
+    others: list[threading.Thread] = [
+        threading.Thread(target=assign, args=(name,)) for name in "bcd"
+    ]
+    for thread in others:
+        thread.start()
+    # the other commits are published while the first sync is still running
+    for _ in range(500):
+        if len(environment.snapshot().variables) == 4:
+            break
+        time.sleep(0.01)
+    assert sorted(environment.snapshot().variables) == ["a", "b", "c", "d"]
+    assert all(thread.is_alive() for thread in others)
+
+    release.set()
+    for thread in [first, *others]:
+        thread.join(5)
+    store.close()
+
+    assert len(synced) == 2
+    again: Environment = Environment()
+    VariableStore(str(tmp_path / "variables.snap")).restore(again)
+    assert sorted(again.snapshot().variables) == ["a", "b", "c", "d"]
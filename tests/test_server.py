@@ -0,0 +1,338 @@
+from src.backend.main import create_app
+from src.backend.server.columnar import FLOAT64_MEDIA_TYPE
+from src.backend.server.settings import Settings
+from src.backend.server.warmup import read_history
+
+from fastapi.testclient import TestClient
+
+from array import array
+
+import json
+import logging
+import struct
+import time
+
+EXPRESSIONS: list[str] = ["x = 3", "x * 2", "1 +", "2^0.5", "7 / 2", ""]
+
+
+def post_all(settings: Settings) -> list[bytes]:
+    with TestClient(create_app(settings)) as client:
+        return [
+            client.post("/expressions", json={"expression": text}).content
+            for text in EXPRESSIONS
+        ]
+
+
+def test_evaluations_share_the_interpreter(client: TestClient) -> None:
+    assert client.post("/expressions", json={"expression": "x = 3"}).json() == {
+        "expression": "x = 3",
+        "result": "3",
+        "type_error": None,
+        "error": None,
+    }
+    assert client.post("/expressions", json={"expression": "x + ans"}).json()[
+        "result"
+    ] == "6"
+    assert client.get("/history").json()["results"] == {"_1": "3", "_2": "6"}
+
+    error: dict = client.post("/expressions", json={"expression": "1 +"}).json()
+    assert (error["result"], error["type_error"]) == (None, "SyntaxError")
+
+
+def test_fast_serialization_sends_the_same_bytes(settings: Settings) -> None:
+    plain: list[bytes] = post_all(settings)
+    settings.fast_serialization = True
+
+    assert post_all(settings) == plain
+
+
+def test_constant_answers_are_revalidated(client: TestClient) -> None:
+    answer = client.get("/expressions", params={"expression": "2^10"})
+    assert answer.json()["result"] == "1024"
+
+    revalidated = client.get(
+        "/expressions",
+        params={"expression": "2^10"},
+        headers={"If-None-Match": answer.headers["ETag"]},
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+
+def test_reads_refuse_assignments(client: TestClient) -> None:
+    assert client.get("/expressions", params={"expression": "y = 1"}).status_code == 400
+    assert client.post("/expressions", json={"expression": "y"}).json()["error"]
+
+
+def test_debug_profiles(client: TestClient) -> None:
+    tree: dict = client.get(
+        "/expressions", params={"expression": "1 + 2", "debug": "tree"}
+    ).json()["profile"]
+    assert tree["node"] == "BinOperation(+)"
+    assert [child["node"] for child in tree["children"]] == ["Number(1)", "Number(2)"]
+
+    collapsed: str = client.get(
+        "/expressions", params={"expression": "1 + 2", "debug": "collapsed"}
+    ).json()["profile"]
+    assert all(line.startswith("BinOperation(+)") for line in collapsed.splitlines())
+
+
+def test_batch_as_json_and_float64(client: TestClient) -> None:
+    results: list[dict] = client.post(
+        "/expressions/batch", json={"expressions": ["a = 2", "a * 3", "1 /"]}
+    ).json()
+    assert [result["result"] for result in results] == ["2", "6", None]
+
+    response = client.post(
+        "/expressions/batch",
+        json={"expressions": ["1/4", "2", "1 +"], "mode": "stateless"},
+        headers={"Accept": FLOAT64_MEDIA_TYPE},
+    )
+    assert response.headers["content-type"] == FLOAT64_MEDIA_TYPE
+    assert struct.unpack_from("<4sHxxII", response.content) == (b"IAF1", 1, 3, 1)
+    assert response.content[16] == 0b011
+    assert array("d", response.content[24:]).tolist() == [0.25, 2.0, 0.0]
+
+
+def test_shared_batches_enter_the_server_history(client: TestClient) -> None:
+    client.post("/expressions", json={"expression": "2 + 2"})
+    results: list[dict] = client.post(
+        "/expressions/batch",
+        json={"expressions": ["2 + 2", "y = 5", "ans + 1"], "mode": "shared"},
+    ).json()
+
+    assert [result["result"] for result in results] == ["4", "5", "6"]
+    history: dict = client.get("/history").json()
+    assert list(history["results"].values()) == ["4", "4", "5", "6"]
+    assert client.post("/expressions", json={"expression": "y"}).json()["result"] == "5"
+
+
+def test_validation_locates_errors(client: TestClient) -> None:
+    (diagnostic,) = client.post(
+        "/expressions/validate", json={"expression": "1 $"}
+    ).json()["diagnostics"]
+    assert (diagnostic["stage"], diagnostic["start"], diagnostic["end"]) == (
+        "lexer",
+        2,
+        3,
+    )
+
+
+def test_documents_are_edited_by_version(client: TestClient) -> None:
+    document: dict = client.post("/documents", json={"text": "1+2"}).json()
+    path: str = f"/documents/{document['id']}"
+    edit: dict = {"edits": [{"offset": 3, "inserted": "*4"}], "version": 0}
+
+    assert client.patch(path, json=edit).json()["version"] == 1
+    assert client.patch(path, json=edit).status_code == 409
+    assert client.get(path).json()["text"] == "1+2*4"
+    client.delete(path)
+    assert client.get(path).status_code == 404
+
+
+def test_plot_samples_the_range(client: TestClient) -> None:
+    plot: dict = client.post(
+        "/expressions/plot",
+        json={"expression": "x^2", "start": 0, "end": 1, "pixels": 10},
+    ).json()
+
+    assert (plot["x"][0], plot["x"][-1]) == (0.0, 1.0)
+    assert all(abs(y - x * x) < 1e-12 for x, y in zip(plot["x"], plot["y"]))
+
+
+def test_stream_answers_every_line(client: TestClient) -> None:
+    response = client.post("/expressions/stream", content=b"z = 5\r\nz * 2\n1 +\n")
+    lines: list[dict] = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [line["result"] for line in lines] == ["5", "10", None]
+    assert lines[2]["type_error"] == "SyntaxError"
+
+
+def test_ndjson_stream_skips_blank_lines(client: TestClient) -> None:
+    body: bytes = b'{"expression": "1 + 2"}\n\n"2 + 2"\n'
+    response = client.post(
+        "/expressions/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert [json.loads(line)["result"] for line in response.text.splitlines()] == [
+        "3",
+        "4",
+    ]
+
+
+def test_ndjson_lines_choose_their_numeric_mode(client: TestClient) -> None:
+    body: bytes = b'{"expression": "2^70", "numeric_mode": "float64"}\n"2^70"\n'
+    response = client.post(
+        "/expressions/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+
+    assert [json.loads(line)["result"] for line in response.text.splitlines()] == [
+        "1.1805916207174113e+21",
+        str(2**70),
+    ]
+
+
+def test_stream_ends_at_a_line_too_long(settings: Settings) -> None:
+    settings.max_line_length = 16
+
+    with TestClient(create_app(settings)) as client:
+        response = client.post(
+            "/expressions/stream", content=b"1 + 1\n" + b"1+" * 20 + b"1\n2\n"
+        )
+
+    lines: list[dict] = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["result"] for line in lines] == ["2", None]
+    assert lines[1]["type_error"] == "LineTooLong"
+
+
+def test_websocket_answers_pipelined_messages_in_order(client: TestClient) -> None:
+    messages: list[dict] = [
+        {"id": 1, "type": "evaluate", "expression": "x = 2"},
+        {"id": 2, "type": "evaluate", "expression": "x * 4"},
+        {"id": 3, "type": "variables"},
+        {"id": 4, "type": "reset"},
+        {"id": 5, "type": "variables"},
+        {"id": 6, "type": "unknown"},
+    ]
+
+    with client.websocket_connect("/ws") as websocket:
+        for message in messages:
+            websocket.send_json(message)
+        answers: list[dict] = [websocket.receive_json() for _ in messages]
+
+    assert [answer["id"] for answer in answers] == [1, 2, 3, 4, 5, 6]
+    assert (answers[0]["result"], answers[1]["result"]) == ("2", "8")
+    assert answers[2]["variables"] == {"x": "2"}
+    assert answers[4]["variables"] == {}
+    assert answers[5]["type"] == "error"
+
+
+def test_websocket_mode_applies_to_later_evaluations(client: TestClient) -> None:
+    with client.websocket_connect("/ws") as websocket:
+        websocket.send_json({"type": "mode", "mode": "float64"})
+        websocket.send_json({"type": "evaluate", "expression": "1 / 4"})
+        websocket.send_json(
+            {"type": "evaluate", "expression": "2^70", "numeric_mode": "exact"}
+        )
+
+        assert websocket.receive_json()["mode"] == "float64"
+        assert websocket.receive_json()["result"] == "0.25"
+        assert websocket.receive_json()["result"] == str(2**70)
+
+
+def test_websocket_history_is_per_session(client: TestClient) -> None:
+    with client.websocket_connect("/ws") as websocket:
+        for expression in ("2", "ans * 5"):
+            websocket.send_json({"type": "evaluate", "expression": expression})
+            websocket.receive_json()
+        websocket.send_json({"type": "history"})
+
+        assert websocket.receive_json()["results"] == {"_1": "2", "_2": "10"}
+
+    assert client.get("/history").json()["count"] == 0
+
+
+def test_websocket_evaluations_leave_the_event_loop_free(settings: Settings) -> None:
+    # admitted evaluations always run in a worker thread, unadmitted ones must too
+    settings.admission_control = False
+    heavy: str = "+".join(["7^60000 - 7^60000"] * 200)
+
+    with TestClient(create_app(settings)) as client, client.websocket_connect(
+        "/ws"
+    ) as websocket:
+        started: float = time.perf_counter()
+        websocket.send_json({"id": 1, "type": "evaluate", "expression": heavy})
+        time.sleep(0.05)
+
+        request_started: float = time.perf_counter()
+        answer = client.get("/expressions", params={"expression": "1+1"})
+        assert answer.status_code == 200
+        request_time: float = time.perf_counter() - request_started
+
+        assert websocket.receive_json()["result"] == "0"
+        evaluation_time: float = time.perf_counter() - started
+
+    assert request_time < evaluation_time / 2
+
+
+def test_reads_stay_out_of_the_history_while_profiling(settings: Settings) -> None:
+    settings.allocation_profiling = True
+
+    with TestClient(create_app(settings)) as client:
+        client.post("/expressions", json={"expression": "2 + 2"})
+        read: dict = client.get(
+            "/expressions", params={"expression": "ans * 10"}
+        ).json()
+        history: dict = client.get("/history").json()
+
+    assert read["result"] == "40"
+    assert history["results"] == {"_1": "4"}
+
+
+def test_batches_and_streams_use_the_configured_interpreter(settings: Settings) -> None:
+    settings.history_size = 2
+    expressions: list[str] = ["1", "2", "3", "_3", "_1"]
+
+    with TestClient(create_app(settings)) as client:
+        batch: list[dict] = client.post(
+            "/expressions/batch", json={"expressions": expressions}
+        ).json()
+        stream: list[dict] = [
+            json.loads(line)
+            for line in client.post(
+                "/expressions/stream", content="\n".join(expressions).encode()
+            ).text.splitlines()
+        ]
+
+    for results in (batch, stream):
+        assert [result["result"] for result in results] == ["1", "2", "3", "3", None]
+        assert "left the history" in results[4]["error"]
+
+
+def test_cached_answers_are_logged_for_the_warmup(client: TestClient, caplog) -> None:
+    with caplog.at_level(logging.INFO, logger="src.backend.main"):
+        for _ in range(3):
+            client.post("/expressions", json={"expression": "6 * 7"})
+        client.get("/expressions", params={"expression": "6 * 7"})
+
+    lines: list[str] = [
+        f"{record.created} - {record.name} - INFO - {record.getMessage()}"
+        for record in caplog.records
+    ]
+    assert read_history(lines)["6 * 7"] == 4
+
+
+def test_stream_lines_wait_for_a_busy_server(settings: Settings) -> None:
+    settings.max_concurrency = 1
+    settings.max_queue = 0
+    heavy: str = "+".join(["7^60000 - 7^60000"] * 50)
+
+    with TestClient(create_app(settings)) as client, client.websocket_connect(
+        "/ws"
+    ) as websocket:
+        websocket.send_json({"type": "evaluate", "expression": heavy})
+        time.sleep(0.05)
+        response = client.post("/expressions/stream", content=b"x = 1\nx + 1\n")
+
+        assert websocket.receive_json()["result"] == "0"
+
+    assert [json.loads(line)["result"] for line in response.text.splitlines()] == [
+        "1",
+        "2",
+    ]
+
+
+def test_streams_count_against_the_rate_limit(settings: Settings) -> None:
+    settings.rate_limit = 1.0
+    settings.rate_burst = 1.0
+
+    with TestClient(create_app(settings)) as client:
+        first = client.post("/expressions/stream", content=b"1\n2\n3\n")
+        second = client.post("/expressions/stream", content=b"1\n")
+
+    assert len(first.text.splitlines()) == 3
+    assert second.status_code == 429
@@ -0,0 +1,46 @@
+from src.backend.parser.cache import ParseCache
+from src.backend.server.warmup import Warmup, read_history
+
+PREFIX: str = "2025-01-01 12:00:00,000 - src.backend.main - INFO - Expression: "
+
+
+def test_read_history_counts_log_and_frequency_lines() -> None:
+    counts = read_history(
+        [
+            PREFIX + "1+1 = 2\n",
+            PREFIX + "x = 2 = 2\n",
+            PREFIX + "f(2, 3) = 7\n",
+            "3\t1+1\n",
+            "2025-01-01 12:00:00,000 - src.backend.main - ERROR - Error in expression\n",
+        ]
+    )
+
+    assert counts == {"1+1": 4, "x = 2": 1, "f(2, 3)": 1}
+
+
+def test_read_history_keeps_function_definitions_whole() -> None:
+    counts = read_history(
+        [
+            PREFIX + "f(x,y) = x^2 + y = f(x, y) = ((x^2)+y)\n",
+            PREFIX + "g( a ) = a = g(a) = a\n",
+        ]
+    )
+
+    assert counts == {"f(x,y) = x^2 + y": 1, "g( a ) = a": 1}
+
+
+def test_warmup_parses_definitions_from_a_log(tmp_path) -> None:
+    history = tmp_path / "app.log"
+    history.write_text(
+        PREFIX + "f(x) = x^2 + 1 = f(x) = ((x^2)+1)\n" + PREFIX + "f(3) = 10\n" * 2,
+        encoding="utf-8",
+    )
+    cache: ParseCache = ParseCache()
+
+    warmup: Warmup = Warmup(str(history), top=10)
+    warmup.run(cache)
+
+    assert warmup.status()["failed"] == 0
+    assert warmup.parsed == 2
+    assert "f(x) = x^2 + 1" in cache
+    assert "f(3)" in cache